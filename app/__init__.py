@@ -1,9 +1,5 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_migrate import Migrate
-from flask_apispec import FlaskApiSpec
-from apispec import APISpec
-from apispec.ext.marshmallow import MarshmallowPlugin
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
@@ -11,7 +7,19 @@ import json
 import logging
 from logging.handlers import RotatingFileHandler
 from .models.sensor_data import db, SensorData
+from .models import rollups  # noqa: F401 - registers the rollup tables
+from .models import alerts  # noqa: F401 - registers the alert tables
+from .models import station_latest  # noqa: F401 - registers the latest-reading snapshot
 from .utils.errors import register_error_handlers
+from .utils.database import database_uri, engine_options, register_sqlite_pragmas
+from .services import shared_state  # noqa: F401 - registers the sqlite:// rate limit storage
+from .services.cache import init_cache
+from .services.events import init_event_hub
+from .services.write_queue import init_write_queue
+from .services.metrics import init_metrics
+from .services.profiling import init_profiling
+from .services.api_docs import init_api_docs
+from .services.storage import init_storage
 
 def load_config():
     """Load configuration from environment variables in production, fall back to config.py in development"""
@@ -101,16 +109,112 @@ def default_config():
         'UPDATE_INTERVALS': {'charts': 30000, 'alerts': 30000}
     }
 
-def create_app():
+# Performance tuning options and their defaults
+TUNING_DEFAULTS = {
+    'SENSOR_DATA_BATCH_LIMIT': 5000,
+    'CSV_EXPORT_CHUNK_SIZE': 1000,
+    'ROLLUPS_ENABLED': True,
+    'ROLLUP_COMPACT_BATCH': 50000,
+    'SENSOR_DATA_JSON_ENCODER': 'json',
+    'RESPONSE_CACHE_TTL': 30,
+    'RESPONSE_CACHE_SIZE': 256,
+    'SHARED_STATE_URL': None,
+    'STREAM_MAX_SECONDS': 300,
+    'STREAM_HEARTBEAT_SECONDS': 15,
+    'STREAM_POLL_INTERVAL': 1.0,
+    'STREAM_QUEUE_SIZE': 1000,
+    'STREAM_MAX_PER_WORKER': 16,
+    'INGEST_MODE': 'sync',
+    'INGEST_QUEUE_PATH': None,
+    'INGEST_QUEUE_MAX_DEPTH': 100000,
+    'INGEST_QUEUE_DURABILITY': 'normal',
+    'INGEST_FLUSH_ROWS': 500,
+    'INGEST_FLUSH_MS': 200,
+    'DATABASE_URL': None,
+    'DB_POOL_SIZE': 5,
+    'DB_MAX_OVERFLOW': 10,
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 16384,
+    'SQLITE_MMAP_SIZE': 268435456,
+    'RETENTION_RAW_DAYS': None,
+    'RETENTION_ROLLUP_DAYS': {'1m': None, '1h': None, '1d': None},
+    'RETENTION_METRIC_DAYS': {},
+    'RETENTION_BATCH_SIZE': 5000,
+    'ARCHIVE_DIR': None,
+    'RETENTION_ARCHIVE_MONTHS': None,
+    'ALERTS_ENABLED': True,
+    'ALERT_HYSTERESIS': 0.02,
+    'ALERT_MIN_DURATION_SECONDS': 0,
+    'ALERT_EVALUATE_BATCH': 5000,
+    'METRICS_ENABLED': True,
+    'METRICS_FLUSH_SECONDS': 5,
+    'PROFILE_SAMPLE_EVERY': 0,
+    'PROFILE_DIR': None,
+    'PROFILE_ON_DEMAND': False,
+    'PROFILE_MAX_FILES': 100,
+    'FAST_BOOT': False,
+    'API_SPEC_FILE': None,
+    'STORAGE_BACKEND': 'sql',
+    'STORAGE_DIR': None,
+    'STORAGE_SEGMENT_ROWS': 100000,
+    'BULK_BATCH_ROWS': 50000,
+    'MAX_CONTENT_LENGTH': 268435456,
+    'EXPORT_PARQUET_COMPRESSION': 'zstd',
+}
+
+def load_tuning_config():
+    """Load tuning options from config.py in development or environment variables, falling back to TUNING_DEFAULTS"""
+    config_module = None
+    if os.environ.get('FLASK_ENV', 'development') == 'development':
+        try:
+            import config as config_module
+        except ImportError:
+            config_module = None
+
+    settings = {}
+    for key, default in TUNING_DEFAULTS.items():
+        if config_module is not None and hasattr(config_module, key):
+            settings[key] = getattr(config_module, key)
+        elif key in os.environ:
+            # Environment values are JSON encoded like STATIONS, plain strings are taken as-is
+            try:
+                settings[key] = json.loads(os.environ[key])
+            except json.JSONDecodeError:
+                settings[key] = os.environ[key]
+        else:
+            settings[key] = default
+    return settings
+
+def create_app(config_overrides=None):
     app = Flask(__name__)
     CORS(app)
 
+    # Load configuration
+    config = load_config()
+    app.config.update(config)
+    app.config.update(load_tuning_config())
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Rate limits and cached responses are shared by all workers through this store
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    if not app.config['SHARED_STATE_URL']:
+        app.config['SHARED_STATE_URL'] = 'sqlite:///' + os.path.join(basedir, '..', 'shared_state.db')
+    if not app.config['INGEST_QUEUE_PATH']:
+        app.config['INGEST_QUEUE_PATH'] = os.path.join(basedir, '..', 'ingest_queue.db')
+    if not app.config['PROFILE_DIR']:
+        app.config['PROFILE_DIR'] = os.path.join(basedir, '..', 'logs', 'profiles')
+    if not app.config['STORAGE_DIR']:
+        app.config['STORAGE_DIR'] = os.path.join(basedir, '..', 'storage')
+
     # Initialize rate limiter
     limiter = Limiter(
         key_func=get_remote_address,
         app=app,
         default_limits=["10000 per day", "1000 per hour"],
-        storage_uri="memory://"
+        storage_uri=app.config['SHARED_STATE_URL']
     )
     app.limiter = limiter  # Store limiter instance on app
 
@@ -139,48 +243,42 @@ def create_app():
     app.logger.setLevel(logging.INFO)
     app.logger.info('Smart Urban Vitality startup')
 
-    # Load configuration
-    config = load_config()
-    app.config.update(config)
-
     # Database configuration
-    basedir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, '..', 'app.db')
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', database_uri(
+        app.config['DATABASE_URL'] or 'sqlite:///app.db', os.path.abspath(os.path.join(basedir, '..'))))
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-    # API documentation configuration
-    app.config.update({
-        'APISPEC_SPEC': APISpec(
-            title='Smart Urban Vitality API',
-            version='v1',
-            plugins=[MarshmallowPlugin()],
-            openapi_version='2.0.0'
-        ),
-        'APISPEC_SWAGGER_URL': '/swagger/',  # URI to access API Doc JSON
-        'APISPEC_SWAGGER_UI_URL': '/swagger-ui/'  # URI to access UI of API Doc
-    })
-
     # Initialize extensions
     db.init_app(app)
-    migrate = Migrate(app, db)
-    docs = FlaskApiSpec(app)
-
-    # Create tables
     with app.app_context():
-        try:
-            db.create_all()
-            app.logger.info('Database tables created successfully')
-        except Exception as e:
-            app.logger.error(f'Error creating database tables: {str(e)}')
+        register_sqlite_pragmas(db.engine, app.config)
+        init_metrics(app, db.engine)
+    init_profiling(app)
+    init_cache(app)
+    init_event_hub(app)
+    init_write_queue(app)
+    init_storage(app)
+
+    # Create tables; with FAST_BOOT the schema comes from `flask db upgrade` only
+    if not app.config['FAST_BOOT']:
+        with app.app_context():
+            try:
+                db.create_all()
+                app.logger.info('Database tables created successfully')
+            except Exception as e:
+                app.logger.error(f'Error creating database tables: {str(e)}')
 
     # Register routes
     from .routes import register_routes
     register_routes(app)
 
-    # Register all documented endpoints with API documentation
-    with app.app_context():
-        for view in app.view_functions.values():
-            if hasattr(view, '_spec'):
-                docs.register(view)
+    # Register CLI commands
+    from .cli import init_migrate, register_commands
+    init_migrate(app)
+    register_commands(app)
+
+    # API documentation for every documented endpoint
+    init_api_docs(app)
 
     return app
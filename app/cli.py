@@ -0,0 +1,192 @@
+import click
+import time
+from datetime import datetime, UTC
+from flask import current_app
+from .models.sensor_data import db
+from .services.api_docs import export_openapi
+from .services.rollups import compact_rollups
+from .services.retention import apply_retention
+from .services.alerts import evaluate_alerts
+from .services.storage import get_storage
+from .services.backfill import backfill, detect_format, TIME_FIELDS
+from .services.maintenance import maintain_database, sqlite_size
+from .services.serialization import PYARROW_AVAILABLE
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']
+
+class LazyMigrateGroup(click.Group):
+    """The `flask db` commands, importing Flask-Migrate and alembic only when one of them runs."""
+
+    def _migrate_group(self):
+        app = current_app._get_current_object()
+        if 'migrate' not in app.extensions:
+            from flask_migrate import Migrate
+
+            Migrate(app, db)
+        return app.cli.commands['db']
+
+    def list_commands(self, ctx):
+        return self._migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_group().get_command(ctx, name)
+
+def init_migrate(app):
+    """Register Flask-Migrate, deferring its import until `flask db` runs under FAST_BOOT."""
+    if app.config['FAST_BOOT']:
+        app.cli.add_command(LazyMigrateGroup('db', help='Perform database migrations.'))
+    else:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+
+def utc(value):
+    """Read a naive --since/--until value as UTC."""
+    return value.replace(tzinfo=UTC) if value is not None else None
+
+def drain(step, batch_size):
+    """Run a watermark step until it has nothing left to process; returns the rows processed."""
+    total = 0
+    while processed := step(batch_size):
+        total += processed
+    return total
+
+def register_commands(app):
+    @app.cli.command('compact-rollups')
+    @click.option('--batch-size', default=None, type=int,
+                  help='Raw rows folded per pass (defaults to ROLLUP_COMPACT_BATCH).')
+    def compact_rollups_command(batch_size):
+        """Fold raw sensor data newer than the watermark into the rollup tables."""
+        total = drain(compact_rollups, batch_size or app.config['ROLLUP_COMPACT_BATCH'])
+        click.echo(f'Rollups up to date ({total} rows compacted)')
+
+    @app.cli.command('apply-retention')
+    def apply_retention_command():
+        """Expire raw readings, rollups and archive files past their retention."""
+        summary = apply_retention()
+        click.echo(f"Removed {summary['raw']} raw readings")
+        for metric, changed in summary['metrics'].items():
+            click.echo(f'Cleared {metric} in {changed} readings')
+        for level, removed in summary['rollups'].items():
+            click.echo(f'Removed {removed} {level} rollup buckets')
+        for name in summary['archives']:
+            click.echo(f'Deleted archive {name}')
+
+    @app.cli.command('evaluate-alerts')
+    @click.option('--batch-size', default=None, type=int,
+                  help='Readings evaluated per pass (defaults to ALERT_EVALUATE_BATCH).')
+    def evaluate_alerts_command(batch_size):
+        """Evaluate readings newer than the alerts watermark against THRESHOLDS."""
+        total = drain(evaluate_alerts, batch_size or app.config['ALERT_EVALUATE_BATCH'])
+        click.echo(f'Alerts up to date ({total} readings evaluated)')
+
+    @app.cli.command('sync-storage')
+    @click.option('--force', is_flag=True, help='Also write the remaining rows as a partial segment.')
+    def sync_storage_command(force):
+        """Copy new sensor data into the STORAGE_BACKEND's segments."""
+        storage = get_storage()
+        copied = storage.sync(force=force)
+        click.echo(f'Copied {copied} rows')
+        for key, value in storage.stats().items():
+            click.echo(f'{key}: {value}')
+
+    @app.cli.command('export-data')
+    @click.argument('path', type=click.Path())
+    @click.option('--format', 'export_format', default='parquet', type=click.Choice(['parquet', 'arrow']),
+                  help='Parquet file (or directory with --partition) or Arrow IPC stream.')
+    @click.option('--station-id', 'station_ids', multiple=True, type=int,
+                  help='Station to export; repeat for several (defaults to all stations).')
+    @click.option('--since', type=click.DateTime(DATE_FORMATS), help='Start of the window in UTC (inclusive).')
+    @click.option('--until', type=click.DateTime(DATE_FORMATS), help='End of the window in UTC (exclusive).')
+    @click.option('--partition', is_flag=True, help='Write a Parquet directory partitioned by station and month.')
+    @click.option('--batch-size', default=None, type=int,
+                  help='Rows read from the database per batch (defaults to BULK_BATCH_ROWS).')
+    def export_data_command(path, export_format, station_ids, since, until, partition, batch_size):
+        """Export sensor data to PATH as Parquet or Arrow."""
+        if not PYARROW_AVAILABLE:
+            raise click.ClickException('export-data requires pyarrow to be installed')
+        if partition and export_format != 'parquet':
+            raise click.BadParameter('--partition only applies to --format parquet')
+        from .services.bulk import iter_export_batches, write_export, write_partitioned_parquet
+
+        batches = iter_export_batches(sorted(station_ids) or None, utc(since) or datetime.fromtimestamp(0, UTC),
+                                      utc(until), batch_size or app.config['BULK_BATCH_ROWS'])
+        compression = app.config['EXPORT_PARQUET_COMPRESSION']
+        if partition:
+            files = write_partitioned_parquet(batches, path, compression)
+            click.echo(f'Wrote {len(files)} partition files to {path}')
+        else:
+            rows = write_export(batches, path, export_format, compression)
+            click.echo(f'Wrote {rows} rows to {path}')
+
+    @app.cli.command('import-data')
+    @click.argument('path', type=click.Path(exists=True))
+    @click.option('--batch-size', default=None, type=int,
+                  help='Rows inserted per transaction (defaults to BULK_BATCH_ROWS).')
+    def import_data_command(path, batch_size):
+        """Import sensor data from a Parquet file or directory, or an Arrow IPC file or stream."""
+        if not PYARROW_AVAILABLE:
+            raise click.ClickException('import-data requires pyarrow to be installed')
+        from .services.bulk import open_import_batches, import_batches
+
+        summary = import_batches(open_import_batches(path, batch_size or app.config['BULK_BATCH_ROWS']))
+        click.echo(f"Imported {summary['imported']} rows, skipped {summary['skipped']} already stored, "
+                   f"rejected {summary['rejected']}")
+
+    @app.cli.command('backfill')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']),
+                  help='File format (defaults to the .csv, .ndjson or .jsonl extension).')
+    @click.option('--batch-size', default=None, type=int,
+                  help='Readings validated and committed per chunk (defaults to BULK_BATCH_ROWS).')
+    @click.option('--time-field', type=click.Choice(TIME_FIELDS), default='rtc_time', show_default=True,
+                  help='Field holding the time each reading is stored at.')
+    def backfill_command(path, file_format, batch_size, time_field):
+        """Load device readings from a CSV or NDJSON file, stored at their own RTC times."""
+        file_format = file_format or detect_format(path)
+        if file_format is None:
+            raise click.BadParameter('cannot tell the format from the extension; pass --format', param_hint='PATH')
+
+        started = time.perf_counter()
+        summary = None
+        with open(path, newline='', encoding='utf-8-sig') as lines:
+            for summary in backfill(lines, file_format, batch_size or app.config['BULK_BATCH_ROWS'], time_field):
+                elapsed = time.perf_counter() - started
+                click.echo(f"{summary['read']} read, {summary['inserted']} inserted, {summary['skipped']} skipped, "
+                           f"{summary['rejected']} rejected ({summary['read'] / elapsed:.0f} rows/s)")
+        if summary is None:
+            click.echo('No readings found')
+            return
+        for number, message in summary['errors']:
+            click.echo(f'Reading {number} rejected: {message}', err=True)
+
+        # Ingest hooks ran per chunk; finish what a large chunk left behind
+        if app.config['ROLLUPS_ENABLED']:
+            drain(compact_rollups, app.config['ROLLUP_COMPACT_BATCH'])
+        if app.config['ALERTS_ENABLED']:
+            drain(evaluate_alerts, app.config['ALERT_EVALUATE_BATCH'])
+        click.echo(f'Backfill finished in {time.perf_counter() - started:.1f}s')
+
+    @app.cli.command('maintain-db')
+    @click.option('--reindex', is_flag=True, help='Rebuild every index.')
+    @click.option('--vacuum', is_flag=True, help='Reclaim the space of deleted rows (rewrites SQLite databases).')
+    @click.option('--no-analyze', is_flag=True, help='Skip refreshing the query planner statistics.')
+    def maintain_db_command(reindex, vacuum, no_analyze):
+        """Refresh planner statistics and optionally reindex and vacuum, e.g. after a backfill."""
+        is_sqlite = db.engine.dialect.name == 'sqlite'
+        if is_sqlite:
+            size_before, free_before = sqlite_size()
+        timings = maintain_database(reindex=reindex, vacuum=vacuum, analyze=not no_analyze)
+        for step, seconds in timings.items():
+            click.echo(f'{step}: {seconds:.2f}s')
+        if is_sqlite:
+            size_after, free_after = sqlite_size()
+            click.echo(f'Database size {size_before / 2**20:.1f} MiB ({free_before / 2**20:.1f} MiB free) -> '
+                       f'{size_after / 2**20:.1f} MiB ({free_after / 2**20:.1f} MiB free)')
+
+    @app.cli.command('export-openapi')
+    @click.argument('path', type=click.Path(dir_okay=False, writable=True))
+    def export_openapi_command(path):
+        """Write the OpenAPI spec to PATH, to be served through API_SPEC_FILE."""
+        export_openapi(app, path)
+        click.echo(f'Wrote the API spec to {path}')
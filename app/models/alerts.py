@@ -0,0 +1,57 @@
+from .sensor_data import db, UTCDateTime
+
+# Alert levels in increasing severity
+ALERT_LEVELS = ['ok', 'warning', 'danger']
+
+class AlertState(db.Model):
+    """Current alert level of one station metric, updated incrementally at ingest."""
+    __tablename__ = 'alert_state'
+    station_id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(32), primary_key=True)
+    level = db.Column(db.String(16), nullable=False, default='ok')
+    since = db.Column(UTCDateTime)  # When the current level was entered
+    value = db.Column(db.Float)  # Latest reading
+    threshold = db.Column(db.Float)  # Threshold crossed to enter the current level
+    # A level the readings have moved to but not yet for long enough to switch
+    pending_level = db.Column(db.String(16))
+    pending_since = db.Column(UTCDateTime)
+    reading_id = db.Column(db.Integer)  # Latest evaluated sensor_data id
+    reading_time = db.Column(UTCDateTime)  # Its timestamp; older readings are history and skipped
+
+    def to_dict(self):
+        return {
+            'station_id': self.station_id,
+            'metric': self.metric,
+            'level': self.level,
+            'since': self.since.isoformat() if self.since else None,
+            'threshold': self.threshold,
+        }
+
+class AlertEvent(db.Model):
+    """One alert level transition, kept as the alert history."""
+    __tablename__ = 'alert_events'
+    __table_args__ = (
+        db.Index('ix_alert_events_station_id_timestamp', 'station_id', 'timestamp'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(UTCDateTime, nullable=False)
+    station_id = db.Column(db.Integer, nullable=False)
+    metric = db.Column(db.String(32), nullable=False)
+    level = db.Column(db.String(16), nullable=False)
+    previous_level = db.Column(db.String(16), nullable=False)
+    value = db.Column(db.Float)
+    threshold = db.Column(db.Float)
+    reading_id = db.Column(db.Integer)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp.isoformat(),
+            'station_id': self.station_id,
+            'metric': self.metric,
+            'level': self.level,
+            'previous_level': self.previous_level,
+            'value': self.value,
+            'threshold': self.threshold,
+            'reading_id': self.reading_id,
+        }
@@ -0,0 +1,56 @@
+from .sensor_data import db
+
+class RollupMixin:
+    """Per-station aggregates of sensor_data over fixed time buckets.
+
+    Sums and non-null counts are stored instead of averages so buckets can be
+    merged incrementally and re-aggregated into coarser buckets exactly.
+    """
+    station_id = db.Column(db.Integer, primary_key=True)
+    bucket_start = db.Column(db.BigInteger, primary_key=True)  # Unix epoch seconds
+    count = db.Column(db.Integer, nullable=False, default=0)
+    temperature_sum = db.Column(db.Float)
+    temperature_count = db.Column(db.Integer)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    humidity_sum = db.Column(db.Float)
+    humidity_count = db.Column(db.Integer)
+    humidity_min = db.Column(db.Float)
+    humidity_max = db.Column(db.Float)
+    uv_index_sum = db.Column(db.Float)
+    uv_index_count = db.Column(db.Integer)
+    uv_index_min = db.Column(db.Float)
+    uv_index_max = db.Column(db.Float)
+    air_quality_sum = db.Column(db.Float)
+    air_quality_count = db.Column(db.Integer)
+    air_quality_min = db.Column(db.Float)
+    air_quality_max = db.Column(db.Float)
+    co2e_sum = db.Column(db.Float)
+    co2e_count = db.Column(db.Integer)
+    co2e_min = db.Column(db.Float)
+    co2e_max = db.Column(db.Float)
+    fill_level_sum = db.Column(db.Float)
+    fill_level_count = db.Column(db.Integer)
+    fill_level_min = db.Column(db.Float)
+    fill_level_max = db.Column(db.Float)
+
+class SensorData1m(RollupMixin, db.Model):
+    __tablename__ = 'sensor_data_1m'
+    bucket_seconds = 60
+
+class SensorData1h(RollupMixin, db.Model):
+    __tablename__ = 'sensor_data_1h'
+    bucket_seconds = 3600
+
+class SensorData1d(RollupMixin, db.Model):
+    __tablename__ = 'sensor_data_1d'
+    bucket_seconds = 86400
+
+# Finest first; reads pick the coarsest level that divides the requested bucket
+ROLLUP_MODELS = [SensorData1m, SensorData1h, SensorData1d]
+
+class RollupWatermark(db.Model):
+    """Highest sensor_data id already folded into the rollup tables."""
+    __tablename__ = 'rollup_watermarks'
+    name = db.Column(db.String(32), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
@@ -21,8 +21,19 @@ class UTCDateTime(TypeDecorator):
 
 db = SQLAlchemy()
 
+# Numeric sensor readings that are charted and aggregated
+SENSOR_METRICS = ['temperature', 'humidity', 'uv_index', 'air_quality', 'co2e', 'fill_level']
+
 class SensorData(db.Model):
     __tablename__ = 'sensor_data'
+    # Every read path filters on one station and a time range ordered by timestamp
+    __table_args__ = (
+        db.Index('ix_sensor_data_station_id_timestamp', 'station_id', 'timestamp'),
+        # Since-cursor polls select the rows after an id
+        db.Index('ix_sensor_data_station_id_id', 'station_id', 'id'),
+        # Watermarks and since cursors assume a deleted id is never handed out again
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(UTCDateTime, nullable=False, default=lambda: datetime.now(UTC))
     temperature = db.Column(db.Float)
@@ -0,0 +1,19 @@
+from .sensor_data import db, UTCDateTime
+
+class StationLatest(db.Model):
+    """Latest reading per station, upserted on ingest so current values are a primary key lookup.
+
+    Columns mirror sensor_data; id is the id of the sensor_data row copied here.
+    """
+    __tablename__ = 'station_latest'
+    station_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    id = db.Column(db.Integer, nullable=False)
+    timestamp = db.Column(UTCDateTime, nullable=False)
+    temperature = db.Column(db.Float)
+    humidity = db.Column(db.Float)
+    uv_index = db.Column(db.Float)
+    air_quality = db.Column(db.Float)
+    co2e = db.Column(db.Float)
+    fill_level = db.Column(db.Float)
+    rtc_time = db.Column(UTCDateTime)
+    bme_iaq_accuracy = db.Column(db.Integer)
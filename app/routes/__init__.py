@@ -1,23 +1,156 @@
-from flask import jsonify, render_template, request, send_file
+from flask import Response, jsonify, render_template, request, stream_with_context
 from datetime import datetime, timedelta, UTC
-import csv
-from io import StringIO, BytesIO
+import hashlib
+from operator import attrgetter, itemgetter
 from flask_apispec import use_kwargs, marshal_with, doc
 from marshmallow import fields
-from ..models.sensor_data import db, SensorData
-from ..utils.validators import validate_sensor_data, format_rtc_time
-from ..schemas import SensorDataSchema, sensor_data_response, success_response
+from ..models.sensor_data import db
+from ..utils.validators import parse_bucket_seconds, bucket_for_points
+from ..schemas import sensor_data_response, success_response
+from ..services.ingest import build_sensor_row, ingest_batch, iter_ndjson, submit_rows
+from ..services.write_queue import get_write_queue
+from ..services.queries import window_version
+from ..services.serialization import (
+    PACKED_MIMETYPE, ARROW_MIMETYPE, PYARROW_AVAILABLE,
+    sensor_rows_response, sensor_rows_to_dicts, sensor_rows_to_columns, dict_rows_to_columns,
+    columns_response, json_response, group_by_station
+)
+from ..services.storage import get_storage
+from ..services.export import has_rows, iter_csv, export_name
+from ..services.cache import get_cache
+from ..services.events import get_event_hub, fetch_rows_after, iter_events
+from ..services.retention import delete_all, delete_older_than, delete_ids
+from ..services.alerts import active_alerts, alerts_version, alert_history
+from ..services.latest import latest_readings, latest_version
+from ..services.metrics import get_metrics
 from flask_limiter.util import get_remote_address
-from ..utils.errors import ValidationError, ResourceNotFoundError
+from werkzeug.exceptions import HTTPException
+from ..utils.errors import APIError, ValidationError, ResourceNotFoundError, NotAcceptableError
 import re
 
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson')
+BULK_IMPORT_MIMETYPES = ('application/vnd.apache.parquet', 'application/vnd.apache.arrow.stream',
+                         'application/vnd.apache.arrow.file', 'application/octet-stream')
+
+def parse_ndjson(stream, limit):
+    """Parse newline-delimited JSON readings, turning unparseable lines into ValidationErrors."""
+    readings = []
+    for reading in iter_ndjson(stream):
+        if len(readings) >= limit:
+            raise ValidationError(f'Batch exceeds the limit of {limit} readings', status_code=413)
+        readings.append(reading)
+    return readings
+
+def parse_bucket_args(hours):
+    """Return the requested aggregation bucket in seconds, or None for raw rows."""
+    if 'bucket' in request.args:
+        return parse_bucket_seconds(request.args['bucket'])
+    if 'points' in request.args:
+        points = request.args.get('points', type=int)
+        if points is None:
+            raise ValidationError('points must be an integer')
+        return bucket_for_points(hours, points)
+    return None
+
+def parse_since_arg():
+    """Return the since cursor (the last row id a client has seen), or None."""
+    if 'since' not in request.args:
+        return None
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        raise ValidationError('since must be a non-negative row id')
+    return since
+
+def parse_station_ids_arg():
+    """Return the repeated station_id parameters as sorted ints, or None when there are none."""
+    values = request.args.getlist('station_id')
+    try:
+        return sorted({int(value) for value in values}) if values else None
+    except ValueError:
+        raise ValidationError('station_id must be an integer')
+
+def parse_export_args():
+    """Return (station_ids or None for station_id=all, window start) of an export request."""
+    values = request.args.getlist('station_id')
+    hours = request.args.get('hours', 24, type=int)
+    if not values:
+        raise ValidationError('station_id is required')
+
+    if 'all' in values:
+        station_ids = None
+    else:
+        try:
+            station_ids = sorted({int(value) for value in values})
+        except ValueError:
+            raise ValidationError('station_id must be an integer or "all"')
+    time_threshold = datetime.now(UTC) - timedelta(hours=hours)
+
+    if not has_rows(station_ids, time_threshold):
+        stations = 'any station' if station_ids is None else f"station {', '.join(map(str, station_ids))}"
+        raise ResourceNotFoundError(f'No data found for {stations}')
+    return station_ids, time_threshold
+
+def negotiate_format():
+    """Pick the response format from the format parameter and the Accept header.
+
+    Returns 'rows' (default), 'columnar' (format=columnar), or the binary
+    'packed' / 'arrow' formats selected through Accept.
+    """
+    requested = request.args.get('format', 'rows')
+    if requested not in ('rows', 'columnar'):
+        raise ValidationError("format must be 'rows' or 'columnar'")
+
+    best = request.accept_mimetypes.best_match(
+        ['application/json', PACKED_MIMETYPE, ARROW_MIMETYPE], default='application/json')
+    if best == PACKED_MIMETYPE:
+        return 'packed'
+    if best == ARROW_MIMETYPE:
+        if not PYARROW_AVAILABLE:
+            raise NotAcceptableError('Arrow responses require pyarrow to be installed')
+        return 'arrow'
+    return requested
+
+def window_etag(version, *params):
+    """Build an ETag from a window_version result and the request parameters."""
+    return hashlib.sha1(repr((version[:2],) + params).encode('utf-8')).hexdigest()
+
+def add_validators(response, etag, last_modified):
+    """Attach the ETag/Last-Modified validators and ask clients to revalidate each poll."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=UTC)
+    response.cache_control.no_cache = True
+    response.vary.add('Accept')
+    return response
+
+def cache_entry(response, etag, version, cursor):
+    """A response as a cache value, with the validators that window_version gave it."""
+    meta = {'etag': etag, 'last_modified': version[2].isoformat() if version[2] else None, 'cursor': cursor}
+    return response.get_data(), response.mimetype, meta
+
+def cached_response(cached):
+    """Answer from a cache entry without querying the database; 304 when the client holds it already."""
+    body, mimetype, meta = cached
+    last_modified = datetime.fromisoformat(meta['last_modified']) if meta['last_modified'] else None
+    if request.if_none_match.contains_weak(meta['etag']):
+        return add_validators(Response(status=304), meta['etag'], last_modified)
+    response = Response(body, mimetype=mimetype)
+    response.headers['X-Cache'] = 'HIT'
+    response.headers['X-Next-Cursor'] = str(meta['cursor'])
+    return add_validators(response, meta['etag'], last_modified)
+
 def register_routes(app):
     limiter = app.limiter
 
     @app.before_request
     def validate_content_type():
         if request.method in ['POST', 'PUT', 'PATCH']:
-            if not request.is_json:
+            is_ndjson_batch = (request.endpoint == 'add_sensor_data_batch'
+                               and request.mimetype in NDJSON_MIMETYPES)
+            is_bulk_import = request.endpoint == 'import_data' and request.mimetype in BULK_IMPORT_MIMETYPES
+            # The logs page deletes through query parameters without a body
+            is_bodiless_delete = request.endpoint == 'delete_data' and not request.content_length
+            if not request.is_json and not is_ndjson_batch and not is_bulk_import and not is_bodiless_delete:
                 raise ValidationError('Content-Type must be application/json', status_code=415)
             
         # Validate query parameters against SQL injection
@@ -45,39 +178,68 @@ def register_routes(app):
         if not data:
             raise ValidationError('No data provided')
 
-        validate_sensor_data(data)
-        rtc_time = format_rtc_time(data['rtc_time'])
+        row = build_sensor_row(data, datetime.now(UTC))
         
         try:
-            sensor_data = SensorData(
-                timestamp=datetime.now(UTC),
-                temperature=float(data['temperature']),
-                humidity=float(data['humidity']),
-                uv_index=float(data['uv_index']),
-                air_quality=float(data['air_quality']),
-                co2e=float(data['co2e']),
-                fill_level=float(data['fill_level']),
-                rtc_time=rtc_time,
-                bme_iaq_accuracy=int(data['bme_iaq_accuracy']),
-                station_id=int(data['station_id'])
-            )
-            
-            db.session.add(sensor_data)
-            db.session.commit()
+            if submit_rows([row]):
+                return {'message': 'Data queued'}, 202
             
             return {'message': 'Data added successfully'}, 201
             
+        except APIError:
+            raise
         except (ValueError, TypeError) as e:
-            db.session.rollback()
             raise ValidationError(f'Invalid data type: {str(e)}')
         except Exception as e:
-            db.session.rollback()
             app.logger.error(f'Error adding sensor data: {str(e)}')
             raise
 
+    @app.route('/api/sensor-data/batch', methods=['POST'])
+    @limiter.limit("30 per minute")
+    @doc(description='Add a batch of sensor readings as a JSON array or NDJSON stream.',
+         tags=['Sensor Data'])
+    def add_sensor_data_batch():
+        """Validate a batch of readings and insert the valid ones in one transaction."""
+        limit = app.config['SENSOR_DATA_BATCH_LIMIT']
+
+        if request.mimetype in NDJSON_MIMETYPES:
+            readings = parse_ndjson(request.stream, limit)
+        else:
+            data = request.get_json()
+            if isinstance(data, dict):
+                data = data.get('readings')
+            if not isinstance(data, list):
+                raise ValidationError('Expected a JSON array of readings')
+            if len(data) > limit:
+                raise ValidationError(f'Batch exceeds the limit of {limit} readings', status_code=413)
+            readings = data
+
+        if not readings:
+            raise ValidationError('No data provided')
+
+        try:
+            rows, results, queued = ingest_batch(readings)
+        except APIError:
+            raise
+        except Exception as e:
+            app.logger.error(f'Error adding sensor data batch: {str(e)}')
+            raise
+
+        rejected = len(results) - len(rows)
+        body = {'accepted': len(rows), 'rejected': rejected, 'results': results}
+        # 207 Multi-Status tells the client to inspect the per-item results
+        if rejected:
+            return body, 207
+        return body, 202 if queued else 201
+
     @app.route('/api/sensor-data', methods=['GET'])
     @limiter.limit("200 per minute")
-    @doc(description='Get sensor data for a specific station.',
+    @doc(description='Get sensor data for a specific station. Pass bucket (e.g. 300, 5m, 1h) '
+                     'or points to get per-bucket avg/min/max aggregates instead of raw rows. '
+                     'format=columnar returns one array per field with epoch millisecond timestamps; '
+                     'Accept: application/octet-stream or application/vnd.apache.arrow.stream '
+                     'returns the columns in a binary encoding. since=<id> returns only rows newer '
+                     'than that id; X-Next-Cursor holds the id to pass on the next poll.',
          tags=['Sensor Data'])
     def get_sensor_data():
         """Get sensor data for a specific station."""
@@ -88,78 +250,345 @@ def register_routes(app):
             raise ValidationError('station_id is required')
             
         time_threshold = datetime.now(UTC) - timedelta(hours=hours)
-        
-        query = SensorData.query.filter(
-            SensorData.station_id == station_id,
-            SensorData.timestamp >= time_threshold
-        ).order_by(SensorData.timestamp.asc())
-        
-        result = query.all()
-        if not result:
+        response_format = negotiate_format()
+        bucket_seconds = parse_bucket_args(hours)
+        since = parse_since_arg()
+        if since is not None and bucket_seconds:
+            raise ValidationError('since cannot be combined with bucket or points')
+
+        # Cache entries carry their validators, so hits and revalidations of them skip the database
+        cache = get_cache()
+        cache_key = ('sensor-data', station_id, hours, bucket_seconds, response_format)
+        cached = cache.get(cache_key) if since is None else None
+        if cached is not None:
+            return cached_response(cached)
+
+        # Otherwise answer revalidations from the index alone, before querying or serializing rows
+        version = window_version([station_id], time_threshold)
+        if not version[0]:
             raise ResourceNotFoundError(f'No data found for station {station_id}')
-        
-        schema = SensorDataSchema(many=True)
-        return schema.dump(result)
+        etag = window_etag(version, station_id, hours, bucket_seconds, response_format, since)
+        if request.if_none_match.contains_weak(etag):
+            return add_validators(Response(status=304), etag, version[2])
 
-    @app.route('/api/export-csv', methods=['GET'])
-    @limiter.limit("100 per hour")
-    @doc(description='Export sensor data as CSV.',
+        if since is not None:
+            # Deltas are small and specific to one client, so they bypass the cache
+            result = get_storage().scan([station_id], time_threshold, since)
+            if response_format == 'rows':
+                response = sensor_rows_response(result)
+            else:
+                response = columns_response(sensor_rows_to_columns(result), response_format)
+            # Rows committed after window_version ran are already in the result
+            response.headers['X-Next-Cursor'] = str(max([version[1]] + [row.id for row in result]))
+            return add_validators(response, etag, version[2])
+
+        if bucket_seconds:
+            result = get_storage().aggregate([station_id], time_threshold, bucket_seconds)
+            if not result:
+                raise ResourceNotFoundError(f'No data found for station {station_id}')
+            if response_format == 'rows':
+                response = jsonify(result)
+            else:
+                response = columns_response(dict_rows_to_columns(result), response_format)
+        else:
+            # Plain column tuples skip the ORM identity map and marshmallow
+            result = get_storage().scan([station_id], time_threshold)
+            if not result:
+                raise ResourceNotFoundError(f'No data found for station {station_id}')
+            if response_format == 'rows':
+                response = sensor_rows_response(result)
+            else:
+                response = columns_response(sensor_rows_to_columns(result), response_format)
+
+        cache.set(cache_key, [station_id], cache_entry(response, etag, version, version[1]))
+        response.headers['X-Cache'] = 'MISS'
+        response.headers['X-Next-Cursor'] = str(version[1])
+        return add_validators(response, etag, version[2])
+
+    @app.route('/data', methods=['GET'])
+    @limiter.limit("200 per minute")
+    @doc(description='Get sensor data for all configured stations (or the repeated station_id subset) '
+                     'grouped by station, read with a single query. Accepts the hours, bucket, points, '
+                     'format and since options of GET /api/sensor-data; since is one row id cursor for '
+                     'all stations and selects every row with a larger id, whatever its timestamp.',
          tags=['Sensor Data'])
-    def export_csv():
-        """Export sensor data as CSV."""
-        station_id = request.args.get('station_id', type=int)
-        hours = request.args.get('hours', 24, type=int)
-        
-        if not station_id:
+    def get_stations_data():
+        """Get sensor data for several stations in one request."""
+        values = request.args.getlist('station_id') or list(app.config['STATIONS'])
+        try:
+            station_ids = sorted({int(value) for value in values})
+        except ValueError:
+            raise ValidationError('station_id must be an integer')
+        if not station_ids:
             raise ValidationError('station_id is required')
-            
+        hours = request.args.get('hours', 24, type=int)
+
         time_threshold = datetime.now(UTC) - timedelta(hours=hours)
-        
-        query = SensorData.query.filter(
-            SensorData.station_id == station_id,
-            SensorData.timestamp >= time_threshold
-        ).order_by(SensorData.timestamp.asc())
-        
-        result = query.all()
-        if not result:
+        response_format = negotiate_format()
+        if response_format not in ('rows', 'columnar'):
+            raise NotAcceptableError('/data returns JSON only; use format=columnar for arrays')
+        bucket_seconds = parse_bucket_args(hours)
+        since = parse_since_arg()
+        if since is not None and bucket_seconds:
+            raise ValidationError('since cannot be combined with bucket or points')
+
+        cache = get_cache()
+        cache_key = ('data', tuple(station_ids), hours, bucket_seconds, response_format)
+        cached = cache.get(cache_key) if since is None else None
+        if cached is not None:
+            return cached_response(cached)
+
+        version = window_version(station_ids, time_threshold)
+        etag = window_etag(version, 'data', tuple(station_ids), hours, bucket_seconds, response_format, since)
+        if request.if_none_match.contains_weak(etag):
+            return add_validators(Response(status=304), etag, version[2])
+
+        cursor = version[1] or since or 0
+        if bucket_seconds:
+            grouped = group_by_station(get_storage().aggregate(station_ids, time_threshold, bucket_seconds),
+                                       station_ids, itemgetter('station_id'))
+            to_output = dict_rows_to_columns if response_format == 'columnar' else list
+        else:
+            result = get_storage().scan(station_ids, time_threshold, since)
+            cursor = max([cursor] + [row.id for row in result])
+            grouped = group_by_station(result, station_ids, attrgetter('station_id'))
+            to_output = sensor_rows_to_columns if response_format == 'columnar' else sensor_rows_to_dicts
+
+        stations = {str(station_id): app.config['STATIONS'][str(station_id)]
+                    for station_id in station_ids if str(station_id) in app.config['STATIONS']}
+        response = json_response({
+            'data': {station_id: to_output(rows) for station_id, rows in grouped.items()},
+            'stations': stations
+        })
+
+        if since is None:
+            cache.set(cache_key, station_ids, cache_entry(response, etag, version, cursor))
+            response.headers['X-Cache'] = 'MISS'
+        response.headers['X-Next-Cursor'] = str(cursor)
+        return add_validators(response, etag, version[2])
+
+    @app.route('/api/stream', methods=['GET'])
+    @limiter.limit("60 per minute")
+    @doc(description='Server-Sent Events stream of newly ingested readings. Repeat station_id to '
+                     'filter by station. Reconnects with Last-Event-ID replay the readings missed. '
+                     'Answers 503 once STREAM_MAX_PER_WORKER streams are open; poll /data instead.',
+         tags=['Sensor Data'])
+    def stream_sensor_data():
+        """Push new readings to the client as they are ingested."""
+        station_ids = parse_station_ids_arg()
+
+        hub = get_event_hub()
+        subscription = hub.subscribe(station_ids)
+        # Subscribe before replaying so nothing committed in between is lost
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        replay = []
+        if last_event_id is not None:
+            try:
+                replay = fetch_rows_after(last_event_id, station_ids, app.config['STREAM_QUEUE_SIZE'])
+            except Exception:
+                hub.unsubscribe(subscription)
+                raise
+        # Release the read transaction; the stream itself never touches the database
+        db.session.remove()
+
+        events = iter_events(hub, subscription, replay,
+                             app.config['STREAM_MAX_SECONDS'], app.config['STREAM_HEARTBEAT_SECONDS'])
+        return Response(events, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/delete_data', methods=['POST'])
+    @limiter.limit("10 per minute")
+    @doc(description='Delete sensor data: type=all, type=older_than with minutes, '
+                     'or a JSON body {"type": "selected", "ids": [...]}.',
+         tags=['Sensor Data'])
+    def delete_data():
+        """Delete sensor data in batches and drop the affected rollup buckets."""
+        body = request.get_json(silent=True) or {}
+        delete_type = request.args.get('type', body.get('type'))
+
+        if delete_type == 'all':
+            deleted = delete_all()
+            message = f'Deleted all sensor data ({deleted} readings)'
+        elif delete_type == 'older_than':
+            minutes = request.args.get('minutes', body.get('minutes'), type=int)
+            if minutes is None or minutes < 1:
+                raise ValidationError('minutes must be a positive integer')
+            deleted = delete_older_than(datetime.now(UTC) - timedelta(minutes=minutes))
+            message = f'Deleted {deleted} readings older than {minutes} minutes'
+        elif delete_type == 'selected':
+            try:
+                ids = [int(value) for value in body.get('ids') or []]
+            except (TypeError, ValueError):
+                raise ValidationError('ids must be a list of integers')
+            if not ids:
+                raise ValidationError('No ids provided')
+            deleted = delete_ids(ids)
+            message = f'Deleted {deleted} readings'
+        else:
+            raise ValidationError("type must be 'all', 'older_than' or 'selected'")
+
+        return {'status': 'success', 'message': message, 'deleted': deleted}
+
+    @app.route('/api/stations/latest', methods=['GET'])
+    @limiter.limit("200 per minute")
+    @doc(description='Latest reading of every station (or repeated station_id) from the station_latest '
+                     'snapshot, as {stations, data: {station_id: reading}}.',
+         tags=['Sensor Data'])
+    def get_latest_readings():
+        """Return the current values of each station in one primary key scan."""
+        station_ids = parse_station_ids_arg()
+        etag = window_etag(latest_version(), 'latest', station_ids)
+        if etag in request.if_none_match:
+            return add_validators(Response(status=304), etag, None)
+
+        readings = sensor_rows_to_dicts(latest_readings(station_ids))
+        stations = {station_id: station for station_id, station in app.config['STATIONS'].items()
+                    if station_ids is None or int(station_id) in station_ids}
+        response = json_response({
+            'data': {str(reading['station_id']): reading for reading in readings},
+            'stations': stations
+        })
+        return add_validators(response, etag, None)
+
+    @app.route('/sensor_data/<int:station_id>', methods=['GET'])
+    @limiter.limit("200 per minute")
+    @doc(description='Latest reading of one station.',
+         tags=['Sensor Data'])
+    def get_station_latest(station_id):
+        """Return a station's latest reading from the snapshot."""
+        readings = sensor_rows_to_dicts(latest_readings([station_id]))
+        if not readings:
             raise ResourceNotFoundError(f'No data found for station {station_id}')
-        
-        # Create string buffer first
-        string_buffer = StringIO()
-        writer = csv.writer(string_buffer)
-        
-        # Write headers
-        writer.writerow(['timestamp', 'temperature', 'humidity', 'uv_index', 
-                       'air_quality', 'co2e', 'fill_level', 'rtc_time', 
-                       'bme_iaq_accuracy'])
-        
-        # Write data
-        for record in result:
-            writer.writerow([
-                record.timestamp.isoformat(),
-                record.temperature,
-                record.humidity,
-                record.uv_index,
-                record.air_quality,
-                record.co2e,
-                record.fill_level,
-                record.rtc_time.isoformat() if record.rtc_time else None,
-                record.bme_iaq_accuracy
-            ])
-        
-        # Convert to bytes
-        output = BytesIO()
-        output.write(string_buffer.getvalue().encode('utf-8-sig'))
-        output.seek(0)
-        string_buffer.close()
-        
-        return send_file(
-            output,
+        return json_response(readings[0])
+
+    @app.route('/api/alerts', methods=['GET'])
+    @limiter.limit("200 per minute")
+    @doc(description='Active threshold alerts, optionally for repeated station_id. '
+                     'Send the ETag back in If-None-Match to get 304 until an alert starts or ends.',
+         tags=['Alerts'])
+    def get_alerts():
+        """Return the precomputed active alerts."""
+        station_ids = parse_station_ids_arg()
+        etag = window_etag((alerts_version(),), 'alerts', station_ids)
+        if etag in request.if_none_match:
+            return add_validators(Response(status=304), etag, None)
+
+        alerts = [state.to_dict() for state in active_alerts(station_ids)]
+        return add_validators(json_response({'alerts': alerts}), etag, None)
+
+    @app.route('/api/alerts/history', methods=['GET'])
+    @limiter.limit("60 per minute")
+    @doc(description='Alert transitions over the last hours (default 24), newest first.',
+         tags=['Alerts'])
+    def get_alert_history():
+        """Return alert level changes."""
+        station_ids = parse_station_ids_arg()
+        hours = request.args.get('hours', 24, type=int)
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+        events = alert_history(station_ids, datetime.now(UTC) - timedelta(hours=hours), limit)
+        return json_response({'events': [event.to_dict() for event in events]})
+
+    @app.route('/metrics', methods=['GET'])
+    @limiter.exempt
+    @doc(description='Request latency, SQL and serialization metrics of all workers in the Prometheus text format.',
+         tags=['System'])
+    def metrics():
+        """Render the shared metric totals for Prometheus."""
+        registry = get_metrics()
+        if registry is None:
+            raise ResourceNotFoundError('Metrics are disabled')
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/ingest/stats', methods=['GET'])
+    @limiter.exempt
+    @doc(description='Ingest mode, write-behind queue depth and flush counters.',
+         tags=['System'])
+    def ingest_stats():
+        """Return write-behind queue metrics for this worker."""
+        queue = get_write_queue()
+        if queue is None:
+            return {'mode': 'sync'}
+        return queue.stats()
+
+    @app.route('/api/cache/stats', methods=['GET'])
+    @limiter.exempt
+    @doc(description='Response cache hit/miss counters.',
+         tags=['System'])
+    def cache_stats():
+        """Return response cache counters for this worker."""
+        return get_cache().stats()
+
+    @app.route('/api/export-csv', methods=['GET'])
+    @limiter.limit("100 per hour")
+    @doc(description='Export sensor data as CSV for one or more stations, or all stations with station_id=all.',
+         tags=['Sensor Data'])
+    def export_csv():
+        """Stream sensor data as CSV."""
+        station_ids, time_threshold = parse_export_args()
+
+        # Only multi-station exports need the station column to tell rows apart
+        include_station = station_ids is None or len(station_ids) > 1
+        chunks = iter_csv(station_ids, time_threshold, include_station,
+                          app.config['CSV_EXPORT_CHUNK_SIZE'])
+
+        return Response(
+            stream_with_context(chunks),
             mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'sensor_data_station_{station_id}.csv'
+            headers={'Content-Disposition': f"attachment; filename={export_name(station_ids, 'csv')}"}
         )
 
+    @app.route('/api/export', methods=['GET'])
+    @limiter.limit("100 per hour")
+    @doc(description='Bulk export of sensor data for one or more stations, or all stations with station_id=all: '
+                     'format=parquet (default; compressed, typed columns) or format=arrow (Arrow IPC stream). '
+                     'Rows are ordered by station and time. Requires pyarrow.',
+         tags=['Sensor Data'])
+    def export_data():
+        """Stream sensor data as Parquet or an Arrow IPC stream."""
+        export_format = request.args.get('format', 'parquet')
+        if export_format not in ('parquet', 'arrow'):
+            raise ValidationError('format must be parquet or arrow')
+        if not PYARROW_AVAILABLE:
+            raise NotAcceptableError('Bulk export requires pyarrow to be installed')
+        from ..services.bulk import EXPORT_FORMATS, iter_export_batches, iter_parquet, iter_arrow_stream
+
+        station_ids, time_threshold = parse_export_args()
+        batches = iter_export_batches(station_ids, time_threshold, batch_rows=app.config['BULK_BATCH_ROWS'])
+        if export_format == 'parquet':
+            chunks = iter_parquet(batches, app.config['EXPORT_PARQUET_COMPRESSION'])
+        else:
+            chunks = iter_arrow_stream(batches)
+        mimetype, extension = EXPORT_FORMATS[export_format]
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={export_name(station_ids, extension)}'}
+        )
+
+    @app.route('/api/import', methods=['POST'])
+    @limiter.limit("10 per minute")
+    @doc(description='Bulk import of a Parquet file or an Arrow IPC file or stream, such as one from /api/export. '
+                     'Files need every export column and at most MAX_CONTENT_LENGTH bytes. Rows are checked like '
+                     'POSTed readings and invalid ones are rejected; readings already stored for the same station '
+                     'and timestamp are skipped. Returns the imported, skipped and rejected row counts. '
+                     'Requires pyarrow.',
+         tags=['Sensor Data'])
+    def import_data():
+        """Insert the readings of an uploaded Parquet or Arrow file."""
+        if not PYARROW_AVAILABLE:
+            raise ValidationError('Bulk import requires pyarrow to be installed', status_code=415)
+        from ..services.bulk import open_import_batches, import_batches
+
+        try:
+            summary = import_batches(open_import_batches(request.stream, app.config['BULK_BATCH_ROWS']))
+        except (APIError, HTTPException):
+            raise
+        except Exception as e:
+            app.logger.error(f'Error importing sensor data: {str(e)}')
+            raise
+        return summary, 201 if summary['imported'] else 200
+
     @app.route('/health')
     @limiter.exempt
     @doc(description='Health check endpoint.',
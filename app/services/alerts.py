@@ -0,0 +1,193 @@
+"""Server-side threshold alerts evaluated incrementally at ingest.
+
+Rules come from the THRESHOLDS config: a reading outside min/max is a
+'danger', one past the optional warning threshold is a 'warning'. Every
+station metric keeps its current level in alert_state, and each level
+change is appended to alert_events. Readings are processed once, in id
+order, behind their own watermark, so the state is the same whichever
+worker evaluates them. A reading older than the last one applied to a
+state (history loaded by /api/import or `flask backfill`) leaves it alone.
+"""
+import math
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS
+from ..models.alerts import ALERT_LEVELS, AlertState, AlertEvent
+from .rollups import get_watermark, advance_watermark
+
+WATERMARK_NAME = 'alerts'
+SEVERITY = {level: rank for rank, level in enumerate(ALERT_LEVELS)}
+
+class AlertRule:
+    """Thresholds for one metric.
+
+    Leaving a level requires the value to move hysteresis past its threshold,
+    and a new level only takes effect once readings have stayed there for
+    duration seconds, so values hovering around a threshold do not flap.
+    """
+
+    def __init__(self, metric, low=None, high=None, warning=None, direction='above',
+                 hysteresis=0.0, duration=0):
+        if direction not in ('above', 'below'):
+            raise ValueError(f'warning_direction for {metric} must be above or below')
+        self.metric = metric
+        self.low = low
+        self.high = high
+        self.warning = warning
+        self.direction = direction
+        self.hysteresis = hysteresis
+        self.duration = duration
+
+    def classify(self, value, margin=0.0):
+        """Return (level, threshold) for a value; a positive margin widens every alert range."""
+        if self.low is not None and value < self.low + margin:
+            return 'danger', self.low
+        if self.high is not None and value > self.high - margin:
+            return 'danger', self.high
+        if self.warning is not None:
+            if self.direction == 'above' and value >= self.warning - margin:
+                return 'warning', self.warning
+            if self.direction == 'below' and value <= self.warning + margin:
+                return 'warning', self.warning
+        return 'ok', None
+
+    def next_level(self, value, current):
+        """Return (level, threshold) for a value given the current level, applying hysteresis."""
+        level, threshold = self.classify(value)
+        if SEVERITY[level] >= SEVERITY[current]:
+            return level, threshold
+        held, held_threshold = self.classify(value, self.hysteresis)
+        if SEVERITY[held] >= SEVERITY[current]:
+            return current, None
+        if SEVERITY[held] > SEVERITY[level]:
+            return held, held_threshold
+        return level, threshold
+
+def build_rules(thresholds, hysteresis=0.02, duration=0):
+    """Build alert rules from THRESHOLDS.
+
+    Each metric accepts min, max and warning, plus optional warning_direction
+    ('above' or 'below'), hysteresis (in the metric's unit) and duration (in
+    seconds). Without warning_direction a warning in the lower half of the
+    min/max range fires on low values, as for fill_level. The default
+    hysteresis is the given fraction of the min/max range.
+    """
+    rules = {}
+    for metric, limits in thresholds.items():
+        if metric not in SENSOR_METRICS:
+            continue
+        low, high, warning = limits.get('min'), limits.get('max'), limits.get('warning')
+        direction = limits.get('warning_direction')
+        if direction is None:
+            in_lower_half = warning is not None and low is not None and high is not None \
+                and warning - low < high - warning
+            direction = 'below' if in_lower_half else 'above'
+        span = high - low if low is not None and high is not None else 0.0
+        rules[metric] = AlertRule(
+            metric, low, high, warning, direction,
+            hysteresis=limits.get('hysteresis', hysteresis * span),
+            duration=limits.get('duration', duration)
+        )
+    return rules
+
+def _apply_reading(state, rule, value, row):
+    """Update one station metric's state with a reading; returns an AlertEvent on a level change."""
+    level, threshold = rule.next_level(value, state.level)
+    state.value = value
+    state.reading_id, state.reading_time = row.id, row.timestamp
+    if level == state.level:
+        state.pending_level = state.pending_since = None
+        return None
+
+    if state.pending_level != level:
+        state.pending_level, state.pending_since = level, row.timestamp
+    if (row.timestamp - state.pending_since).total_seconds() < rule.duration:
+        return None
+
+    event = AlertEvent(timestamp=row.timestamp, station_id=state.station_id, metric=state.metric,
+                       level=level, previous_level=state.level, value=value, threshold=threshold,
+                       reading_id=row.id)
+    state.level, state.since, state.threshold = level, row.timestamp, threshold
+    state.pending_level = state.pending_since = None
+    return event
+
+def evaluate_alerts(batch_size=5000):
+    """Evaluate readings newer than the alerts watermark against the THRESHOLDS rules.
+
+    At most batch_size readings are processed per call, and the state,
+    the new events and the watermark are committed together. Returns the
+    number of readings evaluated.
+    """
+    config = current_app.config
+    rules = build_rules(config['THRESHOLDS'], config['ALERT_HYSTERESIS'], config['ALERT_MIN_DURATION_SECONDS'])
+    if not rules:
+        return 0
+
+    try:
+        first_id = get_watermark(WATERMARK_NAME)
+        metrics = list(rules)
+        rows = db.session.execute(
+            select(SensorData.id, SensorData.timestamp, SensorData.station_id,
+                   *[getattr(SensorData, metric) for metric in metrics])
+            .where(SensorData.id > first_id)
+            .order_by(SensorData.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            db.session.commit()
+            return 0
+
+        states = {
+            (state.station_id, state.metric): state
+            for state in db.session.scalars(select(AlertState).where(
+                AlertState.station_id.in_({row.station_id for row in rows})))
+        }
+        for row in rows:
+            for metric in metrics:
+                value = getattr(row, metric)
+                if value is None or math.isnan(value):
+                    continue
+                state = states.get((row.station_id, metric))
+                if state is None:
+                    state = states[(row.station_id, metric)] = AlertState(
+                        station_id=row.station_id, metric=metric, level='ok')
+                    db.session.add(state)
+                elif state.reading_time is not None and row.timestamp < state.reading_time:
+                    continue
+                event = _apply_reading(state, rules[metric], value, row)
+                if event is not None:
+                    db.session.add(event)
+
+        if not advance_watermark(WATERMARK_NAME, first_id, rows[-1].id):
+            # Another worker evaluated these readings first
+            db.session.rollback()
+            return 0
+
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        # Another worker created the same new states concurrently
+        db.session.rollback()
+        return 0
+    except Exception:
+        db.session.rollback()
+        raise
+
+def active_alerts(station_ids=None):
+    """Return every station metric currently in warning or danger."""
+    stmt = select(AlertState).where(AlertState.level != 'ok')
+    if station_ids is not None:
+        stmt = stmt.where(AlertState.station_id.in_(station_ids))
+    return db.session.scalars(stmt.order_by(AlertState.station_id, AlertState.metric)).all()
+
+def alerts_version():
+    """Latest alert event id; it changes whenever any alert starts or ends."""
+    return db.session.execute(select(func.max(AlertEvent.id))).scalar() or 0
+
+def alert_history(station_ids, since, limit):
+    """Return alert transitions since a time, newest first."""
+    stmt = select(AlertEvent).where(AlertEvent.timestamp >= since)
+    if station_ids is not None:
+        stmt = stmt.where(AlertEvent.station_id.in_(station_ids))
+    return db.session.scalars(stmt.order_by(AlertEvent.id.desc()).limit(limit)).all()
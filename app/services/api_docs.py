@@ -0,0 +1,61 @@
+"""OpenAPI documentation served at /swagger/ and /swagger-ui/.
+
+Documenting every view walks its marshmallow schemas, which each worker
+would otherwise repeat at startup. With FAST_BOOT the views are documented
+on the first documentation request instead, and with API_SPEC_FILE the
+spec written by `flask export-openapi` is served as is.
+"""
+import json
+import threading
+from apispec import APISpec
+from apispec.ext.marshmallow import MarshmallowPlugin
+from flask import send_file
+from flask_apispec import FlaskApiSpec
+
+class LazyApiSpec(FlaskApiSpec):
+    """FlaskApiSpec that documents the app's views when the spec is first requested."""
+
+    def __init__(self, app, spec_file=None):
+        self.spec_file = spec_file
+        self._documented = False
+        self._lock = threading.Lock()
+        super().__init__(app)
+
+    def document_views(self):
+        with self._lock:
+            if not self._documented:
+                with self.app.app_context():
+                    for view in self.app.view_functions.values():
+                        if hasattr(view, '__apispec__'):
+                            self.register(view)
+                self._documented = True
+
+    def swagger_json(self):
+        if self.spec_file:
+            return send_file(self.spec_file, mimetype='application/json')
+        self.document_views()
+        return super().swagger_json()
+
+def init_api_docs(app):
+    """Set up the documentation routes; call after every route is registered."""
+    app.config.update({
+        'APISPEC_SPEC': APISpec(
+            title='Smart Urban Vitality API',
+            version='v1',
+            plugins=[MarshmallowPlugin()],
+            openapi_version='2.0.0'
+        ),
+        'APISPEC_SWAGGER_URL': '/swagger/',  # URI to access API Doc JSON
+        'APISPEC_SWAGGER_UI_URL': '/swagger-ui/'  # URI to access UI of API Doc
+    })
+    docs = app.extensions['api_docs'] = LazyApiSpec(app, app.config['API_SPEC_FILE'])
+    if not app.config['FAST_BOOT'] and not app.config['API_SPEC_FILE']:
+        docs.document_views()
+    return docs
+
+def export_openapi(app, path):
+    """Write the app's OpenAPI spec to path as JSON."""
+    docs = app.extensions['api_docs']
+    docs.document_views()
+    with open(path, 'w') as output:
+        json.dump(docs.spec.to_dict(), output, indent=2, sort_keys=True)
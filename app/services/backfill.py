@@ -0,0 +1,109 @@
+"""Offline backfill of device readings from CSV or NDJSON files, for `flask backfill`.
+
+Files hold readings in the form stations POST them to /api/sensor-data:
+one JSON object per line, or one CSV row under a header of the same field
+names. Each reading is stored at its validated `rtc_time` (UTC), the
+clock time stamped by the device, rather than at the time of the load;
+the device-supplied `timestamp` field can be used instead for files that
+carry server times. Times before 2000 or in the future are rejected, so a
+counter or an unset clock is never taken for a date. Readings are
+validated column by column like the batch endpoint and inserted with one
+executemany and commit per chunk. Readings already stored for the same
+station and timestamp are skipped, so an interrupted backfill can be run
+again.
+"""
+import csv
+import os
+from datetime import datetime, timedelta, UTC
+from itertools import islice
+from ..utils.errors import ValidationError
+from .ingest import build_sensor_rows, insert_rows, iter_ndjson
+from .queries import stored_reading_keys
+
+BACKFILL_FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+TIME_FIELDS = ('rtc_time', 'timestamp')
+EARLIEST_READING_TIME = datetime(2000, 1, 1, tzinfo=UTC)
+CLOCK_SKEW = timedelta(days=1)
+
+def detect_format(path):
+    """Return 'csv' or 'ndjson' from a file's extension, or None when it is neither."""
+    return BACKFILL_FORMATS.get(os.path.splitext(path)[1].lower())
+
+def iter_readings(lines, file_format):
+    """Yield the readings of a text file; unparseable NDJSON lines become ValidationErrors."""
+    if file_format == 'csv':
+        return csv.DictReader(lines)
+    return iter_ndjson(lines)
+
+def parse_reading_time(value):
+    """Return a reading's timestamp (ISO 8601 or Unix seconds) as an aware UTC datetime."""
+    try:
+        return datetime.fromtimestamp(float(value), UTC)
+    except (TypeError, ValueError, OverflowError, OSError):
+        pass
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise ValidationError(f'Invalid timestamp: {str(e)}')
+    return timestamp.replace(tzinfo=UTC) if timestamp.tzinfo is None else timestamp.astimezone(UTC)
+
+def check_reading_time(timestamp, now=None):
+    """Raise a ValidationError unless a reading time lies between 2000 and now (plus clock skew)."""
+    now = now or datetime.now(UTC)
+    if not EARLIEST_READING_TIME <= timestamp <= now + CLOCK_SKEW:
+        raise ValidationError(f'Implausible reading time: {timestamp.isoformat()}')
+    return timestamp
+
+def backfill_chunk(readings, time_field='rtc_time'):
+    """Validate a chunk of readings and insert the new ones in one transaction.
+
+    Readings are stored at their `time_field`. Returns (inserted, skipped,
+    errors) where errors maps the index of each rejected reading to its
+    message.
+    """
+    rows, errors = build_sensor_rows(readings, None)
+    valid = [index for index in range(len(readings)) if index not in errors]
+    now = datetime.now(UTC)
+    kept = []
+    for row, index in zip(rows, valid):
+        try:
+            if time_field == 'rtc_time':
+                timestamp = row['rtc_time'].replace(tzinfo=UTC)
+            else:
+                timestamp = parse_reading_time(readings[index].get('timestamp'))
+            row['timestamp'] = check_reading_time(timestamp, now)
+            kept.append(row)
+        except ValidationError as e:
+            errors[index] = e.message
+    rows = kept
+    if not rows:
+        return 0, 0, errors
+
+    stored = stored_reading_keys((row['station_id'], row['timestamp']) for row in rows)
+    new_rows = []
+    for row in rows:
+        key = (row['station_id'], row['timestamp'])
+        if key not in stored:
+            stored.add(key)
+            new_rows.append(row)
+    insert_rows(new_rows)
+    return len(new_rows), len(rows) - len(new_rows), errors
+
+def backfill(lines, file_format, chunk_rows=50000, time_field='rtc_time'):
+    """Backfill every reading of a file, yielding a progress summary after each chunk.
+
+    Summaries count the readings read, inserted, skipped as already stored
+    and rejected so far, and hold up to the first ten rejections as
+    (reading number, message) pairs.
+    """
+    summary = {'read': 0, 'inserted': 0, 'skipped': 0, 'rejected': 0, 'errors': []}
+    readings = iter_readings(lines, file_format)
+    while chunk := list(islice(readings, chunk_rows)):
+        inserted, skipped, errors = backfill_chunk(chunk, time_field)
+        summary['inserted'] += inserted
+        summary['skipped'] += skipped
+        summary['rejected'] += len(errors)
+        for index in sorted(errors)[:10 - len(summary['errors'])]:
+            summary['errors'].append((summary['read'] + index + 1, str(errors[index])))
+        summary['read'] += len(chunk)
+        yield summary
@@ -0,0 +1,268 @@
+"""Bulk export and import of sensor data as Parquet or Arrow IPC; requires pyarrow.
+
+Exports read the window from the database BULK_BATCH_ROWS rows at a time
+and write each chunk as one record batch (or Parquet row group), so memory
+stays flat however many months are exported. Rows are ordered by station
+and time, which keeps every row group to a narrow station and time range.
+Parquet can also be written as a directory partitioned by station and
+month (station_id=1/month=2024-01/part-0.parquet).
+
+Imports read the same files, and uploads are spooled to a temporary file
+rather than held in memory. Every row is checked like a reading POSTed to
+/api/sensor-data before each batch is inserted in one transaction. Rows that
+are already stored with the same station and timestamp are skipped, so
+re-running an import is a no-op.
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, UTC
+import pyarrow
+import pyarrow.compute as pc
+import pyarrow.dataset
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from sqlalchemy import insert
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS
+from ..utils.errors import ValidationError
+from .backfill import EARLIEST_READING_TIME, CLOCK_SKEW
+from .ingest import after_ingest
+from .parquet_storage import TIMESTAMP, to_datetimes
+from .queries import sensor_data_window_select, stored_reading_keys
+
+EXPORT_COLUMNS = ['station_id', 'timestamp'] + SENSOR_METRICS + ['rtc_time', 'bme_iaq_accuracy']
+EXPORT_SCHEMA = pyarrow.schema([
+    (name, TIMESTAMP if name in ('timestamp', 'rtc_time')
+     else pyarrow.int64() if name in ('station_id', 'bme_iaq_accuracy')
+     else pyarrow.float64())
+    for name in EXPORT_COLUMNS
+])
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+PARQUET_MAGIC = b'PAR1'
+ARROW_FILE_MAGIC = b'ARROW1'
+# Columns a POSTed reading can never leave empty; metrics may be cleared by retention
+IMPORT_REQUIRED_COLUMNS = ['station_id', 'timestamp', 'rtc_time', 'bme_iaq_accuracy']
+SPOOL_CHUNK_BYTES = 1 << 20
+
+def iter_export_batches(station_ids, since, until=None, batch_rows=50000):
+    """Yield record batches of the readings in a window, ordered by station and time."""
+    stmt = sensor_data_window_select([getattr(SensorData, name) for name in EXPORT_COLUMNS], station_ids, since)
+    if until is not None:
+        stmt = stmt.where(SensorData.timestamp < until)
+    result = db.session.execute(stmt.execution_options(yield_per=batch_rows))
+    for partition in result.partitions():
+        columns = zip(*partition)
+        yield pyarrow.record_batch([pyarrow.array(values, type=field.type)
+                                    for values, field in zip(columns, EXPORT_SCHEMA)], schema=EXPORT_SCHEMA)
+
+class _ChunkSink:
+    """Write-only file object collecting what a writer produces, for streaming it out."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_arrow_stream(batches):
+    """Yield an Arrow IPC stream chunk by chunk, one record batch at a time."""
+    sink = _ChunkSink()
+    with pyarrow.ipc.new_stream(sink, EXPORT_SCHEMA) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+def iter_parquet(batches, compression='zstd'):
+    """Yield a Parquet file chunk by chunk, one row group per record batch."""
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, EXPORT_SCHEMA, compression=compression) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+def write_export(batches, path, export_format, compression='zstd'):
+    """Write an export to one file; returns the number of rows written."""
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    chunks = iter_parquet(counted(), compression) if export_format == 'parquet' else iter_arrow_stream(counted())
+    with open(path, 'wb') as output:
+        for chunk in chunks:
+            output.write(chunk)
+    return rows
+
+def write_partitioned_parquet(batches, directory, compression='zstd'):
+    """Write a Parquet dataset partitioned by station and month; returns the files written.
+
+    Batches arrive ordered by station and time, so only one partition file
+    is open at a time.
+    """
+    files = []
+    current_key, writer = None, None
+    try:
+        for batch in batches:
+            months = pc.strftime(batch.column('timestamp'), format='%Y-%m').to_pylist()
+            stations = batch.column('station_id').to_pylist()
+            start = 0
+            for end in range(1, batch.num_rows + 1):
+                if end < batch.num_rows and (stations[end], months[end]) == (stations[start], months[start]):
+                    continue
+                key = (stations[start], months[start])
+                if key != current_key:
+                    if writer is not None:
+                        writer.close()
+                    partition = os.path.join(directory, f'station_id={key[0]}', f'month={key[1]}')
+                    os.makedirs(partition, exist_ok=True)
+                    path = os.path.join(partition, f'part-{len(os.listdir(partition))}.parquet')
+                    writer = pq.ParquetWriter(path, EXPORT_SCHEMA, compression=compression)
+                    current_key = key
+                    files.append(path)
+                writer.write_batch(batch.slice(start, end - start))
+                start = end
+    finally:
+        if writer is not None:
+            writer.close()
+    return files
+
+def open_import_batches(source, batch_rows=50000):
+    """Yield record batches from a Parquet file or directory, or an Arrow IPC file or stream.
+
+    source is a path or a readable binary file object (an upload).
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        # Columns only; station and month are already in every file
+        yield from pyarrow.dataset.dataset(source, format='parquet').to_batches(batch_size=batch_rows)
+        return
+    spool = None
+    if isinstance(source, str):
+        with open(source, 'rb') as handle:
+            magic = handle.read(6)
+        stream = pyarrow.memory_map(source)
+    else:
+        # Uploads go to disk in chunks; MAX_CONTENT_LENGTH bounds how much is read
+        spool = tempfile.TemporaryFile()
+        shutil.copyfileobj(source, spool, SPOOL_CHUNK_BYTES)
+        spool.seek(0)
+        magic = spool.read(6)
+        spool.seek(0)
+        stream = pyarrow.PythonFile(spool, mode='r')
+
+    try:
+        if magic.startswith(PARQUET_MAGIC):
+            yield from pq.ParquetFile(stream).iter_batches(batch_size=batch_rows)
+        elif magic == ARROW_FILE_MAGIC:
+            reader = pyarrow.ipc.open_file(stream)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index)
+        else:
+            yield from pyarrow.ipc.open_stream(stream)
+    except pyarrow.ArrowInvalid as e:
+        raise ValidationError(f'Not a Parquet or Arrow file: {str(e)}')
+    finally:
+        if spool is not None:
+            spool.close()
+
+def _import_table(batch, now=None):
+    """Cast a batch to the export schema and keep the rows a POSTed reading could have produced.
+
+    Every export column is required. Rows are rejected when a station,
+    timestamp, RTC time or IAQ accuracy is empty, when air_quality is above
+    100% (the conversion of a score never is) or when the timestamp is
+    before 2000 or in the future. Returns (table, rejected rows).
+    """
+    names = batch.schema.names
+    for name in EXPORT_COLUMNS:
+        if name not in names:
+            raise ValidationError(f'Missing required column: {name}')
+    columns = []
+    for field in EXPORT_SCHEMA:
+        try:
+            # Naive timestamps are taken as UTC
+            columns.append(batch.column(field.name).cast(field.type))
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError) as e:
+            raise ValidationError(f'Invalid values in column {field.name}: {str(e)}')
+    table = pyarrow.Table.from_arrays(columns, schema=EXPORT_SCHEMA)
+
+    now = now or datetime.now(UTC)
+    timestamps = table.column('timestamp')
+    checks = [pc.is_valid(table.column(name)) for name in IMPORT_REQUIRED_COLUMNS]
+    air_quality = table.column('air_quality')
+    checks += [
+        pc.fill_null(pc.or_(pc.is_nan(air_quality), pc.less_equal(air_quality, 100.0)), True),
+        pc.fill_null(pc.greater_equal(timestamps, pyarrow.scalar(EARLIEST_READING_TIME, TIMESTAMP)), False),
+        pc.fill_null(pc.less_equal(timestamps, pyarrow.scalar(now + CLOCK_SKEW, TIMESTAMP)), False),
+    ]
+    valid = checks[0]
+    for check in checks[1:]:
+        valid = pc.and_(valid, check)
+    kept = table.filter(valid)
+    return kept, table.num_rows - kept.num_rows
+
+def import_batches(batches):
+    """Insert the readings of record batches, one transaction per batch.
+
+    Returns counts of the rows imported, skipped as already stored, and
+    rejected as invalid.
+    """
+    summary = {'imported': 0, 'skipped': 0, 'rejected': 0}
+    for batch in batches:
+        table, rejected = _import_table(batch)
+        summary['rejected'] += rejected
+        if not table.num_rows:
+            continue
+
+        columns = {name: table.column(name).to_pylist() for name in EXPORT_COLUMNS
+                   if name not in ('timestamp', 'rtc_time')}
+        columns['timestamp'] = to_datetimes(table.column('timestamp'))
+        columns['rtc_time'] = to_datetimes(table.column('rtc_time'))
+        stored = stored_reading_keys(zip(columns['station_id'], columns['timestamp']))
+        rows = []
+        seen = set()
+        for index, timestamp in enumerate(columns['timestamp']):
+            key = (columns['station_id'][index], timestamp)
+            if key in stored or key in seen:
+                continue
+            seen.add(key)
+            rows.append({name: values[index] for name, values in columns.items()})
+        summary['skipped'] += table.num_rows - len(rows)
+        if not rows:
+            continue
+
+        try:
+            db.session.execute(insert(SensorData), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        summary['imported'] += len(rows)
+        after_ingest(rows)
+    return summary
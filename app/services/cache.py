@@ -0,0 +1,303 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from .shared_state import SQLiteStore, sqlite_path
+
+# Station tag for entries that cover every station
+ALL_STATIONS = 'all'
+
+class MemoryCache:
+    """In-process LRU cache of encoded responses with a TTL.
+
+    Every entry is tagged with the stations it covers so ingest can drop
+    exactly the entries that became stale. Entries covering all stations
+    are dropped on any invalidation.
+    """
+
+    def __init__(self, maxsize=256, ttl=30, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, stations, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, frozenset(stations), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_stations(self, station_ids):
+        """Drop every entry covering any of the given stations."""
+        station_ids = set(station_ids) | {ALL_STATIONS}
+        with self._lock:
+            stale = [key for key, (_, stations, _) in self._entries.items()
+                     if not stations.isdisjoint(station_ids)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
+
+class SQLiteCache:
+    """Response cache shared by all workers through a local SQLite file.
+
+    Values are (body, mimetype, meta) triples, meta being a JSON-encodable
+    dict stored with the body (e.g. its validators). Least recently used
+    entries are evicted once maxsize is exceeded and counters are shared as
+    well. Reads are plain SELECTs that never take the write lock; their LRU
+    touches and hit/miss counts are written in one transaction every
+    flush_every reads or flush_seconds, and before every set.
+    """
+
+    def __init__(self, path, maxsize=256, ttl=30, clock=time.time, flush_every=100, flush_seconds=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._pending_lock = threading.Lock()
+        self._touched = {}
+        self._counts = {'hits': 0, 'misses': 0}
+        self._flushed_at = clock()
+        self.store = SQLiteStore(path, schema=(
+            'CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, body BLOB NOT NULL, '
+            'mimetype TEXT NOT NULL, meta TEXT NOT NULL, expires REAL NOT NULL, last_used REAL NOT NULL)',
+            'CREATE INDEX IF NOT EXISTS ix_response_cache_last_used ON response_cache (last_used)',
+            'CREATE TABLE IF NOT EXISTS response_cache_tags (key TEXT NOT NULL, station TEXT NOT NULL, '
+            'PRIMARY KEY (station, key))',
+            'CREATE TABLE IF NOT EXISTS response_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+        ))
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key, default=str)
+
+    def _bump(self, connection, name, amount=1):
+        connection.execute(
+            'INSERT INTO response_cache_stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value', (name, amount))
+
+    def _delete(self, connection, keys):
+        for key in keys:
+            connection.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+            connection.execute('DELETE FROM response_cache_tags WHERE key = ?', (key,))
+
+    def _take_pending(self):
+        with self._pending_lock:
+            touched, counts = self._touched, self._counts
+            self._touched, self._counts = {}, {'hits': 0, 'misses': 0}
+            self._flushed_at = self.clock()
+        return touched, counts
+
+    def _write_pending(self, connection, touched, counts):
+        connection.executemany('UPDATE response_cache SET last_used = max(last_used, ?) WHERE key = ?',
+                               [(used, key) for key, used in touched.items()])
+        for name, amount in counts.items():
+            if amount:
+                self._bump(connection, name, amount)
+
+    def flush(self):
+        """Write the batched LRU touches and counters, and drop expired entries."""
+        touched, counts = self._take_pending()
+        with self.store.transaction() as connection:
+            self._write_pending(connection, touched, counts)
+            expired = [row[0] for row in connection.execute(
+                'SELECT key FROM response_cache WHERE expires <= ?', (self.clock(),))]
+            self._delete(connection, expired)
+
+    def get(self, key):
+        key = self._key(key)
+        now = self.clock()
+        # Autocommit SELECT: WAL readers never wait for the writer, so hits do not serialize across workers
+        row = self.store.connection.execute(
+            'SELECT body, mimetype, meta, expires FROM response_cache WHERE key = ?', (key,)).fetchone()
+        hit = row is not None and row[3] > now
+        with self._pending_lock:
+            self._counts['hits' if hit else 'misses'] += 1
+            if hit:
+                self._touched[key] = now
+            due = (sum(self._counts.values()) >= self.flush_every
+                   or now - self._flushed_at >= self.flush_seconds)
+        if due:
+            self.flush()
+        if not hit:
+            return None  # Expired entries are dropped by the next flush
+        return row[0], row[1], json.loads(row[2])
+
+    def set(self, key, stations, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        key = self._key(key)
+        body, mimetype, meta = value
+        now = self.clock()
+        touched, counts = self._take_pending()
+        with self.store.transaction() as connection:
+            # Pending touches first, so eviction sees this worker's recent reads
+            self._write_pending(connection, touched, counts)
+            self._delete(connection, [key])
+            connection.execute(
+                'INSERT INTO response_cache (key, body, mimetype, meta, expires, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)', (key, body, mimetype, json.dumps(meta), now + self.ttl, now))
+            connection.executemany(
+                'INSERT INTO response_cache_tags (key, station) VALUES (?, ?)',
+                [(key, str(station)) for station in set(stations)])
+
+            excess = connection.execute('SELECT count(*) FROM response_cache').fetchone()[0] - self.maxsize
+            if excess > 0:
+                stale = [row[0] for row in connection.execute(
+                    'SELECT key FROM response_cache ORDER BY last_used LIMIT ?', (excess,))]
+                self._delete(connection, stale)
+                self._bump(connection, 'evictions', len(stale))
+
+    def invalidate_stations(self, station_ids):
+        stations = [str(station) for station in set(station_ids) | {ALL_STATIONS}]
+        placeholders = ', '.join('?' * len(stations))
+        with self.store.transaction() as connection:
+            stale = [row[0] for row in connection.execute(
+                f'SELECT DISTINCT key FROM response_cache_tags WHERE station IN ({placeholders})', stations)]
+            self._delete(connection, stale)
+            if stale:
+                self._bump(connection, 'invalidations', len(stale))
+
+    def clear(self):
+        with self.store.transaction() as connection:
+            connection.execute('DELETE FROM response_cache')
+            connection.execute('DELETE FROM response_cache_tags')
+
+    def stats(self):
+        self.flush()
+        connection = self.store.connection
+        counters = dict(connection.execute('SELECT name, value FROM response_cache_stats'))
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'invalidations': counters.get('invalidations', 0),
+            'size': connection.execute('SELECT count(*) FROM response_cache').fetchone()[0],
+            'maxsize': self.maxsize,
+            'ttl': self.ttl
+        }
+
+class RedisCache:
+    """Response cache adapter for Redis; requires the redis package.
+
+    Redis expires entries itself. Size is bounded by the server's
+    maxmemory-policy (use allkeys-lru) rather than by maxsize.
+    """
+
+    def __init__(self, url, maxsize=256, ttl=30, prefix='suv:cache:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, key):
+        return self.prefix + json.dumps(key, default=str)
+
+    def _tag(self, station):
+        return f'{self.prefix}station:{station}'
+
+    def get(self, key):
+        value = self.client.hmget(self._key(key), 'body', 'mimetype', 'meta')
+        if value[0] is None:
+            self.client.hincrby(self.prefix + 'stats', 'misses', 1)
+            return None
+        self.client.hincrby(self.prefix + 'stats', 'hits', 1)
+        return value[0], value[1].decode('utf-8'), json.loads(value[2])
+
+    def set(self, key, stations, value):
+        if self.ttl <= 0:
+            return
+        key = self._key(key)
+        body, mimetype, meta = value
+        pipeline = self.client.pipeline()
+        pipeline.hset(key, mapping={'body': body, 'mimetype': mimetype, 'meta': json.dumps(meta)})
+        pipeline.expire(key, self.ttl)
+        for station in set(stations):
+            pipeline.sadd(self._tag(station), key)
+            pipeline.expire(self._tag(station), self.ttl)
+        pipeline.execute()
+
+    def invalidate_stations(self, station_ids):
+        tags = [self._tag(station) for station in set(station_ids) | {ALL_STATIONS}]
+        keys = set()
+        for tag in tags:
+            keys.update(self.client.smembers(tag))
+        if keys:
+            self.client.delete(*keys)
+            self.client.hincrby(self.prefix + 'stats', 'invalidations', len(keys))
+        self.client.delete(*tags)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self):
+        counters = {k.decode('utf-8'): int(v) for k, v in self.client.hgetall(self.prefix + 'stats').items()}
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': None,
+            'invalidations': counters.get('invalidations', 0),
+            'size': None,
+            'maxsize': self.maxsize,
+            'ttl': self.ttl
+        }
+
+def create_cache(url, maxsize, ttl):
+    """Create the response cache for a SHARED_STATE_URL."""
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(sqlite_path(url), maxsize=maxsize, ttl=ttl)
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisCache(url, maxsize=maxsize, ttl=ttl)
+    return MemoryCache(maxsize=maxsize, ttl=ttl)
+
+def init_cache(app):
+    app.extensions['response_cache'] = create_cache(
+        app.config['SHARED_STATE_URL'],
+        maxsize=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+
+def get_cache():
+    return current_app.extensions['response_cache']
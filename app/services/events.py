@@ -0,0 +1,178 @@
+"""Fan-out of newly ingested readings to Server-Sent Events subscribers.
+
+Every worker process runs one poller thread that reads sensor_data rows
+above the last id it has seen and hands them to its subscribers. The table
+itself is the notification log, so readings ingested by any worker reach
+subscribers in every worker. after_ingest wakes the local poller so that
+readings ingested by the same worker go out without waiting for the next
+poll.
+
+Each open stream holds a worker thread, so a worker accepts at most
+STREAM_MAX_PER_WORKER of them and answers 503 beyond that; the dashboard
+then polls /data until a slot frees up.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func, select
+from ..models.sensor_data import db, SensorData
+from .serialization import SENSOR_DATA_COLUMNS, sensor_rows_to_dicts
+from ..utils.errors import ServiceUnavailableError
+
+# Reconnect delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 3000
+# Retry-After of a stream refused because the worker is full
+FULL_RETRY_SECONDS = 60
+
+def fetch_rows_after(after_id, station_ids, limit):
+    """Return up to limit reading dicts with an id above after_id, oldest first."""
+    stmt = select(*SENSOR_DATA_COLUMNS).where(SensorData.id > after_id)
+    if station_ids is not None:
+        stmt = stmt.where(SensorData.station_id.in_(station_ids))
+    return sensor_rows_to_dicts(db.session.execute(stmt.order_by(SensorData.id).limit(limit)).all())
+
+def format_event(row):
+    """Encode a reading as an SSE message whose id is the row id."""
+    return f"id: {row['id']}\nevent: reading\ndata: {json.dumps(row, separators=(',', ':'))}\n\n"
+
+class Subscription:
+    """Bounded queue of readings for one connected client."""
+
+    def __init__(self, station_ids, maxsize):
+        self.station_ids = station_ids
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, rows):
+        for row in rows:
+            if self.station_ids is not None and row['station_id'] not in self.station_ids:
+                continue
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                # A client this far behind reconnects and replays from its last event id
+                self.overflowed = True
+                return
+
+class EventHub:
+    """Per-process poller fanning new readings out to subscriptions."""
+
+    def __init__(self, app, poll_interval=1.0, batch_size=1000, queue_size=1000, max_subscribers=None):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.last_id = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def subscribe(self, station_ids=None):
+        """Register a subscription for the given stations (None for all).
+
+        Raises ServiceUnavailableError when max_subscribers streams are open
+        in this process already.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive a fork, so every worker starts its own poller
+                self._pid = os.getpid()
+                self._subscribers = set()
+                self.last_id = None
+                threading.Thread(target=self._run, name='sensor-events', daemon=True).start()
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                raise ServiceUnavailableError('Too many open streams, poll /data instead',
+                                              retry_after=FULL_RETRY_SECONDS)
+            if self.last_id is None:
+                self.last_id = db.session.execute(select(func.max(SensorData.id))).scalar() or 0
+            subscription = Subscription(set(station_ids) if station_ids is not None else None, self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def notify(self):
+        """Wake the poller after rows were committed in this process."""
+        self._wake.set()
+
+    def poll(self):
+        """Deliver rows newer than last_id to every subscription; returns the number of rows."""
+        with self._lock:
+            if not self._subscribers:
+                # Nobody is listening, so start from the latest row on the next subscribe
+                self.last_id = None
+                return 0
+            last_id = self.last_id
+
+        with self.app.app_context():
+            rows = fetch_rows_after(last_id, None, self.batch_size)
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.last_id = rows[-1]['id']
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(rows)
+        return len(rows)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                # Keep going while a full batch came back, so bursts drain quickly
+                while self.poll() == self.batch_size:
+                    pass
+            except Exception as e:
+                self.app.logger.error(f'Error polling sensor events: {str(e)}')
+
+def iter_events(hub, subscription, replay, max_seconds, heartbeat):
+    """Yield SSE messages: replayed rows first, then live rows until max_seconds pass.
+
+    The stream ends after max_seconds so a connection never holds a worker
+    thread indefinitely; EventSource reconnects with Last-Event-ID and the
+    replay fills the gap.
+    """
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        sent_id = 0
+        for row in replay:
+            yield format_event(row)
+            sent_id = row['id']
+
+        deadline = time.monotonic() + max_seconds
+        while not subscription.overflowed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = subscription.queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                # Comments keep proxies from closing idle connections
+                yield ': keep-alive\n\n'
+                continue
+            if row['id'] <= sent_id:
+                continue  # Already sent as part of the replay
+            yield format_event(row)
+            sent_id = row['id']
+    finally:
+        hub.unsubscribe(subscription)
+
+def init_event_hub(app):
+    app.extensions['event_hub'] = EventHub(
+        app,
+        poll_interval=app.config['STREAM_POLL_INTERVAL'],
+        queue_size=app.config['STREAM_QUEUE_SIZE'],
+        max_subscribers=app.config['STREAM_MAX_PER_WORKER']
+    )
+
+def get_event_hub():
+    return current_app.extensions['event_hub']
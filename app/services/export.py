@@ -0,0 +1,55 @@
+import csv
+from io import StringIO
+from ..models.sensor_data import db, SensorData
+from .queries import sensor_data_window_select
+
+CSV_COLUMNS = ['timestamp', 'temperature', 'humidity', 'uv_index',
+               'air_quality', 'co2e', 'fill_level', 'rtc_time',
+               'bme_iaq_accuracy']
+
+def export_name(station_ids, extension):
+    """Download name of an export of the stations, or of all stations for None."""
+    if station_ids is None:
+        return f'sensor_data_all_stations.{extension}'
+    suffix = '_'.join(map(str, station_ids))
+    if len(station_ids) == 1:
+        return f'sensor_data_station_{suffix}.{extension}'
+    return f'sensor_data_stations_{suffix}.{extension}'
+
+def csv_columns(include_station):
+    return (['station_id'] if include_station else []) + CSV_COLUMNS
+
+def has_rows(station_ids, since):
+    """Check whether any reading exists for the stations in the window."""
+    stmt = sensor_data_window_select([SensorData.id], station_ids, since).limit(1)
+    return db.session.execute(stmt).first() is not None
+
+def iter_csv(station_ids, since, include_station=False, chunk_size=1000):
+    """Yield the CSV export as UTF-8 encoded chunks.
+
+    Rows are fetched chunk_size at a time, so memory use stays flat no matter
+    how large the window is. The first chunk starts with a BOM for Excel.
+    """
+    names = csv_columns(include_station)
+    stmt = sensor_data_window_select(
+        [getattr(SensorData, name) for name in names], station_ids, since
+    ).execution_options(yield_per=chunk_size)
+
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield buffer.getvalue().encode('utf-8-sig')
+
+    timestamp_index = names.index('timestamp')
+    rtc_time_index = names.index('rtc_time')
+    result = db.session.execute(stmt)
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            row = list(row)
+            row[timestamp_index] = row[timestamp_index].isoformat()
+            if row[rtc_time_index] is not None:
+                row[rtc_time_index] = row[rtc_time_index].isoformat()
+            writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
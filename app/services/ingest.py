@@ -0,0 +1,134 @@
+from datetime import datetime, UTC
+import json
+from flask import current_app
+from sqlalchemy import insert
+from ..models.sensor_data import db, SensorData
+from ..utils.validators import validate_sensor_data, validate_sensor_batch, format_rtc_time
+from ..utils.errors import ValidationError
+from .rollups import compact_rollups
+from .alerts import evaluate_alerts
+from .latest import update_station_latest
+from .cache import get_cache
+from .events import get_event_hub
+from .write_queue import get_write_queue
+from .storage import get_storage
+
+def iter_ndjson(lines):
+    """Yield newline-delimited JSON readings, turning unparseable lines into ValidationErrors."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValidationError(f'Invalid JSON: {str(e)}')
+
+def build_sensor_row(data, timestamp):
+    """Validate a single reading and return the column values for a SensorData row."""
+    if not isinstance(data, dict):
+        raise ValidationError('Reading must be a JSON object')
+
+    validate_sensor_data(data)
+    rtc_time = format_rtc_time(data['rtc_time'])
+
+    return {
+        'timestamp': timestamp,
+        'temperature': float(data['temperature']),
+        'humidity': float(data['humidity']),
+        'uv_index': float(data['uv_index']),
+        'air_quality': float(data['air_quality']),
+        'co2e': float(data['co2e']),
+        'fill_level': float(data['fill_level']),
+        'rtc_time': rtc_time,
+        'bme_iaq_accuracy': int(data['bme_iaq_accuracy']),
+        'station_id': int(data['station_id'])
+    }
+
+def build_sensor_rows(readings, timestamp):
+    """Validate a batch column by column and return (rows, errors) for the valid readings.
+
+    errors maps the index of each rejected reading to its message.
+    """
+    columns, valid, errors = validate_sensor_batch(readings)
+    fields = list(columns)
+    rows = []
+    for is_valid, values in zip(valid, zip(*columns.values())):
+        if is_valid:
+            row = dict(zip(fields, values))
+            row['timestamp'] = timestamp
+            rows.append(row)
+    return rows, errors
+
+def insert_rows(rows):
+    """Bulk insert already validated rows in a single transaction."""
+    if not rows:
+        return
+    try:
+        db.session.execute(insert(SensorData), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    after_ingest(rows)
+
+def submit_rows(rows):
+    """Insert validated rows now, or hand them to the write-behind queue.
+
+    Returns True when the rows were queued rather than committed.
+    """
+    queue = get_write_queue()
+    if queue is None:
+        insert_rows(rows)
+        return False
+    if rows:
+        queue.enqueue(rows)
+    return True
+
+def after_ingest(rows):
+    """Update derived data once new rows are committed.
+
+    The readings are already stored at this point, so failures are logged
+    rather than raised; the CLI can catch up on anything missed here.
+    """
+    get_cache().invalidate_stations({row['station_id'] for row in rows})
+    get_event_hub().notify()
+
+    try:
+        update_station_latest()
+    except Exception as e:
+        current_app.logger.error(f'Error updating latest readings: {str(e)}')
+
+    config = current_app.config
+    if config['ROLLUPS_ENABLED']:
+        try:
+            compact_rollups(config['ROLLUP_COMPACT_BATCH'])
+        except Exception as e:
+            current_app.logger.error(f'Error compacting rollups: {str(e)}')
+    if config['ALERTS_ENABLED']:
+        try:
+            evaluate_alerts(config['ALERT_EVALUATE_BATCH'])
+        except Exception as e:
+            current_app.logger.error(f'Error evaluating alerts: {str(e)}')
+    try:
+        get_storage().sync()
+    except Exception as e:
+        current_app.logger.error(f'Error syncing storage segments: {str(e)}')
+
+def ingest_batch(readings):
+    """Validate every reading and bulk insert the valid ones.
+
+    Invalid readings are rejected individually so one bad row does not fail
+    the whole batch. Returns (rows, results, queued) where results holds one
+    entry per reading in input order and queued says whether the valid rows
+    went to the write-behind queue instead of being committed.
+    """
+    rows, errors = build_sensor_rows(readings, datetime.now(UTC))
+    results = [
+        {'index': index, 'status': 'rejected', 'error': str(errors[index])} if index in errors
+        else {'index': index, 'status': 'accepted'}
+        for index in range(len(readings))
+    ]
+
+    queued = submit_rows(rows)
+    return rows, results, queued
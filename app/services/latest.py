@@ -0,0 +1,116 @@
+"""The station_latest snapshot: one row per station holding its newest reading.
+
+Readings are folded in behind their own watermark after every ingest, so a
+station's current values never need an ORDER BY over sensor_data. Newest
+means the latest timestamp (ties go to the larger id), so backfilled or
+imported history never replaces the current values.
+"""
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from ..models.sensor_data import db, SensorData
+from ..models.station_latest import StationLatest
+from ..models.rollups import RollupWatermark
+from .rollups import get_watermark, advance_watermark
+from .serialization import SENSOR_DATA_FIELDS, SENSOR_DATA_COLUMNS
+
+WATERMARK_NAME = 'station_latest'
+# Counts every change to the snapshot, kept next to the watermarks
+CHANGES_NAME = 'station_latest_changes'
+LATEST_COLUMNS = [getattr(StationLatest, name) for name in SENSOR_DATA_FIELDS]
+
+def _newest_rows(*conditions):
+    """Select the newest sensor_data row per station among the rows matching conditions."""
+    # MAX(timestamp) per station is a seek per station on the (station_id, timestamp) index
+    newest = (select(SensorData.station_id, func.max(SensorData.timestamp).label('timestamp'))
+              .where(*conditions)
+              .group_by(SensorData.station_id)
+              .subquery())
+    newest_ids = (select(func.max(SensorData.id))
+                  .join(newest, and_(SensorData.station_id == newest.c.station_id,
+                                     SensorData.timestamp == newest.c.timestamp))
+                  .where(*conditions)
+                  .group_by(SensorData.station_id))
+    return db.session.execute(select(*SENSOR_DATA_COLUMNS).where(SensorData.id.in_(newest_ids))).all()
+
+def _count_change():
+    """Bump the snapshot's change counter in the current transaction."""
+    get_watermark(CHANGES_NAME)  # Creates the counter on first use
+    db.session.execute(update(RollupWatermark)
+                       .where(RollupWatermark.name == CHANGES_NAME)
+                       .values(last_id=RollupWatermark.last_id + 1))
+
+def _upsert(rows):
+    """Copy rows into the snapshot unless it already holds a newer reading for the station.
+
+    Returns the number of stations changed.
+    """
+    existing = {
+        latest.station_id: latest
+        for latest in db.session.scalars(select(StationLatest).where(
+            StationLatest.station_id.in_({row.station_id for row in rows})))
+    }
+    changed = 0
+    for row in rows:
+        latest = existing.get(row.station_id)
+        if latest is None:
+            latest = StationLatest(station_id=row.station_id)
+            db.session.add(latest)
+        elif (latest.timestamp, latest.id) >= (row.timestamp, row.id):
+            continue
+        for name, value in zip(SENSOR_DATA_FIELDS, row):
+            setattr(latest, name, value)
+        changed += 1
+    if changed:
+        _count_change()
+    return changed
+
+def update_station_latest():
+    """Fold readings newer than the watermark into the snapshot; returns the stations updated."""
+    try:
+        first_id = get_watermark(WATERMARK_NAME)
+        last_id = db.session.execute(select(func.max(SensorData.id)).where(SensorData.id > first_id)).scalar()
+        if last_id is None:
+            db.session.commit()
+            return 0
+        changed = _upsert(_newest_rows(SensorData.id > first_id, SensorData.id <= last_id))
+        if not advance_watermark(WATERMARK_NAME, first_id, last_id):
+            # Another worker folded these readings first
+            db.session.rollback()
+            return 0
+        db.session.commit()
+        return changed
+    except IntegrityError:
+        # Another worker inserted the same new station concurrently
+        db.session.rollback()
+        return 0
+    except Exception:
+        db.session.rollback()
+        raise
+
+def rebuild_station_latest(station_ids=None):
+    """Recompute the snapshot from sensor_data after readings were deleted. Does not commit."""
+    stmt = delete(StationLatest)
+    conditions = []
+    if station_ids is not None:
+        stmt = stmt.where(StationLatest.station_id.in_(station_ids))
+        conditions.append(SensorData.station_id.in_(station_ids))
+    db.session.execute(stmt)
+    _upsert(_newest_rows(*conditions))
+    _count_change()
+
+def latest_readings(station_ids=None):
+    """Return the snapshot rows as SENSOR_DATA_FIELDS tuples, one per station."""
+    stmt = select(*LATEST_COLUMNS)
+    if station_ids is not None:
+        stmt = stmt.where(StationLatest.station_id.in_(station_ids))
+    return db.session.execute(stmt.order_by(StationLatest.station_id)).all()
+
+def latest_version():
+    """(newest reading id, change count); changes whenever any station's latest reading does.
+
+    The change count only grows, so a delete followed by an insert never
+    repeats an earlier version.
+    """
+    max_id = select(func.coalesce(func.max(StationLatest.id), 0)).scalar_subquery()
+    changes = select(RollupWatermark.last_id).where(RollupWatermark.name == CHANGES_NAME).scalar_subquery()
+    return tuple(db.session.execute(select(max_id, func.coalesce(changes, 0))).one())
@@ -0,0 +1,51 @@
+"""Database upkeep after heavy loads, for `flask maintain-db`.
+
+ANALYZE refreshes the planner statistics, so queries keep picking the
+station/timestamp indexes once a backfill has changed the table sizes.
+REINDEX rebuilds indexes fragmented by out-of-order inserts, and VACUUM
+returns the space of deleted rows (SQLite rewrites the whole file; it
+needs free disk space of about the database's size and blocks writers
+while it runs).
+"""
+import time
+from sqlalchemy import text
+from ..models.sensor_data import db
+
+def _pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+def sqlite_size():
+    """Return (file bytes, free bytes) of the SQLite database."""
+    page_size = _pragma('page_size')
+    return _pragma('page_count') * page_size, _pragma('freelist_count') * page_size
+
+def maintenance_statements(dialect, reindex=False, vacuum=False, analyze=True):
+    """Return (step, SQL) pairs to run in order for the database dialect."""
+    statements = []
+    if reindex:
+        if dialect == 'sqlite':
+            statements.append(('reindex', 'REINDEX'))
+        else:
+            statements += [('reindex', f'REINDEX TABLE {table.name}') for table in db.metadata.sorted_tables]
+    if vacuum:
+        statements.append(('vacuum', 'VACUUM'))
+        if dialect == 'sqlite':
+            # In WAL mode the rewritten pages land in the -wal file until a checkpoint
+            statements.append(('vacuum', 'PRAGMA wal_checkpoint(TRUNCATE)'))
+    if analyze:
+        statements.append(('analyze', 'ANALYZE'))
+        if dialect == 'sqlite':
+            statements.append(('optimize', 'PRAGMA optimize'))
+    return statements
+
+def maintain_database(reindex=False, vacuum=False, analyze=True):
+    """Run the maintenance steps outside a transaction; returns {step: seconds}."""
+    db.session.remove()
+    engine = db.engine
+    timings = {}
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        for step, statement in maintenance_statements(engine.dialect.name, reindex, vacuum, analyze):
+            started = time.perf_counter()
+            connection.execute(text(statement))
+            timings[step] = timings.get(step, 0) + time.perf_counter() - started
+    return timings
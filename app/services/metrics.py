@@ -0,0 +1,231 @@
+"""Request metrics in the Prometheus text format.
+
+Each worker times its requests, counts the SQL queries they run and the
+time spent serializing responses, and keeps the deltas in memory. Every
+METRICS_FLUSH_SECONDS the deltas are added to a store shared through
+SHARED_STATE_URL, so /metrics reports totals across all gunicorn workers
+(with memory:// each worker reports only its own).
+"""
+import functools
+import re
+import threading
+import time
+from collections import defaultdict
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from .shared_state import SQLiteStore, sqlite_path
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+# Metric families in exposition order: (type, help)
+METRICS = {
+    'suv_http_requests_total': ('counter', 'Requests by endpoint, method and status.'),
+    'suv_http_request_duration_seconds': ('histogram', 'Time from before_request to after_request by endpoint.'),
+    'suv_http_response_size_bytes': ('histogram', 'Size of non-streamed response bodies by endpoint.'),
+    'suv_db_queries_total': ('counter', 'SQL statements executed while handling requests, by endpoint.'),
+    'suv_db_query_seconds_total': ('counter', 'Time spent executing SQL statements, by endpoint.'),
+    'suv_serialization_seconds_total': ('counter', 'Time spent encoding response bodies, by endpoint.'),
+}
+SERIES_NAME = re.compile(r'^([a-z_]+?)(_bucket|_sum|_count)?\{')
+LE_LABEL = re.compile(r',?le="([^"]+)"')
+
+def series(name, **labels):
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return f'{name}{{{label_text}}}'
+
+class MemoryMetricsStore:
+    """Totals kept in this process only."""
+
+    def __init__(self):
+        self.values = defaultdict(float)
+
+    def add(self, deltas):
+        for key, value in deltas.items():
+            self.values[key] += value
+
+    def snapshot(self):
+        return dict(self.values)
+
+class SQLiteMetricsStore:
+    """Totals in the shared SQLite file, summed across every worker on the host."""
+
+    def __init__(self, path):
+        self.store = SQLiteStore(path, schema=(
+            'CREATE TABLE IF NOT EXISTS metrics (series TEXT PRIMARY KEY, value REAL NOT NULL)',
+        ))
+
+    def add(self, deltas):
+        with self.store.transaction() as connection:
+            connection.executemany(
+                'INSERT INTO metrics (series, value) VALUES (?, ?) '
+                'ON CONFLICT(series) DO UPDATE SET value = value + excluded.value',
+                list(deltas.items()))
+
+    def snapshot(self):
+        return dict(self.store.connection.execute('SELECT series, value FROM metrics'))
+
+class RedisMetricsStore:
+    """Totals in a Redis hash for workers on several machines; requires the redis package."""
+
+    def __init__(self, url, key='suv:metrics'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def add(self, deltas):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in deltas.items():
+            pipeline.hincrbyfloat(self.key, key, value)
+        pipeline.execute()
+
+    def snapshot(self):
+        return {key.decode(): float(value) for key, value in self.client.hgetall(self.key).items()}
+
+def create_metrics_store(url):
+    if url.startswith('sqlite:///'):
+        return SQLiteMetricsStore(sqlite_path(url))
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisMetricsStore(url)
+    return MemoryMetricsStore()
+
+class Metrics:
+    """Per-worker buffer of metric deltas flushed to a shared store."""
+
+    def __init__(self, store, flush_seconds=5.0):
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def inc(self, key, value=1.0):
+        with self._lock:
+            self._pending[key] += value
+
+    def observe(self, name, value, buckets, **labels):
+        """Record a histogram observation as cumulative bucket counts, sum and count."""
+        with self._lock:
+            # Lower buckets are still written so every series exposes the full bucket set
+            for bound in buckets:
+                self._pending[series(f'{name}_bucket', **labels, le=bound)] += value <= bound
+            self._pending[series(f'{name}_bucket', **labels, le='+Inf')] += 1
+            self._pending[series(f'{name}_sum', **labels)] += value
+            self._pending[series(f'{name}_count', **labels)] += 1
+
+    def flush(self, force=False):
+        if not force and time.monotonic() - self._last_flush < self.flush_seconds:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except Exception:
+            # Keep the deltas for the next flush
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+            raise
+
+    def render(self):
+        """Flush this worker's deltas and render the shared totals as Prometheus text."""
+        self.flush(force=True)
+        families = defaultdict(list)
+        for key, value in self.store.snapshot().items():
+            match = SERIES_NAME.match(key)
+            if match:
+                families[match.group(1)].append((key, value))
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if name not in families:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(families[name], key=_series_order):
+                lines.append(f'{key} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+def _series_order(item):
+    """Sort buckets of the same labels by increasing le, with +Inf last."""
+    key = item[0]
+    match = LE_LABEL.search(key)
+    if match is None:
+        return (key, 0.0)
+    return (LE_LABEL.sub('', key), float(match.group(1)))
+
+def add_request_time(kind, seconds):
+    """Accumulate time spent in one part of handling the current request."""
+    if has_request_context() and 'metrics_times' in g:
+        g.metrics_times[kind] += seconds
+
+def timed_serialization(func):
+    """Count the wrapped function's run time as response serialization."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            add_request_time('serialization', time.perf_counter() - started)
+    return wrapper
+
+def _register_query_hooks(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        # Statements on one connection run one at a time
+        conn.info['query_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'metrics_times' in g:
+            g.metrics_times['db'] += time.perf_counter() - conn.info['query_started']
+            g.metrics_queries += 1
+
+def init_metrics(app, engine):
+    if not app.config['METRICS_ENABLED']:
+        app.extensions['metrics'] = None
+        return
+    metrics = app.extensions['metrics'] = Metrics(
+        create_metrics_store(app.config['SHARED_STATE_URL']),
+        flush_seconds=app.config['METRICS_FLUSH_SECONDS']
+    )
+    _register_query_hooks(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_times = defaultdict(float)
+        g.metrics_queries = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_started' not in g:
+            return response  # Rejected by an earlier before_request hook, e.g. the rate limiter
+        endpoint = request.endpoint or 'unmatched'
+        metrics.inc(series('suv_http_requests_total', endpoint=endpoint, method=request.method,
+                           status=response.status_code))
+        metrics.observe('suv_http_request_duration_seconds', time.perf_counter() - g.metrics_started,
+                        LATENCY_BUCKETS, endpoint=endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            metrics.observe('suv_http_response_size_bytes', response.content_length, SIZE_BUCKETS,
+                            endpoint=endpoint)
+        if g.metrics_queries:
+            metrics.inc(series('suv_db_queries_total', endpoint=endpoint), g.metrics_queries)
+            metrics.inc(series('suv_db_query_seconds_total', endpoint=endpoint), g.metrics_times['db'])
+        if g.metrics_times['serialization']:
+            metrics.inc(series('suv_serialization_seconds_total', endpoint=endpoint),
+                        g.metrics_times['serialization'])
+        try:
+            metrics.flush()
+        except Exception as e:
+            # Metrics must never fail a request; the deltas are retried on the next flush
+            current_app.logger.error(f'Error flushing metrics: {str(e)}')
+        return response
+
+def get_metrics():
+    return current_app.extensions['metrics']
@@ -0,0 +1,332 @@
+"""Columnar copy of sensor_data in Parquet segment files.
+
+sync() cuts the rows newer than the last segment into a new segment once
+there are STORAGE_SEGMENT_ROWS of them, in id order. A segment file is
+named after its id range, holds its rows sorted by station and timestamp
+in small row groups, and records its time range and stations in the
+footer. A scan only opens the segments overlapping the requested stations
+and window, and Parquet statistics skip the row groups outside it.
+
+Rows newer than the last segment are read from sensor_data, so reads see
+every committed reading. Aggregations into minute, hour or day multiples
+come from the rollups, like the SQL backend, while they are current.
+
+The directory itself is the watermark: the highest id in any segment.
+Writers hold an exclusive lock on the directory; readers never lock, as
+files are replaced atomically.
+"""
+import os
+import re
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, UTC
+from operator import attrgetter
+import pyarrow
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from flask import current_app
+from sqlalchemy import func, select
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS
+from .queries import sensor_data_window_select, aggregate_row
+from .rollups import rollup_for_bucket, rollups_current, aggregate_rollup_stations_window
+from .serialization import SENSOR_DATA_COLUMNS, SENSOR_DATA_FIELDS
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines run a single process anyway
+    fcntl = None
+
+SEGMENT_FILE = re.compile(r'^segment_(\d+)_(\d+)\.parquet$')
+ROW_GROUP_SIZE = 8192
+TIMESTAMP = pyarrow.timestamp('us', tz='UTC')
+SCHEMA = pyarrow.schema([
+    (name, TIMESTAMP if name in ('timestamp', 'rtc_time')
+     else pyarrow.int64() if name in ('id', 'station_id', 'bme_iaq_accuracy')
+     else pyarrow.float64())
+    for name in SENSOR_DATA_FIELDS
+])
+
+SensorRow = namedtuple('SensorRow', SENSOR_DATA_FIELDS)
+_station_time = attrgetter('station_id', 'timestamp')
+
+class Segment:
+    """Footer metadata of one segment file."""
+
+    def __init__(self, path, first_id, last_id, metadata):
+        self.path = path
+        self.first_id = first_id
+        self.last_id = last_id
+        self.rows = int(metadata[b'rows'])
+        # Epoch microseconds; an empty segment matches no window
+        self.min_time = int(metadata[b'min_time']) if self.rows else None
+        self.max_time = int(metadata[b'max_time']) if self.rows else None
+        self.stations = {int(value) for value in metadata[b'stations'].split(b',') if value}
+
+    def overlaps(self, station_ids, since_us, after_id=None):
+        if not self.rows or self.max_time < since_us:
+            return False
+        if after_id is not None and self.last_id <= after_id:
+            return False
+        return station_ids is None or not self.stations.isdisjoint(station_ids)
+
+def rows_to_table(rows):
+    """Build an Arrow table from SENSOR_DATA_COLUMNS tuples."""
+    columns = list(zip(*rows)) if rows else [[] for _ in SENSOR_DATA_FIELDS]
+    return pyarrow.table([pyarrow.array(values, type=field.type) for values, field in zip(columns, SCHEMA)],
+                         schema=SCHEMA)
+
+def to_datetimes(column):
+    """Convert a timestamp column to timezone-aware datetimes."""
+    # Much faster than to_pylist() on a timezone-aware column; microseconds survive the float
+    # division because fromtimestamp rounds to the nearest microsecond
+    return [datetime.fromtimestamp(value / 1_000_000, UTC) if value is not None else None
+            for value in column.cast(pyarrow.int64()).to_pylist()]
+
+def table_to_rows(table):
+    """Turn an Arrow table with the segment schema into SensorRow tuples."""
+    columns = [to_datetimes(table.column(name)) if name in ('timestamp', 'rtc_time') else table.column(name).to_pylist()
+               for name in SENSOR_DATA_FIELDS]
+    return list(map(SensorRow._make, zip(*columns)))
+
+def epoch_us(value):
+    return int(value.timestamp() * 1_000_000)
+
+class ParquetStorage:
+    """Window reads from Parquet segments plus the newest rows from sensor_data."""
+    name = 'parquet'
+
+    def __init__(self, directory, segment_rows=100000):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self._segments = {}  # file name -> (mtime_ns, Segment)
+        self._segments_lock = threading.Lock()
+
+    def segments(self):
+        """Return the current segments in id order, reading footers only for new or changed files."""
+        with self._segments_lock:
+            seen = {}
+            for entry in os.scandir(self.directory):
+                match = SEGMENT_FILE.match(entry.name)
+                if not match:
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime_ns
+                    cached = self._segments.get(entry.name)
+                    if cached is None or cached[0] != mtime:
+                        metadata = pq.read_schema(entry.path).metadata
+                        cached = (mtime, Segment(entry.path, int(match.group(1)), int(match.group(2)), metadata))
+                except FileNotFoundError:
+                    continue  # Removed by retention since the listing
+                seen[entry.name] = cached
+            self._segments = seen
+            return sorted((segment for _, segment in seen.values()), key=attrgetter('first_id'))
+
+    def covered_id(self, segments=None):
+        """Highest sensor_data id copied into a segment."""
+        segments = self.segments() if segments is None else segments
+        return max((segment.last_id for segment in segments), default=0)
+
+    def _read(self, segments, station_ids, since, after_id=None, columns=None):
+        """Read the matching rows of the segments overlapping a window into one table."""
+        since_us = epoch_us(since)
+        filters = [('timestamp', '>=', pyarrow.scalar(since_us, type=TIMESTAMP))]
+        if station_ids is not None:
+            filters.append(('station_id', 'in', list(station_ids)))
+        if after_id is not None:
+            filters.append(('id', '>', after_id))
+        tables = []
+        for segment in segments:
+            if segment.overlaps(station_ids, since_us, after_id):
+                try:
+                    tables.append(pq.read_table(segment.path, columns=columns, filters=filters))
+                except FileNotFoundError:
+                    pass  # Every row in it was deleted
+        schema = SCHEMA if columns is None else pyarrow.schema([SCHEMA.field(name) for name in columns])
+        return pyarrow.concat_tables(tables) if tables else schema.empty_table()
+
+    def _tail(self, columns, station_ids, since, covered, after_id=None):
+        """Rows newer than the segments, straight from sensor_data."""
+        stmt = sensor_data_window_select(columns, station_ids, since, max(covered, after_id or 0))
+        return db.session.execute(stmt).all()
+
+    def scan(self, station_ids, since, after_id=None):
+        """Return rows in the window ordered by station and timestamp, like SQLStorage.scan."""
+        segments = self.segments()
+        table = self._read(segments, station_ids, since, after_id)
+        rows = table_to_rows(table.sort_by([('station_id', 'ascending'), ('timestamp', 'ascending')]))
+        tail = self._tail(SENSOR_DATA_COLUMNS, station_ids, since, self.covered_id(segments), after_id)
+        if tail:
+            rows.extend(tail)
+            rows.sort(key=_station_time)
+        return rows
+
+    def aggregate(self, station_ids, since, bucket_seconds):
+        """Aggregate from the coarsest usable rollup, or raw readings with vectorized Arrow group-bys."""
+        rollup = rollup_for_bucket(bucket_seconds) if current_app.config['ROLLUPS_ENABLED'] else None
+        if rollup is not None and rollups_current():
+            return aggregate_rollup_stations_window(rollup, station_ids, since, bucket_seconds)
+
+        columns = ['station_id', 'timestamp'] + SENSOR_METRICS
+        segments = self.segments()
+        table = self._read(segments, station_ids, since, columns=columns)
+        tail = self._tail([getattr(SensorData, name) for name in columns], station_ids, since,
+                          self.covered_id(segments))
+        if tail:
+            tail_columns = list(zip(*tail))
+            table = pyarrow.concat_tables([table, pyarrow.table(
+                [pyarrow.array(values, type=table.schema.field(name).type)
+                 for name, values in zip(columns, tail_columns)], schema=table.schema)])
+        if not table.num_rows:
+            return []
+
+        bucket_us = bucket_seconds * 1_000_000
+        epoch = table.column('timestamp').cast(pyarrow.int64())
+        table = table.append_column('bucket', pc.multiply(pc.divide(epoch, bucket_us), bucket_seconds))
+        aggregations = [('timestamp', 'count')]
+        for metric in SENSOR_METRICS:
+            aggregations += [(metric, 'mean'), (metric, 'min'), (metric, 'max')]
+        grouped = (table.group_by(['station_id', 'bucket'], use_threads=False)
+                   .aggregate(aggregations)
+                   .sort_by([('station_id', 'ascending'), ('bucket', 'ascending')]))
+
+        values = {name: grouped.column(name).to_pylist() for name in grouped.column_names}
+        rows = []
+        for i in range(grouped.num_rows):
+            triples = [(values[f'{metric}_mean'][i], values[f'{metric}_min'][i], values[f'{metric}_max'][i])
+                       for metric in SENSOR_METRICS]
+            rows.append(aggregate_row(values['station_id'][i], values['bucket'][i],
+                                      values['timestamp_count'][i], triples))
+        return rows
+
+    @contextmanager
+    def _writer_lock(self, blocking=True):
+        """Hold the directory's writer lock; yields False when not blocking and another writer has it."""
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, path, table):
+        """Write a segment atomically, sorted and with its footer metadata."""
+        table = table.sort_by([('station_id', 'ascending'), ('timestamp', 'ascending')])
+        metadata = {'rows': str(table.num_rows)}
+        if table.num_rows:
+            bounds = pc.min_max(table.column('timestamp').cast(pyarrow.int64()))
+            metadata.update(
+                min_time=str(bounds['min'].as_py()),
+                max_time=str(bounds['max'].as_py()),
+                stations=','.join(str(value) for value in pc.unique(table.column('station_id')).to_pylist()),
+            )
+        else:
+            metadata.update(stations='')
+        temporary = path + '.tmp'
+        pq.write_table(table.replace_schema_metadata(metadata), temporary, row_group_size=ROW_GROUP_SIZE)
+        os.replace(temporary, path)
+
+    def sync(self, force=False):
+        """Cut full segments from rows newer than the last one; force also writes a partial one.
+
+        Returns the number of rows copied. Skips the work, without waiting,
+        when another worker is already writing segments.
+        """
+        if not force:
+            # One primary key lookup rules out most calls; ids have gaps, so the probe below still decides
+            last_id = db.session.execute(select(func.max(SensorData.id))).scalar()
+            db.session.commit()
+            if last_id is None or last_id - self.covered_id() < self.segment_rows:
+                return 0
+
+        copied = 0
+        with self._writer_lock(blocking=force) as locked:
+            if not locked:
+                return 0
+            while True:
+                covered = self.covered_id()
+                if not force:
+                    # Cheap primary key probe before reading a segment's worth of rows
+                    full = db.session.execute(select(SensorData.id)
+                                              .where(SensorData.id > covered)
+                                              .order_by(SensorData.id)
+                                              .offset(self.segment_rows - 1)
+                                              .limit(1)).first()
+                    if full is None:
+                        db.session.commit()
+                        return copied
+                rows = db.session.execute(select(*SENSOR_DATA_COLUMNS)
+                                          .where(SensorData.id > covered)
+                                          .order_by(SensorData.id)
+                                          .limit(self.segment_rows)).all()
+                db.session.commit()
+                if not rows or (len(rows) < self.segment_rows and not force):
+                    return copied
+                last_id = max(row.id for row in rows)
+                path = os.path.join(self.directory, f'segment_{covered + 1:012d}_{last_id:012d}.parquet')
+                self._write(path, rows_to_table(rows))
+                copied += len(rows)
+
+    def _rewrite(self, segments, transform):
+        """Replace each segment's table with transform(table); empty segments are removed."""
+        for segment in segments:
+            table = transform(pq.read_table(segment.path))
+            if table.num_rows:
+                self._write(segment.path, table)
+            else:
+                os.remove(segment.path)
+
+    def delete_ids(self, ids):
+        ids = sorted(ids)
+        if not ids:
+            return
+        id_values = pyarrow.array(ids, type=pyarrow.int64())
+        with self._writer_lock():
+            affected = [segment for segment in self.segments()
+                        if any(segment.first_id <= value <= segment.last_id for value in ids)]
+            self._rewrite(affected, lambda table: table.filter(pc.invert(pc.is_in(table.column('id'), id_values))))
+
+    def delete_older_than(self, cutoff):
+        """Drop rows older than cutoff from the segments; None drops every segment."""
+        with self._writer_lock():
+            segments = self.segments()
+            if cutoff is None:
+                for segment in segments:
+                    os.remove(segment.path)
+                return
+            cutoff_us = epoch_us(cutoff)
+            boundary = pyarrow.scalar(cutoff_us, type=TIMESTAMP)
+            affected = [segment for segment in segments if segment.rows and segment.min_time < cutoff_us]
+            self._rewrite(affected, lambda table: table.filter(pc.greater_equal(table.column('timestamp'), boundary)))
+
+    def clear_metric(self, metric, cutoff):
+        """Null out one metric in segment rows older than cutoff."""
+        cutoff_us = epoch_us(cutoff)
+        boundary = pyarrow.scalar(cutoff_us, type=TIMESTAMP)
+
+        def clear(table):
+            column = table.column(metric)
+            cleared = pc.if_else(pc.less(table.column('timestamp'), boundary),
+                                 pyarrow.scalar(None, type=column.type), column)
+            return table.set_column(table.schema.get_field_index(metric), metric, cleared)
+
+        with self._writer_lock():
+            self._rewrite([segment for segment in self.segments() if segment.rows and segment.min_time < cutoff_us],
+                          clear)
+
+    def stats(self):
+        segments = self.segments()
+        return {
+            'backend': self.name,
+            'segments': len(segments),
+            'rows': sum(segment.rows for segment in segments),
+            'covered_id': self.covered_id(segments),
+            'bytes': sum(os.path.getsize(segment.path) for segment in segments if os.path.exists(segment.path)),
+        }
@@ -0,0 +1,59 @@
+"""Opt-in cProfile dumps of individual requests.
+
+With PROFILE_ON_DEMAND = True any request can be profiled by adding
+profile=1 to its query string; with PROFILE_SAMPLE_EVERY = N every Nth
+request of a worker is profiled as well. Both are off by default. Each
+profile is written as a pstats file to PROFILE_DIR, named after the
+endpoint, which `python -m pstats`, snakeviz or flameprof (for a flame
+graph) can open. Only the newest PROFILE_MAX_FILES files are kept.
+"""
+import cProfile
+import itertools
+import os
+import re
+from datetime import datetime, UTC
+from flask import g, request
+
+def profile_path(profile_dir, endpoint):
+    stamp = datetime.now(UTC).strftime('%Y%m%dT%H%M%S%f')
+    safe_endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint or 'unmatched')
+    return os.path.join(profile_dir, f'{safe_endpoint}-{stamp}-{os.getpid()}.prof')
+
+def prune_profiles(profile_dir, max_files):
+    """Remove the oldest .prof files beyond max_files."""
+    entries = [entry for entry in os.scandir(profile_dir) if entry.name.endswith('.prof')]
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # Pruned by another worker
+
+def init_profiling(app):
+    sample_every = app.config['PROFILE_SAMPLE_EVERY']
+    on_demand = app.config['PROFILE_ON_DEMAND']
+    if not sample_every and not on_demand:
+        return
+    counter = itertools.count(1)
+
+    @app.before_request
+    def start_profiler():
+        sampled = sample_every and next(counter) % sample_every == 0
+        if sampled or (on_demand and request.args.get('profile') == '1'):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def dump_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        path = profile_path(app.config['PROFILE_DIR'], request.endpoint)
+        profiler.dump_stats(path)
+        prune_profiles(app.config['PROFILE_DIR'], app.config['PROFILE_MAX_FILES'])
+        response.headers['X-Profile'] = os.path.basename(path)
+        return response
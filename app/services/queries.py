@@ -0,0 +1,134 @@
+from datetime import datetime, UTC
+from sqlalchemy import BigInteger, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS as METRICS
+
+# Timestamps per IN list, well under SQLite's bound parameter limit
+KEY_LOOKUP_BATCH = 500
+
+class epoch_seconds(FunctionElement):
+    """Whole seconds since the Unix epoch for a UTC timestamp column."""
+    type = BigInteger()
+    inherit_cache = True
+
+@compiles(epoch_seconds)
+def _compile_epoch_seconds(element, compiler, **kw):
+    return 'CAST(EXTRACT(EPOCH FROM %s) AS BIGINT)' % compiler.process(element.clauses, **kw)
+
+@compiles(epoch_seconds, 'sqlite')
+def _compile_epoch_seconds_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%%s', %s) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+class unindexed(FunctionElement):
+    """A column the SQLite planner must not use an index for, so it picks another one."""
+    inherit_cache = True
+
+    def __init__(self, column):
+        super().__init__(column)
+        self.type = column.type
+
+@compiles(unindexed)
+def _compile_unindexed(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+@compiles(unindexed, 'sqlite')
+def _compile_unindexed_sqlite(element, compiler, **kw):
+    # Unary plus is a no-op on any value but hides the column from index selection
+    return '+%s' % compiler.process(element.clauses, **kw)
+
+def sensor_data_window_select(columns, station_ids, since, after_id=None):
+    """Select columns for readings since the given time.
+
+    station_ids is a list of station ids, or None for all stations. Rows are
+    ordered by station and then timestamp so the composite index serves the
+    ordering without a sort. With after_id only rows with a larger id are
+    selected, for clients polling for deltas. The delta filters on the id
+    alone: rows committed late (other workers, the write queue, backfills)
+    can carry an older timestamp than the cursor row and must still be
+    returned. The (station_id, id) index keeps it to the new rows.
+    """
+    stmt = select(*columns)
+    if station_ids is not None:
+        stmt = stmt.where(SensorData.station_id.in_(station_ids))
+    if after_id is None:
+        stmt = stmt.where(SensorData.timestamp >= since)
+        return stmt.order_by(SensorData.station_id.asc(), SensorData.timestamp.asc())
+
+    # Without statistics SQLite would rather walk the whole window in timestamp
+    # order than sort the few new rows, so hide the timestamp index from it
+    stmt = stmt.where(SensorData.id > after_id, unindexed(SensorData.timestamp) >= since)
+    return stmt.order_by(unindexed(SensorData.station_id).asc(), SensorData.timestamp.asc())
+
+def stored_reading_keys(keys):
+    """Return which of the (station_id, timestamp) pairs in keys are already stored.
+
+    Bulk loads check incoming readings against these to skip the ones
+    already stored. Each station's timestamps are matched exactly on the
+    (station_id, timestamp) index, so only the chunk's own keys are read.
+    """
+    by_station = {}
+    for station_id, timestamp in keys:
+        by_station.setdefault(station_id, set()).add(timestamp)
+    stored = set()
+    for station_id, timestamps in by_station.items():
+        timestamps = list(timestamps)
+        for start in range(0, len(timestamps), KEY_LOOKUP_BATCH):
+            stmt = select(SensorData.timestamp).where(
+                SensorData.station_id == station_id,
+                SensorData.timestamp.in_(timestamps[start:start + KEY_LOOKUP_BATCH]))
+            stored.update((station_id, timestamp) for timestamp in db.session.scalars(stmt))
+    return stored
+
+def window_version(station_ids, since):
+    """Return (count, max id, latest timestamp) of the readings in a window.
+
+    All three come from the (station_id, timestamp) index, so this is much
+    cheaper than reading the rows. Any insert or delete in the window, or a
+    row ageing out of it, changes the result.
+    """
+    stmt = select(func.count(SensorData.id), func.max(SensorData.id), func.max(SensorData.timestamp))
+    stmt = stmt.where(SensorData.timestamp >= since)
+    if station_ids is not None:
+        stmt = stmt.where(SensorData.station_id.in_(station_ids))
+    return tuple(db.session.execute(stmt).one())
+
+def aggregate_row(station_id, bucket_start, count, values):
+    """Build an aggregate response row from (avg, min, max) triples in METRICS order."""
+    row = {
+        'station_id': station_id,
+        'timestamp': datetime.fromtimestamp(bucket_start, UTC).isoformat(),
+        'count': count
+    }
+    for metric, (avg, low, high) in zip(METRICS, values):
+        row[metric] = avg
+        row[f'{metric}_min'] = low
+        row[f'{metric}_max'] = high
+    return row
+
+def aggregate_window(station_id, since, bucket_seconds):
+    """Aggregate a station's readings into fixed time buckets in SQL.
+
+    Each bucket reports its start time, row count and the avg/min/max of
+    every metric, so charts get one point per bucket instead of every row.
+    """
+    return aggregate_stations_window([station_id], since, bucket_seconds)
+
+def aggregate_stations_window(station_ids, since, bucket_seconds):
+    """Aggregate several stations in one query; rows are ordered by station and bucket."""
+    bucket = (epoch_seconds(SensorData.timestamp) // bucket_seconds * bucket_seconds).label('bucket')
+    columns = [SensorData.station_id, bucket, func.count(SensorData.id)]
+    for metric in METRICS:
+        column = getattr(SensorData, metric)
+        columns += [func.avg(column), func.min(column), func.max(column)]
+
+    stmt = (select(*columns)
+            .where(SensorData.station_id.in_(station_ids), SensorData.timestamp >= since)
+            .group_by(SensorData.station_id, bucket)
+            .order_by(SensorData.station_id, bucket))
+
+    rows = []
+    for station_id, bucket_start, count, *values in db.session.execute(stmt):
+        triples = [values[i:i + 3] for i in range(0, len(values), 3)]
+        rows.append(aggregate_row(station_id, int(bucket_start), count, triples))
+    return rows
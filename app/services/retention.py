@@ -0,0 +1,208 @@
+"""Retention of raw readings, rollups and monthly archive partitions.
+
+Raw rows older than RETENTION_RAW_DAYS are removed once they are folded into
+the rollups, which keep the downsampled history for RETENTION_ROLLUP_DAYS
+per level. With ARCHIVE_DIR set, expired raw rows are first moved into one
+SQLite file per month, and months older than RETENTION_ARCHIVE_MONTHS are
+expired by deleting their file instead of running a large DELETE and VACUUM.
+
+Every delete runs in batches of RETENTION_BATCH_SIZE rows with a commit in
+between, so ingest never waits long for the write lock.
+"""
+import math
+import os
+import re
+from datetime import datetime, timedelta, UTC
+from flask import current_app
+from sqlalchemy import create_engine, delete, insert, select, tuple_, update
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS
+from ..models.rollups import SensorData1m, SensorData1h, SensorData1d
+from .cache import get_cache
+from .rollups import compact_rollups, rebuild_rollup_buckets
+from .latest import rebuild_station_latest
+from .storage import get_storage
+from .serialization import SENSOR_DATA_COLUMNS, SENSOR_DATA_FIELDS
+
+ROLLUP_LEVELS = {'1m': SensorData1m, '1h': SensorData1h, '1d': SensorData1d}
+ARCHIVE_FILE = re.compile(r'^sensor_data_(\d{4})_(\d{2})\.db$')
+
+def archive_path(archive_dir, year, month):
+    return os.path.join(archive_dir, f'sensor_data_{year:04d}_{month:02d}.db')
+
+def _archive_rows(archive_dir, rows, engines):
+    """Copy rows into their month's archive file; re-copying a row is a no-op."""
+    by_month = {}
+    for row in rows:
+        by_month.setdefault((row['timestamp'].year, row['timestamp'].month), []).append(row)
+    for (year, month), month_rows in by_month.items():
+        path = archive_path(archive_dir, year, month)
+        engine = engines.get(path)
+        if engine is None:
+            engine = engines[path] = create_engine(f'sqlite:///{path}')
+            SensorData.__table__.create(engine, checkfirst=True)
+        with engine.begin() as connection:
+            connection.execute(insert(SensorData.__table__).prefix_with('OR IGNORE'), month_rows)
+
+def expire_raw(cutoff, batch_size, archive_dir=None):
+    """Delete (or archive, then delete) raw rows older than cutoff.
+
+    A cutoff of None removes every row. Backfilled and imported rows get
+    new ids for old timestamps, so expired rows can sit anywhere in id
+    order; each batch continues after the last id removed, which reads
+    every row at most once. Returns the number of rows removed.
+    """
+    removed = 0
+    last_id = 0
+    engines = {}
+    try:
+        while True:
+            stmt = (select(*SENSOR_DATA_COLUMNS).where(SensorData.id > last_id)
+                    .order_by(SensorData.id).limit(batch_size))
+            if cutoff is not None:
+                stmt = stmt.where(SensorData.timestamp < cutoff)
+            rows = [dict(zip(SENSOR_DATA_FIELDS, row)) for row in db.session.execute(stmt)]
+            if not rows:
+                db.session.commit()
+                return removed
+            if archive_dir is not None:
+                _archive_rows(archive_dir, rows, engines)
+            db.session.execute(delete(SensorData).where(SensorData.id.in_([row['id'] for row in rows])))
+            db.session.commit()
+            removed += len(rows)
+            last_id = rows[-1]['id']
+    finally:
+        for engine in engines.values():
+            engine.dispose()
+
+def clear_metric(metric, cutoff, batch_size):
+    """Null out one metric in raw rows older than cutoff; returns the rows changed."""
+    column = getattr(SensorData, metric)
+    changed = 0
+    while True:
+        ids = db.session.scalars(select(SensorData.id)
+                                 .where(SensorData.timestamp < cutoff, column.is_not(None))
+                                 .order_by(SensorData.id)
+                                 .limit(batch_size)).all()
+        if not ids:
+            db.session.commit()
+            return changed
+        db.session.execute(update(SensorData).where(SensorData.id.in_(ids)).values({metric: None}),
+                           execution_options={'synchronize_session': False})
+        db.session.commit()
+        changed += len(ids)
+
+def expire_rollups(model, cutoff, batch_size):
+    """Delete rollup buckets that start before cutoff (every bucket for None); returns the rows removed."""
+    removed = 0
+    while True:
+        stmt = select(model.station_id, model.bucket_start).limit(batch_size)
+        if cutoff is not None:
+            stmt = stmt.where(model.bucket_start < int(cutoff.timestamp()))
+        keys = db.session.execute(stmt).all()
+        if not keys:
+            db.session.commit()
+            return removed
+        db.session.execute(delete(model).where(
+            tuple_(model.station_id, model.bucket_start).in_([tuple(key) for key in keys])))
+        db.session.commit()
+        removed += len(keys)
+
+def expire_archives(archive_dir, months, now):
+    """Delete archive files outside the newest `months` months, counting the current one."""
+    if not os.path.isdir(archive_dir):
+        return []
+    oldest_kept = now.year * 12 + now.month - months
+    dropped = []
+    for name in sorted(os.listdir(archive_dir)):
+        match = ARCHIVE_FILE.match(name)
+        if match and int(match.group(1)) * 12 + int(match.group(2)) - 1 < oldest_kept:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(os.path.join(archive_dir, name + suffix)):
+                    os.remove(os.path.join(archive_dir, name + suffix))
+            dropped.append(name)
+    return dropped
+
+def apply_retention(now=None):
+    """Apply every configured retention policy and return what was removed."""
+    config = current_app.config
+    now = now or datetime.now(UTC)
+    batch_size = config['RETENTION_BATCH_SIZE']
+    summary = {'raw': 0, 'metrics': {}, 'rollups': {}, 'archives': []}
+
+    for metric, days in config['RETENTION_METRIC_DAYS'].items():
+        if metric not in SENSOR_METRICS:
+            raise ValueError(f'Unknown metric in RETENTION_METRIC_DAYS: {metric}')
+        cutoff = now - timedelta(days=days)
+        summary['metrics'][metric] = clear_metric(metric, cutoff, batch_size)
+        get_storage().clear_metric(metric, cutoff)
+
+    if config['RETENTION_RAW_DAYS'] is not None:
+        # Fold everything into the rollups first so deleting raw rows only downsamples
+        if config['ROLLUPS_ENABLED']:
+            while compact_rollups(config['ROLLUP_COMPACT_BATCH']):
+                pass
+        archive_dir = config['ARCHIVE_DIR']
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        cutoff = now - timedelta(days=config['RETENTION_RAW_DAYS'])
+        summary['raw'] = expire_raw(cutoff, batch_size, archive_dir)
+        get_storage().delete_older_than(cutoff)
+
+    for level, days in config['RETENTION_ROLLUP_DAYS'].items():
+        if days is not None:
+            summary['rollups'][level] = expire_rollups(ROLLUP_LEVELS[level], now - timedelta(days=days),
+                                                       batch_size)
+
+    if config['ARCHIVE_DIR'] and config['RETENTION_ARCHIVE_MONTHS'] is not None:
+        summary['archives'] = expire_archives(config['ARCHIVE_DIR'], config['RETENTION_ARCHIVE_MONTHS'], now)
+
+    get_cache().clear()
+    return summary
+
+def delete_older_than(cutoff):
+    """Delete raw rows and rollup buckets older than cutoff in batches; returns raw rows removed.
+
+    Buckets spanning the cutoff are rebuilt from the raw rows that remain.
+    A cutoff of None deletes everything.
+    """
+    batch_size = current_app.config['RETENTION_BATCH_SIZE']
+    removed = expire_raw(cutoff, batch_size)
+    get_storage().delete_older_than(cutoff)
+    for model in ROLLUP_LEVELS.values():
+        # Only buckets that end before the cutoff are entirely stale
+        bucket_cutoff = cutoff - timedelta(seconds=model.bucket_seconds) if cutoff is not None else None
+        expire_rollups(model, bucket_cutoff, batch_size)
+    if cutoff is not None:
+        # The last second a deleted row could fall in picks the boundary bucket at every level
+        second = math.ceil(cutoff.timestamp()) - 1
+        stations = set()
+        for model in ROLLUP_LEVELS.values():
+            stations.update(db.session.scalars(select(model.station_id).distinct().where(
+                model.bucket_start == second // model.bucket_seconds * model.bucket_seconds)))
+        rebuild_rollup_buckets((station_id, second) for station_id in stations)
+    rebuild_station_latest()
+    db.session.commit()
+    get_cache().clear()
+    return removed
+
+def delete_all():
+    """Delete every raw row and rollup bucket in batches; returns raw rows removed."""
+    return delete_older_than(None)
+
+def delete_ids(ids):
+    """Delete specific raw rows and rebuild the rollup buckets they were part of."""
+    rows = db.session.execute(select(SensorData.station_id, SensorData.timestamp)
+                              .where(SensorData.id.in_(ids))).all()
+    if not rows:
+        return 0
+    try:
+        db.session.execute(delete(SensorData).where(SensorData.id.in_(ids)))
+        rebuild_rollup_buckets((station_id, int(timestamp.timestamp())) for station_id, timestamp in rows)
+        rebuild_station_latest({station_id for station_id, _ in rows})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    get_storage().delete_ids(ids)
+    get_cache().invalidate_stations({station_id for station_id, _ in rows})
+    return len(rows)
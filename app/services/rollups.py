@@ -0,0 +1,244 @@
+import math
+from datetime import datetime, timedelta, UTC
+from itertools import chain
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from ..models.sensor_data import db, SensorData, SENSOR_METRICS
+from ..models.rollups import ROLLUP_MODELS, RollupWatermark
+from .queries import epoch_seconds, aggregate_row
+
+WATERMARK_NAME = 'sensor_data'
+
+def get_watermark(name=WATERMARK_NAME):
+    """Return the highest sensor_data id the named consumer has processed."""
+    watermark = db.session.get(RollupWatermark, name)
+    if watermark is None:
+        try:
+            with db.session.begin_nested():
+                watermark = RollupWatermark(name=name, last_id=0)
+                db.session.add(watermark)
+        except IntegrityError:
+            # Another worker created it first
+            watermark = db.session.get(RollupWatermark, name)
+    return watermark.last_id
+
+def advance_watermark(name, first_id, last_id):
+    """Compare-and-set the watermark from first_id to last_id; False if another worker moved it."""
+    return bool(db.session.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == name, RollupWatermark.last_id == first_id)
+        .values(last_id=last_id)
+    ).rowcount)
+
+def _aggregate_buckets(model, *conditions):
+    """Aggregate the raw rows matching conditions into the model's buckets."""
+    bucket = (epoch_seconds(SensorData.timestamp) // model.bucket_seconds * model.bucket_seconds).label('bucket')
+    columns = [SensorData.station_id, bucket, func.count(SensorData.id)]
+    for metric in SENSOR_METRICS:
+        column = getattr(SensorData, metric)
+        columns += [func.sum(column), func.count(column), func.min(column), func.max(column)]
+
+    stmt = (select(*columns)
+            .where(*conditions)
+            .group_by(SensorData.station_id, bucket))
+    return db.session.execute(stmt).all()
+
+def _new_buckets(model, first_id, last_id):
+    """Aggregate raw rows in the id range (first_id, last_id] into the model's buckets."""
+    return _aggregate_buckets(model, SensorData.id > first_id, SensorData.id <= last_id)
+
+def _merge_min(current, new):
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return min(current, new)
+
+def _merge_max(current, new):
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return max(current, new)
+
+def _merge_buckets(model, buckets):
+    """Fold freshly aggregated buckets into existing rollup rows."""
+    if not buckets:
+        return
+
+    # Load every rollup row the new buckets can touch in one query
+    starts = [int(b[1]) for b in buckets]
+    existing = {
+        (rollup.station_id, rollup.bucket_start): rollup
+        for rollup in db.session.scalars(select(model).where(
+            model.station_id.in_({b[0] for b in buckets}),
+            model.bucket_start.between(min(starts), max(starts))
+        ))
+    }
+
+    new_rows = []
+    for station_id, bucket_start, count, *values in buckets:
+        bucket_start = int(bucket_start)
+        rollup = existing.get((station_id, bucket_start))
+        if rollup is None:
+            # New buckets (all of them after a backfill of history) skip the ORM's per-attribute bookkeeping
+            row = {'station_id': station_id, 'bucket_start': bucket_start, 'count': count}
+            for i, metric in enumerate(SENSOR_METRICS):
+                total, non_null, low, high = values[i * 4:i * 4 + 4]
+                row.update({f'{metric}_sum': total, f'{metric}_count': non_null, f'{metric}_min': low,
+                            f'{metric}_max': high} if non_null else
+                           dict.fromkeys((f'{metric}_sum', f'{metric}_count', f'{metric}_min', f'{metric}_max')))
+            new_rows.append(row)
+            continue
+        rollup.count += count
+
+        for i, metric in enumerate(SENSOR_METRICS):
+            total, non_null, low, high = values[i * 4:i * 4 + 4]
+            if not non_null:
+                continue
+            setattr(rollup, f'{metric}_sum', (getattr(rollup, f'{metric}_sum') or 0.0) + total)
+            setattr(rollup, f'{metric}_count', (getattr(rollup, f'{metric}_count') or 0) + non_null)
+            setattr(rollup, f'{metric}_min', _merge_min(getattr(rollup, f'{metric}_min'), low))
+            setattr(rollup, f'{metric}_max', _merge_max(getattr(rollup, f'{metric}_max'), high))
+
+    if new_rows:
+        db.session.execute(insert(model), new_rows)
+
+def compact_rollups(batch_size=50000):
+    """Fold raw rows newer than the watermark into every rollup level.
+
+    At most batch_size raw rows are processed per call. The watermark is
+    advanced with a compare-and-set in the same transaction as the rollup
+    updates, so concurrent compactors never fold the same rows twice.
+    Returns the number of raw rows processed.
+    """
+    try:
+        first_id = get_watermark()
+        max_id = db.session.execute(
+            select(func.max(SensorData.id)).where(SensorData.id > first_id)
+        ).scalar()
+        if max_id is None:
+            db.session.commit()
+            return 0
+        last_id = min(max_id, first_id + batch_size)
+
+        for model in ROLLUP_MODELS:
+            _merge_buckets(model, _new_buckets(model, first_id, last_id))
+
+        if not advance_watermark(WATERMARK_NAME, first_id, last_id):
+            # Another worker compacted this range first
+            db.session.rollback()
+            return 0
+
+        db.session.commit()
+        return last_id - first_id
+    except IntegrityError:
+        # Another worker inserted the same new buckets while folding this range
+        db.session.rollback()
+        return 0
+    except Exception:
+        db.session.rollback()
+        raise
+
+def rebuild_rollup_buckets(keys):
+    """Recompute the rollup rows covering (station_id, epoch seconds) pairs from raw rows.
+
+    Used after raw rows were deleted out of order, since sums can be
+    corrected but mins and maxes cannot. Only rows at or below the
+    watermark are folded in; newer ones are left to the next compaction.
+    Does not commit.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    watermark = get_watermark()
+    for model in ROLLUP_MODELS:
+        size = model.bucket_seconds
+        for station_id, bucket_start in {(sid, second // size * size) for sid, second in keys}:
+            db.session.execute(delete(model).where(
+                model.station_id == station_id, model.bucket_start == bucket_start))
+            start = datetime.fromtimestamp(bucket_start, UTC)
+            _merge_buckets(model, _aggregate_buckets(
+                model,
+                SensorData.station_id == station_id,
+                SensorData.timestamp >= start,
+                SensorData.timestamp < start + timedelta(seconds=size),
+                SensorData.id <= watermark
+            ))
+
+def rollups_current():
+    """Check whether every raw row has been folded into the rollups."""
+    watermark = db.session.get(RollupWatermark, WATERMARK_NAME)
+    max_id = db.session.execute(select(func.max(SensorData.id))).scalar()
+    if max_id is None:
+        return True
+    return watermark is not None and watermark.last_id >= max_id
+
+def rollup_for_bucket(bucket_seconds):
+    """Pick the coarsest rollup model whose bucket size divides bucket_seconds."""
+    for model in reversed(ROLLUP_MODELS):
+        if bucket_seconds % model.bucket_seconds == 0:
+            return model
+    return None
+
+def aggregate_rollup_window(model, station_id, since, bucket_seconds):
+    """Re-aggregate a rollup level into the requested buckets.
+
+    Returns the same rows as queries.aggregate_window.
+    """
+    return aggregate_rollup_stations_window(model, [station_id], since, bucket_seconds)
+
+def aggregate_rollup_stations_window(model, station_ids, since, bucket_seconds):
+    """Re-aggregate a rollup level for several stations; rows are ordered by station and bucket.
+
+    Only rollup buckets lying entirely inside the window are read. Rows in
+    the partial bucket the window starts in are aggregated from sensor_data,
+    so readings before `since` never leak into the first bucket.
+    """
+    first_full = math.ceil(since.timestamp() / model.bucket_seconds) * model.bucket_seconds
+    partial = []
+    if first_full > since.timestamp():
+        partial = _aggregate_buckets(model, SensorData.station_id.in_(station_ids), SensorData.timestamp >= since,
+                                     SensorData.timestamp < datetime.fromtimestamp(first_full, UTC))
+
+    bucket = (model.bucket_start // bucket_seconds * bucket_seconds).label('bucket')
+    columns = [model.station_id, bucket, func.sum(model.count)]
+    for metric in SENSOR_METRICS:
+        columns += [
+            func.sum(getattr(model, f'{metric}_sum')),
+            func.sum(getattr(model, f'{metric}_count')),
+            func.min(getattr(model, f'{metric}_min')),
+            func.max(getattr(model, f'{metric}_max')),
+        ]
+
+    stmt = (select(*columns)
+            .where(model.station_id.in_(station_ids), model.bucket_start >= first_full)
+            .group_by(model.station_id, bucket))
+
+    # The partial bucket lies inside one requested bucket, which may also hold full rollup buckets
+    buckets = {}
+    for station_id, bucket_start, count, *values in chain(partial, db.session.execute(stmt)):
+        key = (station_id, int(bucket_start) // bucket_seconds * bucket_seconds)
+        merged = buckets.get(key)
+        if merged is None:
+            buckets[key] = [int(count), *values]
+            continue
+        merged[0] += int(count)
+        for i in range(len(SENSOR_METRICS)):
+            total, non_null, low, high = values[i * 4:i * 4 + 4]
+            if not non_null:
+                continue
+            j = 1 + i * 4
+            merged[j] = (merged[j] or 0.0) + total
+            merged[j + 1] = (merged[j + 1] or 0) + non_null
+            merged[j + 2] = _merge_min(merged[j + 2], low)
+            merged[j + 3] = _merge_max(merged[j + 3], high)
+
+    rows = []
+    for (station_id, bucket_start), (count, *values) in sorted(buckets.items()):
+        triples = []
+        for i in range(len(SENSOR_METRICS)):
+            total, non_null, low, high = values[i * 4:i * 4 + 4]
+            triples.append((total / non_null if non_null else None, low, high))
+        rows.append(aggregate_row(station_id, bucket_start, count, triples))
+    return rows
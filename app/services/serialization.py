@@ -0,0 +1,169 @@
+import importlib.util
+import io
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime
+from flask import current_app, jsonify, Response
+from ..models.sensor_data import SensorData, SENSOR_METRICS
+from .metrics import timed_serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyarrow takes longer to import than the rest of the app, so only Arrow responses load it
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+PACKED_MIMETYPE = 'application/octet-stream'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Column order for columnar responses of raw rows
+COLUMNAR_FIELDS = ['id', 'station_id', 'timestamp', 'rtc_time'] + SENSOR_METRICS + ['bme_iaq_accuracy']
+# Columns packed as int64; everything else is float64 with NaN for missing values
+INTEGER_COLUMNS = {'id', 'station_id', 'timestamp', 'count'}
+
+# SensorDataSchema fields in the sorted key order Flask's JSON provider emits
+SENSOR_DATA_FIELDS = ['air_quality', 'bme_iaq_accuracy', 'co2e', 'fill_level', 'humidity',
+                      'id', 'rtc_time', 'station_id', 'temperature', 'timestamp', 'uv_index']
+SENSOR_DATA_COLUMNS = [getattr(SensorData, name) for name in SENSOR_DATA_FIELDS]
+
+_compact_encoder = json.JSONEncoder(separators=(',', ':'))
+
+@timed_serialization
+def sensor_rows_to_dicts(rows):
+    """Turn column tuples selected with SENSOR_DATA_COLUMNS into SensorDataSchema-shaped dicts."""
+    return [
+        {'air_quality': air_quality, 'bme_iaq_accuracy': bme_iaq_accuracy, 'co2e': co2e,
+         'fill_level': fill_level, 'humidity': humidity, 'id': id_,
+         'rtc_time': rtc_time.isoformat() if rtc_time is not None else None,
+         'station_id': station_id, 'temperature': temperature,
+         'timestamp': timestamp.isoformat() if timestamp is not None else None,
+         'uv_index': uv_index}
+        for (air_quality, bme_iaq_accuracy, co2e, fill_level, humidity, id_,
+             rtc_time, station_id, temperature, timestamp, uv_index) in rows
+    ]
+
+def sensor_rows_response(rows):
+    """Build the JSON response for raw sensor rows without going through marshmallow.
+
+    With the default 'json' encoder the body is byte-identical to jsonify()
+    of SensorDataSchema(many=True).dump(). The optional 'orjson' encoder is
+    faster but formats float exponents and NaN differently.
+    """
+    return json_response(sensor_rows_to_dicts(rows))
+
+@timed_serialization
+def json_response(data):
+    """Encode data compactly like jsonify() but without re-sorting keys.
+
+    Callers build dicts in the key order they want emitted.
+    """
+    provider = current_app.json
+    if provider.compact is False or (provider.compact is None and current_app.debug):
+        # Pretty-printed debug output is not a hot path
+        return jsonify(data)
+
+    if current_app.config['SENSOR_DATA_JSON_ENCODER'] == 'orjson' and orjson is not None:
+        body = orjson.dumps(data) + b'\n'
+    else:
+        body = (_compact_encoder.encode(data) + '\n').encode('utf-8')
+    return Response(body, mimetype=provider.mimetype)
+
+def group_by_station(rows, station_ids, key):
+    """Split station-ordered rows into {str(station_id): rows} in a single pass.
+
+    Every requested station gets an entry, empty if it has no rows.
+    """
+    grouped = {str(station_id): [] for station_id in station_ids}
+    for row in rows:
+        grouped.setdefault(str(key(row)), []).append(row)
+    return grouped
+
+def epoch_ms(value):
+    """Milliseconds since the Unix epoch for a timezone-aware datetime."""
+    return round(value.timestamp() * 1000)
+
+@timed_serialization
+def sensor_rows_to_columns(rows):
+    """Transpose column tuples selected with SENSOR_DATA_COLUMNS into named columns.
+
+    Timestamps become epoch milliseconds so clients can use them without
+    parsing dates.
+    """
+    columns = dict(zip(SENSOR_DATA_FIELDS, zip(*rows))) if rows else {name: () for name in SENSOR_DATA_FIELDS}
+    columns['timestamp'] = [epoch_ms(value) for value in columns['timestamp']]
+    columns['rtc_time'] = [epoch_ms(value) if value is not None else None for value in columns['rtc_time']]
+    return {name: list(columns[name]) for name in COLUMNAR_FIELDS}
+
+@timed_serialization
+def dict_rows_to_columns(rows):
+    """Transpose aggregate rows into named columns with epoch millisecond timestamps."""
+    if not rows:
+        return {}
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    columns['timestamp'] = [epoch_ms(datetime.fromisoformat(value)) for value in columns['timestamp']]
+    return columns
+
+def _packed_array(name, values):
+    if name in INTEGER_COLUMNS:
+        packed = array('q', values)
+    else:
+        packed = array('d', [float('nan') if value is None else value for value in values])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed
+
+@timed_serialization
+def packed_response(columns):
+    """Encode columns as little-endian packed arrays behind a small JSON header.
+
+    Layout: a uint32 header length, the UTF-8 JSON header listing rows and
+    each column's name and dtype ('<i8' or '<f8'), then the column arrays
+    back to back in header order.
+    """
+    rows = len(next(iter(columns.values()), []))
+    arrays = [(name, _packed_array(name, values)) for name, values in columns.items()]
+    header = json.dumps({
+        'rows': rows,
+        'columns': [{'name': name, 'dtype': '<i8' if packed.typecode == 'q' else '<f8'}
+                    for name, packed in arrays]
+    }, separators=(',', ':')).encode('utf-8')
+
+    body = io.BytesIO()
+    body.write(struct.pack('<I', len(header)))
+    body.write(header)
+    for _, packed in arrays:
+        body.write(packed.tobytes())
+    return Response(body.getvalue(), mimetype=PACKED_MIMETYPE)
+
+@timed_serialization
+def arrow_response(columns):
+    """Encode columns as an Arrow IPC stream; requires pyarrow."""
+    import pyarrow
+    import pyarrow.ipc
+
+    fields = {}
+    for name, values in columns.items():
+        if name in ('timestamp', 'rtc_time'):
+            fields[name] = pyarrow.array(values, type=pyarrow.timestamp('ms', tz='UTC'))
+        elif name in INTEGER_COLUMNS:
+            fields[name] = pyarrow.array(values, type=pyarrow.int64())
+        else:
+            fields[name] = pyarrow.array(values, type=pyarrow.float64())
+    table = pyarrow.table(fields)
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), mimetype=ARROW_MIMETYPE)
+
+def columns_response(columns, response_format):
+    """Build a columnar response in the negotiated format ('columnar', 'packed' or 'arrow')."""
+    if response_format == 'packed':
+        return packed_response(columns)
+    if response_format == 'arrow':
+        return arrow_response(columns)
+    return jsonify(columns)
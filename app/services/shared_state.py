@@ -0,0 +1,121 @@
+"""Cross-worker shared state backed by a local SQLite file in WAL mode.
+
+gunicorn forks several workers, so in-process state such as rate limit
+counters or cached responses is duplicated per worker. SHARED_STATE_URL
+selects where that state lives instead:
+
+- ``memory://`` keeps it per process (the old behaviour),
+- ``sqlite:///path/to/file.db`` shares it through a local SQLite file,
+- ``redis://host:port/db`` uses Redis, which requires the redis package.
+"""
+import os
+import sqlite3
+import threading
+import time
+from limits.storage import Storage
+
+def sqlite_path(url):
+    """Return the file path of a sqlite:/// URL."""
+    return url[len('sqlite:///'):]
+
+class SQLiteStore:
+    """Lazily opened SQLite connection per thread and process.
+
+    Connections use WAL so readers never block the single writer, and a
+    busy timeout instead of failing immediately when another worker writes.
+    """
+    def __init__(self, path, schema=(), busy_timeout=5000, synchronous='NORMAL'):
+        self.path = path
+        self.schema = schema
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            # Never reuse a connection inherited from the parent process
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(f'PRAGMA synchronous={self.synchronous}')
+            connection.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+            for statement in self.schema:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def transaction(self):
+        """Context manager running statements in a write transaction taken up front."""
+        return _ImmediateTransaction(self.connection)
+
+class _ImmediateTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        # BEGIN IMMEDIATE takes the write lock now, so read-modify-write is atomic
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+class SQLiteLimiterStorage(Storage):
+    """Fixed-window rate limit storage for Flask-Limiter shared by all workers."""
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.store = SQLiteStore(sqlite_path(uri), schema=(
+            'CREATE TABLE IF NOT EXISTS rate_limits '
+            '(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)',
+        ))
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1, elastic_expiry=False):
+        now = time.time()
+        with self.store.transaction() as connection:
+            row = connection.execute(
+                'SELECT count, expires FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] <= now:
+                # Starting a new window is rare enough to also sweep expired keys
+                connection.execute('DELETE FROM rate_limits WHERE expires <= ?', (now,))
+                count, expires = amount, now + expiry
+            else:
+                count = row[0] + amount
+                expires = now + expiry if elastic_expiry else row[1]
+            connection.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, count, expires) VALUES (?, ?, ?)',
+                (key, count, expires))
+        return count
+
+    def get(self, key):
+        row = self.store.connection.execute(
+            'SELECT count FROM rate_limits WHERE key = ? AND expires > ?', (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self.store.connection.execute(
+            'SELECT expires FROM rate_limits WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self.store.connection.execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self.store.transaction() as connection:
+            return connection.execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        with self.store.transaction() as connection:
+            connection.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
@@ -0,0 +1,74 @@
+"""Storage backends serving the window reads of /api/sensor-data and /data.
+
+The database behind DATABASE_URL always holds every reading and serves
+ingest, alerts, exports and the rest of the app. STORAGE_BACKEND selects
+what answers range scans and bucketed aggregations over it:
+
+- 'sql' reads sensor_data and the rollups (the default),
+- 'parquet' reads a columnar copy of sensor_data kept in Parquet segment
+  files under STORAGE_DIR (see parquet_storage), plus the rows newer than
+  the last segment from sensor_data. Requires pyarrow.
+
+Backends share one interface: scan() and aggregate() for reads, sync()
+after ingest, and delete_ids(), delete_older_than() and clear_metric() so
+retention and deletes reach every copy of the data.
+"""
+import os
+from flask import current_app
+from ..models.sensor_data import db
+from .queries import sensor_data_window_select, aggregate_stations_window
+from .rollups import rollup_for_bucket, rollups_current, aggregate_rollup_stations_window
+from .serialization import SENSOR_DATA_COLUMNS, PYARROW_AVAILABLE
+
+STORAGE_BACKENDS = ('sql', 'parquet')
+
+class SQLStorage:
+    """Window reads straight from the database."""
+    name = 'sql'
+
+    def scan(self, station_ids, since, after_id=None):
+        """Return SENSOR_DATA_COLUMNS tuples in the window, ordered by station and timestamp."""
+        return db.session.execute(sensor_data_window_select(SENSOR_DATA_COLUMNS, station_ids, since, after_id)).all()
+
+    def aggregate(self, station_ids, since, bucket_seconds):
+        """Aggregate from the coarsest usable rollup, or from raw rows when there is none."""
+        rollup = rollup_for_bucket(bucket_seconds) if current_app.config['ROLLUPS_ENABLED'] else None
+        # Rollups lagging behind the raw table (e.g. after a bulk load) fall back to raw aggregation
+        if rollup is not None and rollups_current():
+            return aggregate_rollup_stations_window(rollup, station_ids, since, bucket_seconds)
+        return aggregate_stations_window(station_ids, since, bucket_seconds)
+
+    def sync(self, force=False):
+        """Bring derived copies up to date with sensor_data; returns the rows copied."""
+        return 0
+
+    def delete_ids(self, ids):
+        pass
+
+    def delete_older_than(self, cutoff):
+        pass
+
+    def clear_metric(self, metric, cutoff):
+        pass
+
+    def stats(self):
+        return {'backend': self.name}
+
+def create_storage(config):
+    backend = config['STORAGE_BACKEND']
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f'Unknown STORAGE_BACKEND: {backend!r}')
+    if backend == 'parquet':
+        if not PYARROW_AVAILABLE:
+            raise ValueError("STORAGE_BACKEND = 'parquet' requires pyarrow to be installed")
+        from .parquet_storage import ParquetStorage
+
+        os.makedirs(config['STORAGE_DIR'], exist_ok=True)
+        return ParquetStorage(config['STORAGE_DIR'], segment_rows=config['STORAGE_SEGMENT_ROWS'])
+    return SQLStorage()
+
+def init_storage(app):
+    app.extensions['storage'] = create_storage(app.config)
+
+def get_storage():
+    return current_app.extensions['storage']
@@ -0,0 +1,180 @@
+"""Write-behind ingestion through a durable local queue.
+
+With INGEST_MODE = 'queued' the POST endpoints validate readings, append
+them to a SQLite queue file and answer 202 right away. One drainer per host,
+elected with an exclusive file lock, moves queued readings into sensor_data
+with one transaction per INGEST_FLUSH_ROWS readings at most every
+INGEST_FLUSH_MS milliseconds, so writers no longer compete for the database
+lock on every request.
+
+Delivery is at-least-once: a crash between committing a group and removing
+it from the queue commits that group again on restart. Readings left in the
+queue by a restart or crash are drained as soon as a worker boots (see
+resume() and gunicorn.conf.py), not only once new readings arrive.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from .shared_state import SQLiteStore
+from ..utils.errors import ServiceUnavailableError
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines run a single process anyway
+    fcntl = None
+
+# INGEST_QUEUE_DURABILITY values and the synchronous pragma of the queue file
+DURABILITY_PRAGMAS = {
+    'full': 'FULL',      # fsync before answering 202, survives power loss
+    'normal': 'NORMAL',  # survives a crashed process, may lose the last writes on power loss
+    'off': 'OFF',        # leave flushing to the OS
+}
+
+def encode_row(row):
+    return json.dumps({key: value.isoformat() if isinstance(value, datetime) else value
+                       for key, value in row.items()}, separators=(',', ':'))
+
+def decode_row(payload):
+    row = json.loads(payload)
+    for key in ('timestamp', 'rtc_time'):
+        if row.get(key) is not None:
+            row[key] = datetime.fromisoformat(row[key])
+    return row
+
+class WriteQueue:
+    """SQLite-backed queue of validated sensor rows with a single group-committing drainer."""
+
+    def __init__(self, app, path, max_depth=100000, flush_rows=500, flush_ms=200, durability='normal'):
+        if durability not in DURABILITY_PRAGMAS:
+            raise ValueError(f'INGEST_QUEUE_DURABILITY must be one of {", ".join(DURABILITY_PRAGMAS)}')
+        self.app = app
+        self.path = path
+        self.max_depth = max_depth
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self.durability = durability
+        self.store = SQLiteStore(path, schema=(
+            'CREATE TABLE IF NOT EXISTS ingest_queue (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)',
+        ), synchronous=DURABILITY_PRAGMAS[durability])
+        self.enqueued = 0
+        self.flushed = 0
+        self.last_flush_rows = 0
+        self.last_flush_ms = None
+        self._lock_file = None
+        self._drain_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def depth(self):
+        """Number of queued readings; ids are contiguous because the queue is drained in order."""
+        first, last = self.store.connection.execute('SELECT min(id), max(id) FROM ingest_queue').fetchone()
+        return 0 if first is None else last - first + 1
+
+    def enqueue(self, rows):
+        """Append validated rows, or raise ServiceUnavailableError when the queue is full."""
+        self._ensure_drainer()
+        if self.depth() + len(rows) > self.max_depth:
+            # Tell clients to come back after roughly one flush interval
+            raise ServiceUnavailableError('Ingest queue is full, retry later',
+                                          retry_after=max(1, round(self.flush_ms / 1000)))
+        with self.store.transaction() as connection:
+            connection.executemany('INSERT INTO ingest_queue (payload) VALUES (?)',
+                                   [(encode_row(row),) for row in rows])
+        self.enqueued += len(rows)
+        if len(rows) >= self.flush_rows:
+            self._wake.set()
+
+    def drain(self):
+        """Commit up to flush_rows queued readings in one transaction; returns how many."""
+        from .ingest import insert_rows  # ingest submits to this module
+
+        with self._drain_lock:
+            entries = self.store.connection.execute(
+                'SELECT id, payload FROM ingest_queue ORDER BY id LIMIT ?', (self.flush_rows,)).fetchall()
+            if not entries:
+                return 0
+
+            started = time.perf_counter()
+            with self.app.app_context():
+                insert_rows([decode_row(payload) for _, payload in entries])
+            with self.store.transaction() as connection:
+                connection.execute('DELETE FROM ingest_queue WHERE id <= ?', (entries[-1][0],))
+
+            self.flushed += len(entries)
+            self.last_flush_rows = len(entries)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+            return len(entries)
+
+    def is_drainer(self):
+        """Try to become the host's drainer; the lock is released when the process exits."""
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.path + '.lock', 'a')
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock_file.close()
+                self._lock_file = None
+                return False
+        return True
+
+    def resume(self):
+        """Start this process's drainer candidate if readings are waiting, e.g. after a restart."""
+        if self.depth():
+            self._ensure_drainer()
+
+    def _ensure_drainer(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Threads and file locks do not survive a fork, so every worker starts its own candidate
+            self._pid = os.getpid()
+            self._lock_file = None
+            threading.Thread(target=self._run, name='ingest-drainer', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_ms / 1000)
+            self._wake.clear()
+            if not self.is_drainer():
+                continue
+            try:
+                while self.drain() == self.flush_rows:
+                    pass
+            except Exception as e:
+                self.app.logger.error(f'Error draining ingest queue: {str(e)}')
+
+    def stats(self):
+        return {
+            'mode': 'queued',
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'durability': self.durability,
+            'enqueued': self.enqueued,
+            'flushed': self.flushed,
+            'last_flush_rows': self.last_flush_rows,
+            'last_flush_ms': self.last_flush_ms,
+            'drainer': self._lock_file is not None or fcntl is None,
+        }
+
+def init_write_queue(app):
+    if app.config['INGEST_MODE'] == 'queued':
+        app.extensions['write_queue'] = WriteQueue(
+            app,
+            app.config['INGEST_QUEUE_PATH'],
+            max_depth=app.config['INGEST_QUEUE_MAX_DEPTH'],
+            flush_rows=app.config['INGEST_FLUSH_ROWS'],
+            flush_ms=app.config['INGEST_FLUSH_MS'],
+            durability=app.config['INGEST_QUEUE_DURABILITY']
+        )
+    else:
+        app.extensions['write_queue'] = None
+
+def get_write_queue():
+    """Return the ingest queue, or None when readings are committed synchronously."""
+    return current_app.extensions['write_queue']
@@ -0,0 +1,81 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Pragmas applied to every new SQLite connection, keyed by their config option
+SQLITE_PRAGMAS = {
+    'SQLITE_JOURNAL_MODE': 'journal_mode',
+    'SQLITE_SYNCHRONOUS': 'synchronous',
+    'SQLITE_BUSY_TIMEOUT_MS': 'busy_timeout',
+    'SQLITE_CACHE_SIZE_KB': 'cache_size',
+    'SQLITE_MMAP_SIZE': 'mmap_size',
+}
+
+def database_uri(url, basedir):
+    """Normalize DATABASE_URL into a SQLAlchemy URI.
+
+    Relative SQLite paths are resolved against the project root rather than
+    Flask's instance folder, and the postgres:// scheme used by hosting
+    providers is mapped to postgresql://.
+    """
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    parsed = make_url(url)
+    if parsed.drivername.startswith('sqlite') and parsed.database not in (None, '', ':memory:') \
+            and not os.path.isabs(parsed.database):
+        url = parsed.set(database=os.path.join(basedir, parsed.database)).render_as_string(hide_password=False)
+    return url
+
+def is_sqlite_file(uri):
+    parsed = make_url(uri)
+    return parsed.drivername.startswith('sqlite') and parsed.database not in (None, '', ':memory:')
+
+def engine_options(config):
+    """Pool settings for SQLALCHEMY_ENGINE_OPTIONS.
+
+    File-backed SQLite and server databases get a QueuePool (SQLAlchemy's
+    default for both) sized by DB_POOL_SIZE. In-memory SQLite keeps the
+    StaticPool Flask-SQLAlchemy picks for it.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    parsed = make_url(uri)
+    if parsed.drivername.startswith('sqlite') and not is_sqlite_file(uri):
+        return {}
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+    }
+    if not parsed.drivername.startswith('sqlite'):
+        # Server connections can be dropped by the server or a proxy while idle
+        options.update(pool_pre_ping=True, pool_recycle=1800)
+    return options
+
+def sqlite_pragma_statements(config):
+    statements = []
+    for option, pragma in SQLITE_PRAGMAS.items():
+        value = config.get(option)
+        if value is None:
+            continue
+        if option == 'SQLITE_CACHE_SIZE_KB':
+            value = -int(value)  # Negative cache_size is in KiB rather than pages
+        elif option in ('SQLITE_BUSY_TIMEOUT_MS', 'SQLITE_MMAP_SIZE'):
+            value = int(value)
+        elif not str(value).isalpha():
+            raise ValueError(f'Invalid value for {option}: {value!r}')
+        statements.append(f'PRAGMA {pragma}={value}')
+    return statements
+
+def register_sqlite_pragmas(engine, config):
+    """Apply the SQLite performance profile to every connection the engine opens."""
+    if engine.dialect.name != 'sqlite':
+        return
+    statements = sqlite_pragma_statements(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
@@ -24,10 +24,22 @@ class ResourceNotFoundError(APIError):
     status_code = 404
     message = "Resource not found"
 
+class NotAcceptableError(APIError):
+    status_code = 406
+    message = "Requested response format is not available"
+
 class RateLimitError(APIError):
     status_code = 429
     message = "Too many requests"
 
+class ServiceUnavailableError(APIError):
+    status_code = 503
+    message = "Service temporarily unavailable"
+
+    def __init__(self, message=None, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 def register_error_handlers(app):
     @app.errorhandler(ValidationError)
     def handle_validation_error(error):
@@ -39,6 +51,8 @@ def register_error_handlers(app):
     def handle_api_error(error):
         response = jsonify(error.to_dict())
         response.status_code = error.status_code
+        if getattr(error, 'retry_after', None):
+            response.headers['Retry-After'] = str(error.retry_after)
         return response
 
     @app.errorhandler(HTTPException)
@@ -1,6 +1,19 @@
 from datetime import datetime
+import math
+from operator import itemgetter
+import re
 from .errors import ValidationError
 
+BUCKET_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+REQUIRED_FIELDS = ['timestamp', 'temperature', 'humidity', 'uv_index',
+                   'air_quality', 'co2e', 'fill_level', 'rtc_time',
+                   'bme_iaq_accuracy', 'station_id']
+# Numeric fields that can be NaN, in the order validate_sensor_data checks them
+FLOAT_FIELDS = ['temperature', 'humidity', 'uv_index', 'co2e', 'fill_level']
+# These fields must not be NaN
+INT_FIELDS = ['bme_iaq_accuracy', 'station_id']
+
 class DatabaseError(Exception):
     pass
 
@@ -11,18 +24,13 @@ def convert_air_quality_to_percent(score):
     return 100.0 * (1.0 - (score / 500))
 
 def validate_sensor_data(data):
-    required_fields = ['timestamp', 'temperature', 'humidity', 'uv_index', 
-                      'air_quality', 'co2e', 'fill_level', 'rtc_time', 
-                      'bme_iaq_accuracy', 'station_id']
-    
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in data:
             raise ValidationError(f"Missing required field: {field}")
     
     try:
         # Handle numeric fields that can be NaN
-        float_fields = ['temperature', 'humidity', 'uv_index', 'co2e', 'fill_level']
-        for field in float_fields:
+        for field in FLOAT_FIELDS:
             value = data[field]
             # Check if value is already NaN string
             if isinstance(value, str) and value.upper() == 'NAN':
@@ -64,5 +72,129 @@ def format_rtc_time(rtc_time_str):
         rtc_time_str = f"{formatted_date} {formatted_time}"
         
         return datetime.strptime(rtc_time_str, '%Y-%m-%d %H:%M:%S')
-    except (ValueError, IndexError) as e:
-        raise ValidationError(f"Error formatting RTC time: {str(e)}") 
\ No newline at end of file
+    except (ValueError, IndexError, AttributeError) as e:
+        raise ValidationError(f"Error formatting RTC time: {str(e)}")
+
+def _reject(errors, index, message):
+    # Keep the first error per reading, like validate_sensor_data raising on it
+    errors.setdefault(index, message)
+
+def _float_column(values, errors):
+    """Convert a whole column in one call, locating bad values only if that fails."""
+    try:
+        return list(map(float, values))
+    except (ValueError, TypeError):
+        pass
+
+    column = []
+    for index, value in enumerate(values):
+        try:
+            column.append(float(value))
+        except (ValueError, TypeError) as e:
+            _reject(errors, index, f"Invalid data type in fields: {str(e)}")
+            column.append(math.nan)
+    return column
+
+def _int_column(values, errors):
+    try:
+        return list(map(int, values))
+    except (ValueError, TypeError):
+        pass
+
+    column = []
+    for index, value in enumerate(values):
+        try:
+            column.append(int(value))
+        except (ValueError, TypeError) as e:
+            _reject(errors, index, f"Invalid data type in fields: {str(e)}")
+            column.append(0)
+    return column
+
+def _air_quality_column(scores):
+    """convert_air_quality_to_percent over a column; NaN scores stay NaN."""
+    return [-1.0 if score < 0 else 100.0 * (1.0 - (score / 500)) for score in scores]
+
+def _rtc_column(values, errors):
+    column = []
+    for index, value in enumerate(values):
+        # Canonical 'YYYY-MM-DD HH:MM:SS' strings parse directly; anything else
+        # (year 0, unpadded parts, ...) goes through format_rtc_time
+        if (type(value) is str and len(value) == 19 and value[4] == '-' and value[7] == '-'
+                and value[10] == ' ' and value[13] == ':' and value[16] == ':'):
+            try:
+                column.append(datetime.fromisoformat(value))
+                continue
+            except ValueError:
+                pass
+        try:
+            column.append(format_rtc_time(value))
+        except ValidationError as e:
+            _reject(errors, index, e.message)
+            column.append(None)
+    return column
+
+def validate_sensor_batch(readings):
+    """Validate and convert a list of readings column by column.
+
+    Accepts the same values as validate_sensor_data plus format_rtc_time and
+    produces the same per-reading errors, but converts each field across the
+    whole batch at once. Entries that are ValidationErrors, e.g. unparseable
+    NDJSON lines, are rejected with their message. Returns (columns, valid,
+    errors): a dict of converted value lists per field (rtc_time holds
+    datetimes), a list of booleans marking the valid readings and a dict
+    mapping the index of each invalid reading to its error.
+    """
+    errors = {}
+    placeholder = dict.fromkeys(REQUIRED_FIELDS, 0)
+    placeholder['rtc_time'] = '2000-01-01 00:00:00'
+    required = set(REQUIRED_FIELDS)
+
+    records = []
+    for index, reading in enumerate(readings):
+        if isinstance(reading, ValidationError):
+            _reject(errors, index, reading.message)
+        elif not isinstance(reading, dict):
+            _reject(errors, index, 'Reading must be a JSON object')
+        elif not required <= reading.keys():
+            missing = next(field for field in REQUIRED_FIELDS if field not in reading)
+            _reject(errors, index, f"Missing required field: {missing}")
+        else:
+            records.append(reading)
+            continue
+        # Rejected readings keep their slot so every column stays aligned with the input
+        records.append(placeholder)
+
+    raw = dict.fromkeys(REQUIRED_FIELDS, ())
+    if records:
+        raw.update(zip(REQUIRED_FIELDS, zip(*map(itemgetter(*REQUIRED_FIELDS), records))))
+    columns = {field: _float_column(list(raw[field]), errors) for field in FLOAT_FIELDS}
+    columns['air_quality'] = _air_quality_column(_float_column(list(raw['air_quality']), errors))
+    for field in INT_FIELDS:
+        columns[field] = _int_column(list(raw[field]), errors)
+    columns['rtc_time'] = _rtc_column(raw['rtc_time'], errors)
+    valid = [index not in errors for index in range(len(records))]
+    return columns, valid, errors
+
+def parse_bucket_seconds(value):
+    """Parse a bucket size such as '300', '5m', '1h' or '1d' into seconds"""
+    match = re.fullmatch(r'(\d+)([smhd]?)', str(value).strip().lower())
+    if not match:
+        raise ValidationError("Invalid bucket, expected seconds or a value like '5m', '1h', '1d'")
+    seconds = int(match.group(1)) * BUCKET_UNITS[match.group(2) or 's']
+    if seconds <= 0:
+        raise ValidationError('Bucket must be greater than zero')
+    return seconds
+
+def bucket_for_points(hours, points):
+    """Pick the bucket size in seconds that yields at most the given number of points.
+
+    Buckets of a minute or more are rounded up to whole minutes, hours or days
+    so they can be served from the rollup tables.
+    """
+    if points <= 0:
+        raise ValidationError('points must be greater than zero')
+    seconds = max(1, math.ceil(hours * 3600 / points))
+    for unit in (86400, 3600, 60):
+        if seconds >= unit:
+            return math.ceil(seconds / unit) * unit
+    return seconds
@@ -0,0 +1,99 @@
+"""Concurrent readers and writers against SQLite with the legacy and tuned connection profiles.
+
+The legacy profile is SQLite's default rollback journal with synchronous=FULL,
+where readers and the writer block each other; the tuned profile is the
+WAL/NORMAL/busy_timeout/mmap default of this app. Each reader and writer is
+a separate process, like the gunicorn workers.
+
+Usage: python -m benchmarks.bench_concurrency [--seconds N] [--readers N] [--writers N]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import timedelta
+from .common import emit, latency_percentiles, make_app, make_reading, make_readings, seed
+
+PROFILES = {
+    'legacy': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT_MS': None,
+        'SQLITE_CACHE_SIZE_KB': None,
+        'SQLITE_MMAP_SIZE': None,
+    },
+    'tuned': {},
+}
+
+def _worker(db_path, profile, role, seconds, results):
+    """One process per simulated gunicorn worker, each with its own app and connections."""
+    # Cached responses would hide the database, so the cache is off
+    app = make_app(db_path, RESPONSE_CACHE_TTL=0, **PROFILES[profile])
+    client = app.test_client()
+    ok = failed = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if role == 'read':
+            status = client.get('/api/sensor-data?station_id=1&hours=1').status_code
+        else:
+            status = client.post('/api/sensor-data', json=make_reading(2)).status_code
+        latencies.append(time.perf_counter() - started)
+        if status < 300:
+            ok += 1
+        else:
+            failed += 1
+    results.put((role, ok, failed, latencies))
+
+def _summary(ok, failed, latencies, seconds):
+    return {
+        'per_sec': round(ok / seconds, 1),
+        'failed': failed,
+        **latency_percentiles(latencies),
+    }
+
+def run_profile(profile, seconds, readers, writers, rows):
+    db_path = os.path.join(tempfile.mkdtemp(prefix='suv-bench-'), 'bench.db')
+    seed(make_app(db_path, **PROFILES[profile]), make_readings(rows, interval=timedelta(seconds=5)))
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    roles = ['read'] * readers + ['write'] * writers
+    processes = [context.Process(target=_worker, args=(db_path, profile, role, seconds, results))
+                 for role in roles]
+    for process in processes:
+        process.start()
+    totals = {'read': [0, 0, []], 'write': [0, 0, []]}
+    for _ in processes:
+        role, ok, failed, latencies = results.get()
+        totals[role][0] += ok
+        totals[role][1] += failed
+        totals[role][2].extend(latencies)
+    for process in processes:
+        process.join()
+
+    return {
+        'reads': _summary(*totals['read'], seconds),
+        'writes': _summary(*totals['write'], seconds),
+    }
+
+def run(seconds=5.0, readers=4, writers=2, rows=3000):
+    return {
+        'benchmark': 'concurrency',
+        'seconds': seconds,
+        'readers': readers,
+        'writers': writers,
+        'rows': rows,
+        'profiles': {name: run_profile(name, seconds, readers, writers, rows) for name in PROFILES},
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=3000)
+    args = parser.parse_args()
+    emit(run(args.seconds, args.readers, args.writers, args.rows))
@@ -0,0 +1,74 @@
+"""Time and Python memory of streamed CSV, Parquet and Arrow exports, and bulk import speed.
+
+Peak memory is measured with tracemalloc, so it covers Python allocations
+made while producing the export, not the whole process. The Parquet and
+Arrow exports and the import (of the all-station Parquet export into an
+emptied database) need pyarrow and are skipped without it.
+
+Usage: python -m benchmarks.bench_export [--days N] [--stations N]
+"""
+import argparse
+import importlib
+import tracemalloc
+from app.services.retention import delete_all
+from app.services.serialization import PYARROW_AVAILABLE
+from .common import Timer, emit, make_app
+from .datagen import seed_station_days
+
+def run(days=7, stations=3, interval=30):
+    app = make_app(RESPONSE_CACHE_TTL=0)
+    rows = seed_station_days(app, stations, days, interval)
+    client = app.test_client()
+    hours = int(days * 24) + 1
+
+    exports = [('one_station', 'export-csv?station_id=1'), ('all_stations', 'export-csv?station_id=all')]
+    if PYARROW_AVAILABLE:
+        importlib.import_module('app.services.bulk')  # Loading pyarrow.parquet is a one-off, not part of an export
+
+        exports += [('parquet_all_stations', 'export?station_id=all&format=parquet'),
+                    ('arrow_all_stations', 'export?station_id=all&format=arrow')]
+
+    results = {}
+    bodies = {}
+    for name, query in exports:
+        tracemalloc.start()
+        with Timer() as timer:
+            response = client.get(f'/api/{query}&hours={hours}')
+            bodies[name] = b''.join(response.response)
+            size = len(bodies[name])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert response.status_code == 200, response.status_code
+        results[name] = {
+            'bytes': size,
+            'seconds': round(timer.elapsed, 3),
+            'peak_python_bytes': peak,
+        }
+
+    summary = {
+        'benchmark': 'export',
+        'days': days,
+        'stations': stations,
+        'rows': rows,
+        'exports': results,
+    }
+    if PYARROW_AVAILABLE:
+        with app.app_context():
+            delete_all()
+        with Timer() as timer:
+            response = client.post('/api/import', data=bodies['parquet_all_stations'],
+                                   content_type='application/vnd.apache.parquet')
+        assert response.status_code == 201, response.status_code
+        summary['import'] = {
+            'seconds': round(timer.elapsed, 3),
+            'rows_per_sec': round(response.json['imported'] / timer.elapsed),
+        }
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--stations', type=int, default=3)
+    parser.add_argument('--interval', type=int, default=30)
+    args = parser.parse_args()
+    emit(run(args.days, args.stations, args.interval))
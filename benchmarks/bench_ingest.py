@@ -0,0 +1,40 @@
+"""Compare single-row POST ingestion with the batch endpoint.
+
+Usage: python -m benchmarks.bench_ingest [--rows N] [--batch-size N]
+"""
+import argparse
+from .common import Timer, emit, make_app, make_readings
+
+def run(rows=2000, batch_size=500):
+    readings = make_readings(rows)
+
+    app = make_app()
+    client = app.test_client()
+    with Timer() as single:
+        for reading in readings:
+            response = client.post('/api/sensor-data', json=dict(reading))
+            assert response.status_code == 201, response.json
+
+    app = make_app()
+    client = app.test_client()
+    with Timer() as batch:
+        for start in range(0, rows, batch_size):
+            chunk = [dict(r) for r in readings[start:start + batch_size]]
+            response = client.post('/api/sensor-data/batch', json=chunk)
+            assert response.status_code == 201, response.json
+
+    return {
+        'benchmark': 'ingest',
+        'rows': rows,
+        'batch_size': batch_size,
+        'single_rows_per_sec': round(rows / single.elapsed, 1),
+        'batch_rows_per_sec': round(rows / batch.elapsed, 1),
+        'speedup': round(single.elapsed / batch.elapsed, 1),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    emit(run(args.rows, args.batch_size))
@@ -0,0 +1,65 @@
+"""Read latency of GET /api/sensor-data by window size and table size.
+
+Each table size is a fresh database holding the given number of days for
+every station. The response cache is off so every request hits the
+storage backend; with --backend parquet every row is first copied into
+segments.
+
+Usage: python -m benchmarks.bench_reads [--days 1 7] [--stations N] [--requests N] [--backend sql|parquet]
+"""
+import argparse
+import os
+import tempfile
+import time
+from .common import emit, latency_percentiles, make_app
+from .datagen import seed_station_days
+
+WINDOWS = [
+    ('1h raw', 'hours=1'),
+    ('24h raw', 'hours=24'),
+    ('24h 5m buckets', 'hours=24&bucket=5m'),
+    ('7d 1h buckets', 'hours=168&bucket=1h'),
+    ('30d 1d buckets', 'hours=720&bucket=1d'),
+]
+
+def run_size(days, stations, requests, interval, backend='sql'):
+    directory = tempfile.mkdtemp(prefix='suv-bench-')
+    app = make_app(os.path.join(directory, 'bench.db'), RESPONSE_CACHE_TTL=0, STORAGE_BACKEND=backend,
+                   STORAGE_DIR=os.path.join(directory, 'storage'))
+    rows = seed_station_days(app, stations, days, interval)
+    with app.app_context():
+        app.extensions['storage'].sync(force=True)
+    client = app.test_client()
+
+    windows = {}
+    for name, query in WINDOWS:
+        url = f'/api/sensor-data?station_id=1&{query}'
+        body_bytes = len(client.get(url).get_data())  # Warm up
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+        windows[name] = {'bytes': body_bytes, **latency_percentiles(latencies)}
+    return {'days': days, 'rows': rows, 'windows': windows}
+
+def run(days=(1, 7), stations=3, requests=20, interval=30, backend='sql'):
+    return {
+        'benchmark': 'reads',
+        'backend': backend,
+        'stations': stations,
+        'interval_seconds': interval,
+        'requests': requests,
+        'sizes': [run_size(d, stations, requests, interval, backend) for d in days],
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, nargs='+', default=[1, 7])
+    parser.add_argument('--stations', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--interval', type=int, default=30)
+    parser.add_argument('--backend', choices=['sql', 'parquet'], default='sql')
+    args = parser.parse_args()
+    emit(run(args.days, args.stations, args.requests, args.interval, args.backend))
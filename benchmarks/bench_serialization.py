@@ -0,0 +1,64 @@
+"""Compare the marshmallow read path with the column-tuple JSON encoder.
+
+Usage: python -m benchmarks.bench_serialization [--rows N] [--repeat N]
+"""
+import argparse
+from flask import jsonify
+from .common import Timer, emit, make_app, make_readings, seed
+
+def run(rows=20000, repeat=5):
+    from datetime import datetime, timedelta, UTC
+    from app.models.sensor_data import db, SensorData
+    from app.schemas import SensorDataSchema
+    from app.services import serialization
+    from app.services.queries import sensor_data_window_select
+
+    app = make_app(ROLLUPS_ENABLED=False)
+    seed(app, make_readings(rows, stations=1))
+    since = datetime.now(UTC) - timedelta(days=3650)
+
+    def marshmallow_path():
+        result = SensorData.query.filter(
+            SensorData.station_id == 1, SensorData.timestamp >= since
+        ).order_by(SensorData.timestamp.asc()).all()
+        return jsonify(SensorDataSchema(many=True).dump(result)).get_data()
+
+    def fast_path():
+        stmt = sensor_data_window_select(serialization.SENSOR_DATA_COLUMNS, [1], since)
+        return serialization.sensor_rows_response(db.session.execute(stmt).all()).get_data()
+
+    timings = {}
+    with app.test_request_context():
+        reference = marshmallow_path()
+        assert fast_path() == reference, 'fast path output differs from marshmallow'
+
+        paths = {'marshmallow': marshmallow_path, 'fast_json': fast_path}
+        if serialization.orjson is not None:
+            def orjson_path():
+                app.config['SENSOR_DATA_JSON_ENCODER'] = 'orjson'
+                try:
+                    return fast_path()
+                finally:
+                    app.config['SENSOR_DATA_JSON_ENCODER'] = 'json'
+            paths['fast_orjson'] = orjson_path
+
+        for name, path in paths.items():
+            with Timer() as timer:
+                for _ in range(repeat):
+                    path()
+            timings[name] = round(timer.elapsed / repeat * 1000, 1)
+
+    return {
+        'benchmark': 'serialization',
+        'rows': rows,
+        'payload_bytes': len(reference),
+        'ms_per_request': timings,
+        'speedup': round(timings['marshmallow'] / timings['fast_json'], 1),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    emit(run(args.rows, args.repeat))
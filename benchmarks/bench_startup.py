@@ -0,0 +1,71 @@
+"""Measure application startup with and without FAST_BOOT.
+
+Each run starts a fresh interpreter, as a new gunicorn worker or a cold
+start would, and times importing the app, create_app() and the first
+request. The database is migrated beforehand, as FAST_BOOT expects.
+
+Usage: python -m benchmarks.bench_startup [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from .common import emit, make_app
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints the phase timings as JSON
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(json.loads(sys.argv[1]))
+created = time.perf_counter()
+response = app.test_client().get('/health')
+assert response.status_code == 200, response.status_code
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported,
+                  'first_request': served - created, 'total': served - started}))
+'''
+
+def run_once(config):
+    output = subprocess.run([sys.executable, '-c', CHILD, json.dumps(config)], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def run_profile(db_path, fast_boot, repeat):
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'RATELIMIT_ENABLED': False,
+        'SHARED_STATE_URL': 'memory://',
+        'FAST_BOOT': fast_boot,
+    }
+    runs = [run_once(config) for _ in range(repeat)]
+    return {
+        f'{phase}_ms': round(statistics.median(run[phase] for run in runs) * 1000, 1)
+        for phase in ('import', 'create_app', 'first_request', 'total')
+    }
+
+def run(repeat=5):
+    db_path = os.path.join(tempfile.mkdtemp(prefix='suv-bench-'), 'bench.db')
+    make_app(db_path)  # Creates the schema once
+    default = run_profile(db_path, False, repeat)
+    fast = run_profile(db_path, True, repeat)
+    return {
+        'benchmark': 'startup',
+        'repeat': repeat,
+        'default': default,
+        'fast_boot': fast,
+        'speedup': round(default['total_ms'] / fast['total_ms'], 2),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    emit(run(args.repeat))
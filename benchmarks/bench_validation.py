@@ -0,0 +1,50 @@
+"""Compare per-reading validation with the columnar batch validator.
+
+Both paths produce the rows the batch endpoint inserts, so the timings
+cover validation and conversion only, without the database.
+
+Usage: python -m benchmarks.bench_validation [--rows N ...]
+"""
+import argparse
+from datetime import datetime, UTC
+from .common import Timer, emit, make_readings
+
+def run_size(rows):
+    from app.services.ingest import build_sensor_row, build_sensor_rows
+
+    readings = make_readings(rows)
+    timestamp = datetime.now(UTC)
+
+    with Timer() as per_dict:
+        # validate_sensor_data mutates its input, so each path gets fresh copies
+        for reading in [dict(r) for r in readings]:
+            build_sensor_row(reading, timestamp)
+    per_dict_elapsed = per_dict.elapsed - _copy_time(readings)
+
+    with Timer() as columnar:
+        built, errors = build_sensor_rows(readings, timestamp)
+    assert len(built) == rows and not errors
+
+    return {
+        'rows': rows,
+        'per_dict_rows_per_sec': round(rows / per_dict_elapsed, 1),
+        'columnar_rows_per_sec': round(rows / columnar.elapsed, 1),
+        'speedup': round(per_dict_elapsed / columnar.elapsed, 1),
+    }
+
+def _copy_time(readings):
+    with Timer() as copy:
+        [dict(r) for r in readings]
+    return copy.elapsed
+
+def run(sizes=(10000, 100000)):
+    return {
+        'benchmark': 'validation',
+        'sizes': [run_size(rows) for rows in sizes],
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    emit(run(args.rows))
@@ -0,0 +1,84 @@
+"""Shared helpers for the offline benchmarks."""
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, UTC
+
+def make_app(db_path=None, **overrides):
+    """Create an app bound to a throwaway SQLite file with rate limiting disabled."""
+    from app import create_app
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='suv-bench-'), 'bench.db')
+    config = {
+        'TESTING': True,
+        'DEBUG': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'RATELIMIT_ENABLED': False,
+        'SHARED_STATE_URL': 'memory://',
+    }
+    config.update(overrides)
+    return create_app(config)
+
+def make_reading(station_id, rtc_time=None, rng=random):
+    """Build a raw reading using the same value ranges as createTestData in logs.html."""
+    rtc_time = rtc_time or datetime.now(UTC)
+    return {
+        'timestamp': int(rtc_time.timestamp()),
+        'temperature': round(20 + rng.random() * 10, 3),
+        'humidity': round(40 + rng.random() * 30, 3),
+        'uv_index': round(rng.random() * 11, 3),
+        'air_quality': round(rng.random() * 500, 3),
+        'co2e': round(800 + rng.random() * 800, 3),
+        'fill_level': round(rng.random() * 100, 3),
+        'rtc_time': rtc_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'bme_iaq_accuracy': rng.randrange(3),
+        'station_id': station_id
+    }
+
+def make_readings(count, stations=3, interval=timedelta(seconds=30), seed=42):
+    """Build count readings spread round-robin over the stations, oldest first."""
+    rng = random.Random(seed)
+    start = datetime.now(UTC) - interval * (count // stations + 1)
+    return [
+        make_reading(i % stations + 1, start + interval * (i // stations), rng)
+        for i in range(count)
+    ]
+
+def seed(app, readings, chunk_size=5000):
+    """Validate and bulk insert readings, using each reading's RTC time as its timestamp."""
+    from sqlalchemy import insert
+    from app.models.sensor_data import db, SensorData
+    from app.services.ingest import build_sensor_row
+
+    with app.app_context():
+        for start in range(0, len(readings), chunk_size):
+            rows = []
+            for reading in readings[start:start + chunk_size]:
+                timestamp = datetime.strptime(reading['rtc_time'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=UTC)
+                rows.append(build_sensor_row(dict(reading), timestamp))
+            db.session.execute(insert(SensorData), rows)
+            db.session.commit()
+
+def latency_percentiles(latencies):
+    """p50/p95/p99 of latencies in seconds, reported in milliseconds."""
+    latencies = sorted(latencies) or [0.0]
+    return {
+        f'p{p}_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 2)
+        for p in (50, 95, 99)
+    }
+
+class Timer:
+    """Context manager measuring wall-clock time in seconds."""
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+def emit(result):
+    """Print a benchmark result as JSON so runs can be diffed between commits."""
+    print(json.dumps(result, indent=2, sort_keys=True))
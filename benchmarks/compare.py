@@ -0,0 +1,73 @@
+"""Compare two benchmark result files and report regressions.
+
+Throughputs (per_sec, speedup) should not drop; latencies, durations and
+sizes (_ms, seconds, bytes) should not grow. Changes beyond the threshold
+are listed, and the exit status is 1 when anything regressed.
+
+Usage: python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ('per_sec', 'speedup')
+LOWER_IS_BETTER = ('_ms', 'seconds', 'bytes')
+
+def flatten(value, prefix=''):
+    """Map dotted paths to the numeric leaves of a result document."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f'{prefix}.{key}' if prefix else str(key)))
+    return flat
+
+def direction(path):
+    """+1 if higher is better, -1 if lower is better, None for parameters like rows."""
+    leaf = path.rsplit('.', 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+def compare(baseline, candidate, threshold=0.1):
+    """Return (regressions, improvements) as lists of (path, before, after, relative change)."""
+    before = flatten(baseline.get('results', baseline))
+    after = flatten(candidate.get('results', candidate))
+    regressions, improvements = [], []
+    for path in sorted(before.keys() & after.keys()):
+        sign = direction(path)
+        if sign is None or not before[path]:
+            continue
+        change = (after[path] - before[path]) / abs(before[path])
+        if abs(change) < threshold:
+            continue
+        entry = (path, before[path], after[path], change)
+        (improvements if change * sign > 0 else regressions).append(entry)
+    return regressions, improvements
+
+def _report(title, entries):
+    print(f'{title}:')
+    for path, before, after, change in entries:
+        print(f'  {path}: {before:g} -> {after:g} ({change:+.0%})')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change to report (0.1 = 10%%)')
+    args = parser.parse_args()
+    with open(args.baseline) as baseline, open(args.candidate) as candidate:
+        regressions, improvements = compare(json.load(baseline), json.load(candidate), args.threshold)
+    if improvements:
+        _report('Improvements', improvements)
+    if regressions:
+        _report('Regressions', regressions)
+    if not regressions and not improvements:
+        print(f'No changes beyond {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,71 @@
+"""Generate synthetic readings for N stations over M days.
+
+Values use the ranges of createTestData in logs.html. Readings are written
+straight into a SQLite database (stamped with their RTC time, like a
+backfill) or as NDJSON for the batch endpoint.
+
+Usage: python -m benchmarks.datagen --stations 3 --days 7 [--interval 30] (--db PATH | --ndjson PATH)
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, UTC
+from . import common
+from .common import Timer, emit, make_app, make_reading
+
+def iter_station_days(stations, days, interval_seconds=30, seed=42, end=None):
+    """Yield readings for every station every interval_seconds over the last days, oldest first."""
+    rng = random.Random(seed)
+    end = end or datetime.now(UTC).replace(microsecond=0)
+    step = timedelta(seconds=interval_seconds)
+    steps = int(days * 86400 // interval_seconds)
+    for i in range(steps):
+        rtc_time = end - step * (steps - i)
+        for station_id in range(1, stations + 1):
+            yield make_reading(station_id, rtc_time, rng)
+
+def seed_station_days(app, stations, days, interval_seconds=30, seed=42, chunk_size=20000):
+    """Insert the generated readings into the app's database; returns the number of rows."""
+    total = 0
+    chunk = []
+    for reading in iter_station_days(stations, days, interval_seconds, seed):
+        chunk.append(reading)
+        if len(chunk) == chunk_size:
+            common.seed(app, chunk, chunk_size)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        common.seed(app, chunk, chunk_size)
+        total += len(chunk)
+    # Bring the rollups up to date like a backfill followed by flask compact-rollups
+    with app.app_context():
+        from app.services.rollups import compact_rollups
+        while compact_rollups(app.config['ROLLUP_COMPACT_BATCH']):
+            pass
+    return total
+
+def write_ndjson(path, stations, days, interval_seconds=30, seed=42):
+    count = 0
+    with open(path, 'w') as output:
+        for reading in iter_station_days(stations, days, interval_seconds, seed):
+            output.write(json.dumps(reading, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stations', type=int, default=3)
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--interval', type=int, default=30, help='Seconds between readings of a station')
+    parser.add_argument('--seed', type=int, default=42)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--db', help='SQLite file to create or extend')
+    target.add_argument('--ndjson', help='NDJSON file to write')
+    args = parser.parse_args()
+
+    with Timer() as timer:
+        if args.db:
+            rows = seed_station_days(make_app(args.db), args.stations, args.days, args.interval, args.seed)
+        else:
+            rows = write_ndjson(args.ndjson, args.stations, args.days, args.interval, args.seed)
+    emit({'rows': rows, 'seconds': round(timer.elapsed, 2)})
@@ -0,0 +1,63 @@
+"""Run the benchmark suite and write one JSON document for comparing commits.
+
+Usage: python -m benchmarks.run [--quick] [--only NAME ...] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, UTC
+from . import (bench_concurrency, bench_export, bench_ingest, bench_reads, bench_serialization, bench_startup,
+               bench_validation)
+from .common import emit
+
+# name: (run function, full arguments, --quick arguments)
+SUITE = {
+    'ingest': (bench_ingest.run, {'rows': 2000, 'batch_size': 500}, {'rows': 500, 'batch_size': 250}),
+    'validation': (bench_validation.run, {'sizes': (10000, 100000)}, {'sizes': (10000,)}),
+    'serialization': (bench_serialization.run, {'rows': 20000}, {'rows': 5000, 'repeat': 3}),
+    'reads': (bench_reads.run, {'days': (1, 7, 30)}, {'days': (1,), 'requests': 10}),
+    'export': (bench_export.run, {'days': 7}, {'days': 1}),
+    'startup': (bench_startup.run, {'repeat': 5}, {'repeat': 2}),
+    'concurrency': (bench_concurrency.run, {'seconds': 5.0}, {'seconds': 2.0, 'rows': 1000}),
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(names, quick=False):
+    results = {}
+    for name in names:
+        function, full, reduced = SUITE[name]
+        print(f'Running {name}...', file=sys.stderr)
+        results[name] = function(**(reduced if quick else full))
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': datetime.now(UTC).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='Smaller data sets for a fast smoke run')
+    parser.add_argument('--only', nargs='+', choices=list(SUITE), default=list(SUITE))
+    parser.add_argument('--output', help='Write the results to this file instead of stdout')
+    args = parser.parse_args()
+    report = run(args.only, args.quick)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    else:
+        emit(report)
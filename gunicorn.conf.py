@@ -1,7 +1,32 @@
 import os
 
 workers = 4
+# Every open /api/stream holds one gthread thread, so STREAM_MAX_PER_WORKER (16) keeps the other
+# half of the threads for regular requests. Set GUNICORN_WORKER_CLASS=gevent (pip install gevent)
+# and raise STREAM_MAX_PER_WORKER to hold thousands of streams per worker
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '32'))
+# Only used by async workers such as gevent
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
 bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
 timeout = 120
 accesslog = "-"
-errorlog = "-" 
\ No newline at end of file
+errorlog = "-"
+# Load the app once in the master so workers fork with it already imported (copy-on-write);
+# set GUNICORN_PRELOAD=false to load it in every worker instead
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+def post_fork(server, worker):
+    # Connections the master opened while loading the app must not be shared with workers
+    if preload_app:
+        from app.models.sensor_data import db
+
+        with server.app.wsgi().app_context():
+            db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    # Drain readings queued before a restart or crash without waiting for new traffic;
+    # threads do not survive the fork, so this runs in each worker rather than at app load
+    queue = worker.app.wsgi().extensions.get('write_queue')
+    if queue is not None:
+        queue.resume()
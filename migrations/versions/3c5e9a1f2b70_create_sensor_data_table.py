@@ -0,0 +1,41 @@
+"""create sensor_data table
+
+Revision ID: 3c5e9a1f2b70
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5e9a1f2b70'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before migrations existed already have the table from db.create_all()
+    if sa.inspect(op.get_bind()).has_table('sensor_data'):
+        return
+
+    op.create_table('sensor_data',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=True),
+        sa.Column('humidity', sa.Float(), nullable=True),
+        sa.Column('uv_index', sa.Float(), nullable=True),
+        sa.Column('air_quality', sa.Float(), nullable=True),
+        sa.Column('co2e', sa.Float(), nullable=True),
+        sa.Column('fill_level', sa.Float(), nullable=True),
+        sa.Column('rtc_time', sa.DateTime(), nullable=True),
+        sa.Column('bme_iaq_accuracy', sa.Integer(), nullable=True),
+        sa.Column('station_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('sensor_data')
@@ -0,0 +1,25 @@
+"""add sensor_data (station_id, timestamp) index
+
+Revision ID: 8d2f4b6a1e93
+Revises: 3c5e9a1f2b70
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b6a1e93'
+down_revision = '3c5e9a1f2b70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sensor_data_station_id_timestamp', 'sensor_data',
+                    ['station_id', 'timestamp'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_sensor_data_station_id_timestamp', table_name='sensor_data')
@@ -0,0 +1,25 @@
+"""add sensor_data (station_id, id) index
+
+Revision ID: a93d5e7c1f62
+Revises: f2c6d8a0b417
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d5e7c1f62'
+down_revision = 'f2c6d8a0b417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sensor_data_station_id_id', 'sensor_data',
+                    ['station_id', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_sensor_data_station_id_id', table_name='sensor_data')
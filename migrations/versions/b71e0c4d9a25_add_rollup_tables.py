@@ -0,0 +1,52 @@
+"""add 1m/1h/1d rollup tables and watermark
+
+Revision ID: b71e0c4d9a25
+Revises: 8d2f4b6a1e93
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e0c4d9a25'
+down_revision = '8d2f4b6a1e93'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ['sensor_data_1m', 'sensor_data_1h', 'sensor_data_1d']
+METRICS = ['temperature', 'humidity', 'uv_index', 'air_quality', 'co2e', 'fill_level']
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in ROLLUP_TABLES:
+        if inspector.has_table(table):
+            continue
+        columns = [
+            sa.Column('station_id', sa.Integer(), nullable=False),
+            sa.Column('bucket_start', sa.BigInteger(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+        ]
+        for metric in METRICS:
+            columns += [
+                sa.Column(f'{metric}_sum', sa.Float(), nullable=True),
+                sa.Column(f'{metric}_count', sa.Integer(), nullable=True),
+                sa.Column(f'{metric}_min', sa.Float(), nullable=True),
+                sa.Column(f'{metric}_max', sa.Float(), nullable=True),
+            ]
+        op.create_table(table, *columns, sa.PrimaryKeyConstraint('station_id', 'bucket_start'))
+
+    if not inspector.has_table('rollup_watermarks'):
+        op.create_table('rollup_watermarks',
+            sa.Column('name', sa.String(length=32), nullable=False),
+            sa.Column('last_id', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+    for table in reversed(ROLLUP_TABLES):
+        op.drop_table(table)
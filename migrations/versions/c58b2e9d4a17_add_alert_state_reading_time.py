@@ -0,0 +1,29 @@
+"""add alert_state.reading_time
+
+Revision ID: c58b2e9d4a17
+Revises: a93d5e7c1f62
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58b2e9d4a17'
+down_revision = 'a93d5e7c1f62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'reading_time' in {column['name'] for column in inspector.get_columns('alert_state')}:
+        return
+    # Existing states start comparing from the next reading they evaluate
+    op.add_column('alert_state', sa.Column('reading_time', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('alert_state') as batch_op:
+        batch_op.drop_column('reading_time')
@@ -0,0 +1,40 @@
+"""never reuse sensor_data ids
+
+Revision ID: d36f1a8c5e20
+Revises: c58b2e9d4a17
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd36f1a8c5e20'
+down_revision = 'c58b2e9d4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Other backends draw ids from a sequence that never goes back
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('sensor_data', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    # Ids freed before this revision may already be behind a watermark, so start past them too
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'sensor_data'")
+    op.execute(sa.text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'sensor_data', max("
+        "(SELECT coalesce(max(id), 0) FROM sensor_data), "
+        "(SELECT coalesce(max(last_id), 0) FROM rollup_watermarks "
+        "WHERE name IN ('sensor_data', 'alerts', 'station_latest')))"))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('sensor_data', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,55 @@
+"""add alert_state and alert_events tables
+
+Revision ID: e4a91c7d5b38
+Revises: b71e0c4d9a25
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a91c7d5b38'
+down_revision = 'b71e0c4d9a25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('alert_state'):
+        op.create_table('alert_state',
+            sa.Column('station_id', sa.Integer(), nullable=False),
+            sa.Column('metric', sa.String(length=32), nullable=False),
+            sa.Column('level', sa.String(length=16), nullable=False),
+            sa.Column('since', sa.DateTime(), nullable=True),
+            sa.Column('value', sa.Float(), nullable=True),
+            sa.Column('threshold', sa.Float(), nullable=True),
+            sa.Column('pending_level', sa.String(length=16), nullable=True),
+            sa.Column('pending_since', sa.DateTime(), nullable=True),
+            sa.Column('reading_id', sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint('station_id', 'metric')
+        )
+
+    if not inspector.has_table('alert_events'):
+        op.create_table('alert_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('station_id', sa.Integer(), nullable=False),
+            sa.Column('metric', sa.String(length=32), nullable=False),
+            sa.Column('level', sa.String(length=16), nullable=False),
+            sa.Column('previous_level', sa.String(length=16), nullable=False),
+            sa.Column('value', sa.Float(), nullable=True),
+            sa.Column('threshold', sa.Float(), nullable=True),
+            sa.Column('reading_id', sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_alert_events_station_id_timestamp', 'alert_events',
+                        ['station_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_alert_events_station_id_timestamp', table_name='alert_events')
+    op.drop_table('alert_events')
+    op.drop_table('alert_state')
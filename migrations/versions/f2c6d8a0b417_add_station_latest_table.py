@@ -0,0 +1,41 @@
+"""add station_latest snapshot table
+
+Revision ID: f2c6d8a0b417
+Revises: e4a91c7d5b38
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c6d8a0b417'
+down_revision = 'e4a91c7d5b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('station_latest'):
+        return
+    op.create_table('station_latest',
+        sa.Column('station_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=True),
+        sa.Column('humidity', sa.Float(), nullable=True),
+        sa.Column('uv_index', sa.Float(), nullable=True),
+        sa.Column('air_quality', sa.Float(), nullable=True),
+        sa.Column('co2e', sa.Float(), nullable=True),
+        sa.Column('fill_level', sa.Float(), nullable=True),
+        sa.Column('rtc_time', sa.DateTime(), nullable=True),
+        sa.Column('bme_iaq_accuracy', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('station_id')
+    )
+    # Existing readings are folded in by the first ingest (the watermark starts at 0)
+
+
+def downgrade():
+    op.drop_table('station_latest')
@@ -5,11 +5,11 @@ from app.models.sensor_data import db as _db
 @pytest.fixture
 def app():
     """Create application for the tests."""
-    _app = create_app()
-    _app.config.update({
+    _app = create_app({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'DEBUG': False,
+        'SHARED_STATE_URL': 'memory://',
         'GOOGLE_MAPS_API_KEY': 'test_key',
         'GOOGLE_MAPS_MAP_ID': 'test_map_id',
         'STATIONS': {
@@ -32,4 +32,4 @@ def db(app):
         _db.create_all()
         yield _db
         _db.session.remove()
-        _db.drop_all() 
\ No newline at end of file
+        _db.drop_all()
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, UTC
+from app.models.sensor_data import SensorData
+
+def make_reading(station_id=1, **overrides):
+    """A valid reading as stations POST it, with overridden fields."""
+    reading = {
+        'timestamp': '2024-02-14T12:00:00',
+        'temperature': 25.5,
+        'humidity': 60.0,
+        'uv_index': 5.0,
+        'air_quality': 80.0,
+        'co2e': 400.0,
+        'fill_level': 75.0,
+        'rtc_time': '2024-02-14 12:00:00',
+        'bme_iaq_accuracy': 3,
+        'station_id': station_id
+    }
+    reading.update(overrides)
+    return reading
+
+def add_readings(db, station_id, start, count, step=timedelta(seconds=30), temperature=20.0):
+    """Insert count readings for a station, step apart, with increasing temperatures."""
+    for i in range(count):
+        db.session.add(SensorData(
+            timestamp=start + step * i, temperature=temperature + i, humidity=50.0,
+            uv_index=1.0, air_quality=90.0, co2e=400.0, fill_level=50.0,
+            rtc_time=start + step * i, bme_iaq_accuracy=3, station_id=station_id
+        ))
+    db.session.commit()
+
+def add_history(db):
+    """Insert 112 readings for two stations in receive order, so ids grow with timestamps."""
+    start = datetime.now(UTC) - timedelta(hours=3)
+    times = [(start + timedelta(seconds=97) * i, 1) for i in range(60)]
+    times += [(start + timedelta(seconds=13 + 131 * i), 2) for i in range(45)]
+    times += [(datetime.now(UTC) - timedelta(minutes=5) + timedelta(seconds=30) * i, 1) for i in range(7)]
+    for i, (timestamp, station_id) in enumerate(sorted(times)):
+        add_readings(db, station_id, timestamp, 1, temperature=20.0 + i % 17)
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, UTC
+from app.models.alerts import AlertState, AlertEvent
+from app.services.alerts import AlertRule, build_rules, evaluate_alerts
+from tests.helpers import add_readings
+
+THRESHOLDS = {
+    'temperature': {'min': -15, 'max': 45, 'warning': 30},
+    'fill_level': {'min': 0, 'max': 100, 'warning': 20},
+}
+
+def add_temperatures(db, station_id, start, temperatures, step=timedelta(seconds=30)):
+    for i, temperature in enumerate(temperatures):
+        add_readings(db, station_id, start + step * i, 1, temperature=temperature)
+
+def test_build_rules_infers_warning_direction():
+    """Test that warnings in the lower half of the range fire on low values."""
+    rules = build_rules(THRESHOLDS, hysteresis=0.02)
+    assert rules['temperature'].direction == 'above'
+    assert rules['fill_level'].direction == 'below'
+    assert rules['fill_level'].hysteresis == 2.0
+    assert build_rules({'fill_level': {'warning': 20, 'warning_direction': 'above'}})['fill_level'].direction == 'above'
+
+def test_rule_hysteresis():
+    """Test that leaving a level requires moving past the threshold by the hysteresis."""
+    rule = AlertRule('temperature', -15, 45, 30, hysteresis=1.0)
+    assert rule.next_level(31, 'ok') == ('warning', 30)
+    assert rule.next_level(29.5, 'warning') == ('warning', None)
+    assert rule.next_level(28.5, 'warning') == ('ok', None)
+    assert rule.next_level(46, 'warning') == ('danger', 45)
+    assert rule.next_level(44.5, 'danger') == ('danger', None)
+    assert rule.next_level(40, 'danger') == ('warning', 30)
+
+def test_evaluate_alerts_records_transitions(app, db):
+    """Test that level changes are stored as state and events, incrementally."""
+    app.config.update(THRESHOLDS=THRESHOLDS, ALERTS_ENABLED=False)
+    start = datetime.now(UTC) - timedelta(minutes=10)
+    add_temperatures(db, 1, start, [20, 32, 33, 50])
+
+    assert evaluate_alerts() == 4
+    assert evaluate_alerts() == 0
+    state = db.session.get(AlertState, (1, 'temperature'))
+    assert state.level == 'danger'
+    assert state.threshold == 45
+    events = AlertEvent.query.order_by(AlertEvent.id).all()
+    assert [(e.previous_level, e.level) for e in events] == [('ok', 'warning'), ('warning', 'danger')]
+
+    add_temperatures(db, 1, start + timedelta(minutes=5), [10])
+    assert evaluate_alerts() == 1
+    assert db.session.get(AlertState, (1, 'temperature')).level == 'ok'
+    assert AlertEvent.query.count() == 3
+
+def test_evaluate_alerts_skips_history(app, db):
+    """Test that readings older than the last evaluated one change neither state nor events."""
+    app.config.update(THRESHOLDS=THRESHOLDS, ALERTS_ENABLED=False)
+    now = datetime.now(UTC)
+    add_temperatures(db, 1, now - timedelta(minutes=1), [20])
+    evaluate_alerts()
+
+    # A backfill of last month's heat wave
+    add_temperatures(db, 1, now - timedelta(days=30), [35, 50, 50])
+    assert evaluate_alerts() == 3
+    state = db.session.get(AlertState, (1, 'temperature'))
+    assert (state.level, state.value) == ('ok', 20)
+    assert AlertEvent.query.count() == 0
+
+def test_evaluate_alerts_min_duration(app, db):
+    """Test that a level only changes after the readings stayed there long enough."""
+    app.config.update(THRESHOLDS=THRESHOLDS, ALERTS_ENABLED=False, ALERT_MIN_DURATION_SECONDS=60)
+    start = datetime.now(UTC) - timedelta(minutes=10)
+    add_temperatures(db, 1, start, [35, 20, 35, 35, 35])
+
+    evaluate_alerts()
+    state = db.session.get(AlertState, (1, 'temperature'))
+    assert state.level == 'warning'
+    assert state.since == start + timedelta(seconds=120)
+
+def test_alerts_evaluated_on_ingest(app, client, db):
+    """Test that posted readings update the active alerts endpoint."""
+    app.config['THRESHOLDS'] = THRESHOLDS
+    reading = {
+        'timestamp': 1, 'temperature': 35, 'humidity': 50, 'uv_index': 1, 'air_quality': 100,
+        'co2e': 400, 'fill_level': 10, 'rtc_time': '2024-02-14 12:00:00',
+        'bme_iaq_accuracy': 3, 'station_id': 1
+    }
+    assert client.post('/api/sensor-data', json=reading).status_code == 201
+
+    response = client.get('/api/alerts')
+    assert response.status_code == 200
+    alerts = {(a['metric'], a['level']) for a in response.json['alerts']}
+    assert alerts == {('temperature', 'warning'), ('fill_level', 'warning')}
+
+    assert client.get('/api/alerts', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/api/alerts?station_id=2').json['alerts'] == []
+
+    history = client.get('/api/alerts/history?station_id=1').json['events']
+    assert {event['metric'] for event in history} == {'temperature', 'fill_level'}
+
+def test_evaluate_alerts_cli(app, db):
+    """Test the evaluate-alerts CLI command."""
+    app.config.update(THRESHOLDS=THRESHOLDS, ALERTS_ENABLED=False)
+    add_temperatures(db, 1, datetime.now(UTC) - timedelta(minutes=5), [20, 35])
+
+    result = app.test_cli_runner().invoke(args=['evaluate-alerts'])
+    assert result.exit_code == 0
+    assert '2 readings evaluated' in result.output
@@ -0,0 +1,89 @@
+import csv
+import json
+from datetime import datetime, UTC
+from sqlalchemy import func, select
+from app.models.sensor_data import SensorData
+import pytest
+from app.services.backfill import backfill, check_reading_time, parse_reading_time
+from app.utils.errors import ValidationError
+
+FIELDS = ['timestamp', 'temperature', 'humidity', 'uv_index', 'air_quality', 'co2e', 'fill_level',
+          'rtc_time', 'bme_iaq_accuracy', 'station_id']
+
+def reading(hour, station_id=1, **overrides):
+    values = dict(zip(FIELDS, [1, 20.0 + hour, 50, 1, 100, 400, 30,
+                               f'2024-03-01 {hour:02d}:00:00', 3, station_id]))
+    values.update(overrides)
+    return values
+
+def write_csv(path, readings):
+    with open(path, 'w', newline='') as output:
+        writer = csv.DictWriter(output, FIELDS)
+        writer.writeheader()
+        writer.writerows(readings)
+
+def test_parse_reading_time():
+    """Test that reading times are read as ISO 8601 or Unix seconds in UTC."""
+    expected = datetime(2024, 3, 1, 12, tzinfo=UTC)
+    assert parse_reading_time('2024-03-01T12:00:00Z') == expected
+    assert parse_reading_time('2024-03-01 13:00:00+01:00') == expected
+    assert parse_reading_time('2024-03-01T12:00:00') == expected
+    assert parse_reading_time(expected.timestamp()) == expected
+    assert parse_reading_time(str(int(expected.timestamp()))) == expected
+
+def test_check_reading_time():
+    """Test that reading times before 2000 or in the future are rejected."""
+    now = datetime(2024, 3, 1, tzinfo=UTC)
+    assert check_reading_time(now, now) == now
+    for timestamp in (parse_reading_time(5), datetime(2024, 3, 3, tzinfo=UTC)):
+        with pytest.raises(ValidationError):
+            check_reading_time(timestamp, now)
+
+def test_backfill_chunks(db):
+    """Test that backfill stores readings at their RTC times in chunks and rejects invalid ones."""
+    lines = [json.dumps(reading(hour, station_id=hour % 2 + 1)) for hour in range(10)]
+    lines[3] = '{not json'
+    lines[5] = json.dumps(reading(5, rtc_time='1970-01-01 00:00:05'))
+    lines[7] = json.dumps(reading(7, temperature='warm'))
+
+    progress = [dict(summary) for summary in backfill(lines, 'ndjson', chunk_rows=4)]
+    assert [summary['read'] for summary in progress] == [4, 8, 10]
+    summary = progress[-1]
+    assert (summary['inserted'], summary['skipped'], summary['rejected']) == (7, 0, 3)
+    assert [number for number, _ in summary['errors']] == [4, 6, 8]
+
+    readings = db.session.scalars(select(SensorData).order_by(SensorData.timestamp)).all()
+    assert [reading.timestamp.hour for reading in readings] == [0, 1, 2, 4, 6, 8, 9]
+    assert readings[0].timestamp == datetime(2024, 3, 1, tzinfo=UTC)  # Not the device's timestamp: 1
+    assert readings[0].air_quality == 80.0  # Converted from the raw score like a POST
+    assert {reading.station_id for reading in readings} == {1, 2}
+
+def test_backfill_command(app, db, tmp_path):
+    """Test the backfill command on a CSV file, and that running it again skips every reading."""
+    path = str(tmp_path / 'readings.csv')
+    write_csv(path, [reading(hour) for hour in range(24)])
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['backfill', path, '--batch-size', '10'])
+    assert result.exit_code == 0, result.output
+    assert '24 read, 24 inserted, 0 skipped, 0 rejected' in result.output
+    assert db.session.scalar(select(func.count(SensorData.id))) == 24
+
+    result = runner.invoke(args=['backfill', path])
+    assert '24 read, 0 inserted, 24 skipped, 0 rejected' in result.output
+    assert db.session.scalar(select(func.count(SensorData.id))) == 24
+
+    result = runner.invoke(args=['backfill', path, '--time-field', 'timestamp'])
+    assert '24 read, 0 inserted, 0 skipped, 24 rejected' in result.output
+    assert 'Implausible reading time: 1970-01-01T00:00:01+00:00' in result.output
+
+    result = runner.invoke(args=['backfill', str(tmp_path)])
+    assert result.exit_code != 0
+
+def test_maintain_db_command(app, db):
+    """Test that maintain-db runs every step on SQLite."""
+    result = app.test_cli_runner().invoke(args=['maintain-db', '--reindex', '--vacuum'])
+    assert result.exit_code == 0, result.output
+    for step in ('reindex', 'vacuum', 'analyze', 'optimize'):
+        assert f'{step}:' in result.output
+    assert 'Database size' in result.output
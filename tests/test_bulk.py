@@ -0,0 +1,135 @@
+import io
+import os
+from datetime import datetime, timedelta, UTC
+import pytest
+from sqlalchemy import select
+from app.models.sensor_data import SensorData, SENSOR_METRICS
+from app.utils.errors import ValidationError
+from app.services.retention import delete_all
+from tests.helpers import add_history
+
+pytest.importorskip('pyarrow')
+import pyarrow
+import pyarrow.parquet as pq
+from app.services.bulk import (EXPORT_COLUMNS, iter_export_batches, open_import_batches, import_batches,
+                               write_export, write_partitioned_parquet)
+
+SINCE = datetime(2000, 1, 1, tzinfo=UTC)
+
+def stored_rows(db):
+    columns = [getattr(SensorData, name) for name in EXPORT_COLUMNS]
+    return [tuple(row) for row in db.session.execute(
+        select(*columns).order_by(SensorData.station_id, SensorData.timestamp))]
+
+@pytest.mark.parametrize('export_format', ['parquet', 'arrow'])
+def test_export_import_round_trip(db, tmp_path, export_format):
+    """Test that an export imported into an empty database restores every reading."""
+    add_history(db)
+    expected = stored_rows(db)
+    path = str(tmp_path / f'export.{export_format}')
+    assert write_export(iter_export_batches(None, SINCE, batch_rows=25), path, export_format) == 112
+
+    delete_all()
+    assert import_batches(open_import_batches(path, batch_rows=30)) == \
+        {'imported': 112, 'skipped': 0, 'rejected': 0}
+    assert stored_rows(db) == expected
+
+    # Importing the same file again only skips
+    assert import_batches(open_import_batches(path)) == {'imported': 0, 'skipped': 112, 'rejected': 0}
+
+def test_partitioned_export(db, tmp_path):
+    """Test that partitioned exports hold one station and month per directory and import back."""
+    add_history(db)
+    expected = stored_rows(db)
+    files = write_partitioned_parquet(iter_export_batches([1, 2], SINCE, batch_rows=25), str(tmp_path))
+
+    months = {datetime.now(UTC).strftime('%Y-%m'), (datetime.now(UTC) - timedelta(hours=3)).strftime('%Y-%m')}
+    assert {os.path.relpath(os.path.dirname(path), tmp_path) for path in files} == \
+        {f'station_id={station_id}/month={month}' for station_id in (1, 2) for month in months}
+    for path in files:
+        station_id = int(path.split('station_id=')[1].split('/')[0])
+        assert set(pq.read_table(path).column('station_id').to_pylist()) == {station_id}
+
+    delete_all()
+    assert import_batches(open_import_batches(str(tmp_path)))['imported'] == 112
+    assert stored_rows(db) == expected
+
+def import_table(**columns):
+    """A Parquet upload of five readings at 12:00 to 12:04 on 2024-01-01, with overridden columns."""
+    times = [datetime(2024, 1, 1, 12, minute) for minute in range(5)]
+    values = {name: [1.0] * 5 for name in SENSOR_METRICS}
+    values.update(station_id=[1] * 5, timestamp=pyarrow.array(times, type=pyarrow.timestamp('ms')),
+                  rtc_time=pyarrow.array(times, type=pyarrow.timestamp('ms')), bme_iaq_accuracy=[3] * 5)
+    values.update(columns)
+    sink = io.BytesIO()
+    pq.write_table(pyarrow.table(values), sink)
+    sink.seek(0)
+    return sink
+
+def test_import_validates_rows(db):
+    """Test that imports read naive times as UTC and reject rows a POSTed reading could not produce."""
+    upload = import_table(station_id=[1, 1, None, 1, 1], bme_iaq_accuracy=[3, 3, 3, None, 3],
+                          air_quality=[80.0, float('nan'), 80.0, 80.0, 250.0], temperature=[20.5, 21, 22, 23, None])
+    assert import_batches(open_import_batches(upload)) == {'imported': 2, 'skipped': 0, 'rejected': 3}
+    readings = db.session.scalars(select(SensorData).order_by(SensorData.timestamp)).all()
+    assert [reading.temperature for reading in readings] == [20.5, 21.0]
+    assert readings[0].timestamp.replace(tzinfo=UTC) == datetime(2024, 1, 1, 12, tzinfo=UTC)
+
+    times = pyarrow.array([datetime(1970, 1, 1), datetime(2024, 1, 1, 12), datetime(2024, 1, 1, 13),
+                           datetime.now() + timedelta(days=2), None], type=pyarrow.timestamp('ms'))
+    assert import_batches(open_import_batches(import_table(timestamp=times))) == \
+        {'imported': 1, 'skipped': 1, 'rejected': 3}
+
+    upload = io.BytesIO()
+    pq.write_table(pyarrow.table({'station_id': [1], 'timestamp': [datetime(2024, 1, 1)]}), upload)
+    upload.seek(0)
+    with pytest.raises(ValidationError) as error:
+        import_batches(open_import_batches(upload))
+    assert error.value.message == 'Missing required column: temperature'
+
+def test_bulk_endpoints(client, db):
+    """Test that /api/export streams files that /api/import accepts."""
+    add_history(db)
+    expected = stored_rows(db)
+
+    response = client.get('/api/export?station_id=all&hours=4')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.apache.parquet'
+    assert 'sensor_data_all_stations.parquet' in response.headers['Content-Disposition']
+    assert pq.read_table(io.BytesIO(response.data)).num_rows == 112
+
+    response = client.get('/api/export?station_id=2&format=arrow')
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    stream = response.data
+    assert pyarrow.ipc.open_stream(stream).read_all().num_rows == 45
+
+    assert client.get('/api/export?station_id=3').status_code == 404
+    assert client.get('/api/export?station_id=1&format=csv').status_code == 400
+
+    delete_all()
+    response = client.post('/api/import', data=stream, content_type='application/vnd.apache.arrow.stream')
+    assert response.status_code == 201
+    assert response.json == {'imported': 45, 'skipped': 0, 'rejected': 0}
+    assert stored_rows(db) == [row for row in expected if row[0] == 2]
+
+    response = client.post('/api/import', data=b'not a file', content_type='application/octet-stream')
+    assert response.status_code == 400
+    assert client.post('/api/import', data=stream, content_type='text/plain').status_code == 415
+
+    client.application.config['MAX_CONTENT_LENGTH'] = len(stream) - 1
+    response = client.post('/api/import', data=stream, content_type='application/vnd.apache.arrow.stream')
+    assert response.status_code == 413
+
+def test_bulk_cli(app, db, tmp_path):
+    """Test the export-data and import-data commands."""
+    add_history(db)
+    path = str(tmp_path / 'station1.parquet')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['export-data', path, '--station-id', '1', '--since', '2000-01-01'])
+    assert result.exit_code == 0, result.output
+    assert 'Wrote 67 rows' in result.output
+
+    result = runner.invoke(args=['import-data', path])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 0 rows, skipped 67 already stored, rejected 0' in result.output
@@ -0,0 +1,96 @@
+from app.services.cache import MemoryCache, ALL_STATIONS
+from tests.helpers import make_reading
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    clock = FakeClock()
+    cache = MemoryCache(maxsize=10, ttl=30, clock=clock)
+    cache.set('key', [1], 'value')
+
+    assert cache.get('key') == 'value'
+    clock.now = 31
+    assert cache.get('key') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = MemoryCache(maxsize=2, ttl=30)
+    cache.set('a', [1], 'a')
+    cache.set('b', [1], 'b')
+    cache.get('a')
+    cache.set('c', [1], 'c')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a'
+    assert cache.get('c') == 'c'
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_invalidate_stations():
+    """Test that invalidation drops only entries for the given stations."""
+    cache = MemoryCache(maxsize=10, ttl=30)
+    cache.set('one', [1], 'one')
+    cache.set('two', [2], 'two')
+    cache.set('every', [ALL_STATIONS], 'every')
+    cache.invalidate_stations([1])
+
+    assert cache.get('one') is None
+    assert cache.get('every') is None
+    assert cache.get('two') == 'two'
+
+def test_sensor_data_reads_are_cached(client, db):
+    """Test that repeated reads hit the cache until the station ingests again."""
+    client.post('/api/sensor-data', json=make_reading())
+
+    first = client.get('/api/sensor-data?station_id=1')
+    second = client.get('/api/sensor-data?station_id=1')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data()
+
+    client.post('/api/sensor-data', json=make_reading(station_id=2))
+    assert client.get('/api/sensor-data?station_id=1').headers['X-Cache'] == 'HIT'
+
+    client.post('/api/sensor-data', json=make_reading())
+    third = client.get('/api/sensor-data?station_id=1')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert len(third.json) == 2
+
+    stats = client.get('/api/cache/stats').json
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+
+def test_cache_hits_skip_window_version(client, db, monkeypatch):
+    """Test that hits and revalidations of cached responses reuse the stored validators."""
+    client.post('/api/sensor-data', json=make_reading())
+    first = client.get('/api/sensor-data?station_id=1')
+    first_data = client.get('/data?station_id=1')
+
+    def fail(*args):
+        raise AssertionError('window_version ran on a cache hit')
+    monkeypatch.setattr('app.routes.window_version', fail)
+
+    for url, miss in (('/api/sensor-data?station_id=1', first), ('/data?station_id=1', first_data)):
+        hit = client.get(url)
+        assert hit.headers['X-Cache'] == 'HIT'
+        for header in ('ETag', 'Last-Modified', 'X-Next-Cursor'):
+            assert hit.headers[header] == miss.headers[header]
+        response = client.get(url, headers={'If-None-Match': miss.headers['ETag']})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == miss.headers['ETag']
+
+def test_cache_key_includes_format(client, db):
+    """Test that different response formats are cached separately."""
+    client.post('/api/sensor-data', json=make_reading())
+
+    client.get('/api/sensor-data?station_id=1')
+    response = client.get('/api/sensor-data?station_id=1&format=columnar')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'temperature' in response.json
@@ -0,0 +1,29 @@
+import os
+from sqlalchemy import text
+from app import create_app
+from app.models.sensor_data import db
+from app.utils.database import database_uri
+
+def test_database_uri_normalization():
+    """Test that relative SQLite paths and postgres:// URLs are normalized."""
+    assert database_uri('sqlite:///app.db', '/srv/suv') == 'sqlite:////srv/suv/app.db'
+    assert database_uri('sqlite:////data/app.db', '/srv/suv') == 'sqlite:////data/app.db'
+    assert database_uri('sqlite:///:memory:', '/srv/suv') == 'sqlite:///:memory:'
+    assert database_uri('postgres://user:pw@db:5432/suv', '/srv/suv') == 'postgresql://user:pw@db:5432/suv'
+
+def test_sqlite_profile_applied(tmp_path):
+    """Test that DATABASE_URL is honoured and new connections get the pragma profile."""
+    app = create_app({
+        'TESTING': True,
+        'DATABASE_URL': f'sqlite:///{tmp_path / "profile.db"}',
+        'SHARED_STATE_URL': 'memory://',
+        'SQLITE_BUSY_TIMEOUT_MS': 1234,
+        'DB_POOL_SIZE': 3,
+    })
+    with app.app_context():
+        assert os.path.exists(tmp_path / 'profile.db')
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 1234
+        assert db.session.execute(text('PRAGMA cache_size')).scalar() == -16384
+        assert db.engine.pool.size() == 3
@@ -0,0 +1,59 @@
+from app.services.events import get_event_hub
+from tests.helpers import make_reading
+
+def test_event_hub_fans_out_by_station(app, client, db):
+    """Test that new readings reach subscribers of their station only."""
+    hub = get_event_hub()
+    everything = hub.subscribe()
+    station_two = hub.subscribe([2])
+
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(station_id=2)])
+    hub.poll()
+
+    rows = [everything.queue.get(timeout=2), everything.queue.get(timeout=2)]
+    assert [row['station_id'] for row in rows] == [1, 2]
+    assert station_two.queue.get(timeout=2)['station_id'] == 2
+    assert station_two.queue.empty()
+
+    hub.unsubscribe(everything)
+    hub.unsubscribe(station_two)
+
+def test_subscription_overflow(app, db):
+    """Test that a subscriber whose queue is full is marked as overflowed."""
+    hub = get_event_hub()
+    subscription = hub.subscribe()
+    subscription.queue.maxsize = 1
+    subscription.offer([{'id': 1, 'station_id': 1}, {'id': 2, 'station_id': 1}])
+    assert subscription.overflowed
+    hub.unsubscribe(subscription)
+
+def test_stream_replays_from_last_event_id(app, client, db):
+    """Test that a reconnecting client gets the readings it missed as SSE messages."""
+    app.config['STREAM_MAX_SECONDS'] = 0
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(station_id=2), make_reading()])
+    first_id = client.get('/api/sensor-data?station_id=1').json[0]['id']
+
+    response = client.get('/api/stream?station_id=1', headers={'Last-Event-ID': str(first_id)})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    body = response.get_data(as_text=True)
+    assert body.startswith('retry: ')
+    messages = [block for block in body.split('\n\n') if block.startswith('id: ')]
+    assert len(messages) == 1
+    assert '"station_id":1' in messages[0]
+    assert int(messages[0].split('\n')[0][len('id: '):]) > first_id
+
+def test_stream_limit_per_worker(app, client, db):
+    """Test that streams beyond the per-worker limit get 503 until one closes."""
+    hub = get_event_hub()
+    hub.max_subscribers = 1
+    subscription = hub.subscribe()
+
+    response = client.get('/api/stream')
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+    hub.unsubscribe(subscription)
+    app.config['STREAM_MAX_SECONDS'] = 0
+    assert client.get('/api/stream').status_code == 200
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, UTC
+from app.models.sensor_data import SensorData
+from app.models.station_latest import StationLatest
+from app.services.latest import update_station_latest, rebuild_station_latest, latest_version
+from tests.helpers import add_readings
+
+def test_update_station_latest_is_incremental(db):
+    """Test that the snapshot keeps the newest reading per station."""
+    start = datetime.now(UTC) - timedelta(minutes=10)
+    add_readings(db, 1, start, 3)
+    add_readings(db, 2, start, 2, temperature=50.0)
+
+    assert update_station_latest() == 2
+    assert update_station_latest() == 0
+    assert db.session.get(StationLatest, 1).id == 3
+    assert db.session.get(StationLatest, 1).temperature == 22.0
+
+    add_readings(db, 2, start + timedelta(minutes=1), 1, temperature=60.0)
+    assert update_station_latest() == 1
+    latest = db.session.get(StationLatest, 2)
+    assert latest.id == 6
+    assert latest.temperature == 60.0
+
+def test_station_latest_ignores_older_readings(db):
+    """Test that readings committed later with older timestamps do not replace the latest one."""
+    now = datetime.now(UTC)
+    add_readings(db, 1, now - timedelta(minutes=1), 1, temperature=30.0)
+    update_station_latest()
+
+    add_readings(db, 1, now - timedelta(days=30), 5)
+    assert update_station_latest() == 0
+    assert db.session.get(StationLatest, 1).temperature == 30.0
+
+    rebuild_station_latest([1])
+    db.session.commit()
+    assert db.session.get(StationLatest, 1).id == 1
+
+def test_latest_version_never_repeats(db):
+    """Test that deleting the latest reading and inserting another changes the version."""
+    now = datetime.now(UTC)
+    add_readings(db, 1, now - timedelta(minutes=2), 2)
+    update_station_latest()
+    before = latest_version()
+
+    db.session.execute(SensorData.__table__.delete().where(SensorData.id == 2))
+    rebuild_station_latest([1])
+    db.session.commit()
+    add_readings(db, 1, now - timedelta(minutes=1), 1)
+    update_station_latest()
+    assert latest_version() not in (before, (0, 0))
+
+def test_rebuild_station_latest(db):
+    """Test that rebuilding falls back to the newest remaining reading."""
+    add_readings(db, 1, datetime.now(UTC) - timedelta(minutes=10), 3)
+    update_station_latest()
+    db.session.delete(db.session.get(StationLatest, 1))
+    db.session.commit()
+
+    rebuild_station_latest([1])
+    db.session.commit()
+    assert db.session.get(StationLatest, 1).id == 3
+
+def test_latest_endpoint(client, db):
+    """Test that posted readings show up in the latest snapshot endpoints."""
+    reading = {
+        'timestamp': 1, 'temperature': 25.5, 'humidity': 50, 'uv_index': 1, 'air_quality': 100,
+        'co2e': 400, 'fill_level': 10, 'rtc_time': '2024-02-14 12:00:00',
+        'bme_iaq_accuracy': 3, 'station_id': 1
+    }
+    client.post('/api/sensor-data', json=reading)
+    client.post('/api/sensor-data', json=dict(reading, temperature=26.5))
+
+    response = client.get('/api/stations/latest')
+    assert response.status_code == 200
+    assert list(response.json['data']) == ['1']
+    assert response.json['data']['1']['temperature'] == 26.5
+    assert response.json['data']['1']['id'] == 2
+    assert response.json['stations']['1']['name'] == 'Test Station'
+    assert client.get('/api/stations/latest', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    assert client.get('/sensor_data/1').json['temperature'] == 26.5
+    assert client.get('/sensor_data/2').status_code == 404
+
+def test_delete_data_updates_latest(client, db):
+    """Test that deleting a station's newest reading moves its snapshot back."""
+    add_readings(db, 1, datetime.now(UTC) - timedelta(minutes=10), 3)
+    update_station_latest()
+
+    client.post('/delete_data', json={'type': 'selected', 'ids': [3]})
+    assert client.get('/sensor_data/1').json['id'] == 2
+    client.post('/delete_data?type=all')
+    assert client.get('/api/stations/latest').json['data'] == {}
@@ -0,0 +1,57 @@
+import os
+import pstats
+from app import create_app
+from app.services.metrics import Metrics, MemoryMetricsStore, SQLiteMetricsStore, series
+
+def test_metrics_endpoint(client, db):
+    """Test that requests, queries and serialization show up in /metrics."""
+    client.get('/api/sensor-data?station_id=1')
+    client.get('/data')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE suv_http_request_duration_seconds histogram' in body
+    assert 'suv_http_requests_total{endpoint="get_sensor_data",method="GET",status="404"} 1' in body
+    assert 'suv_http_request_duration_seconds_count{endpoint="get_stations_data"} 1' in body
+    assert 'suv_http_request_duration_seconds_bucket{endpoint="get_stations_data",le="+Inf"} 1' in body
+    assert 'suv_db_queries_total{endpoint="get_stations_data"}' in body
+    assert 'suv_serialization_seconds_total{endpoint="get_stations_data"}' in body
+    assert 'suv_http_response_size_bytes_count{endpoint="get_stations_data"} 1' in body
+
+def test_histogram_buckets_are_cumulative_and_ordered():
+    """Test that observations fill every bucket at or above them, rendered in le order."""
+    metrics = Metrics(MemoryMetricsStore())
+    metrics.observe('suv_http_request_duration_seconds', 0.03, (0.01, 0.05, 0.5), endpoint='x')
+    metrics.observe('suv_http_request_duration_seconds', 0.2, (0.01, 0.05, 0.5), endpoint='x')
+
+    lines = [line for line in metrics.render().splitlines() if '_bucket' in line]
+    assert lines == [
+        'suv_http_request_duration_seconds_bucket{endpoint="x",le="0.01"} 0',
+        'suv_http_request_duration_seconds_bucket{endpoint="x",le="0.05"} 1',
+        'suv_http_request_duration_seconds_bucket{endpoint="x",le="0.5"} 2',
+        'suv_http_request_duration_seconds_bucket{endpoint="x",le="+Inf"} 2',
+    ]
+
+def test_sqlite_metrics_store_sums_workers(tmp_path):
+    """Test that deltas flushed by several workers add up in the shared store."""
+    path = str(tmp_path / 'shared.db')
+    key = series('suv_http_requests_total', endpoint='x', method='GET', status=200)
+    for _ in range(2):
+        worker = Metrics(SQLiteMetricsStore(path))
+        worker.inc(key)
+        worker.flush(force=True)
+    assert SQLiteMetricsStore(path).snapshot() == {key: 2.0}
+
+def test_profile_query_parameter(client, tmp_path):
+    """Test that profile=1 writes a pstats file only when opted in, keeping PROFILE_MAX_FILES of them."""
+    assert 'X-Profile' not in client.get('/health?profile=1').headers
+
+    client = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                         'SHARED_STATE_URL': 'memory://', 'PROFILE_ON_DEMAND': True,
+                         'PROFILE_DIR': str(tmp_path), 'PROFILE_MAX_FILES': 2}).test_client()
+    names = [client.get('/health?profile=1').headers['X-Profile'] for _ in range(3)]
+    assert sorted(os.listdir(tmp_path)) == sorted(names[1:])
+    assert pstats.Stats(str(tmp_path / names[-1])).total_calls > 0
+    assert 'X-Profile' not in client.get('/health').headers
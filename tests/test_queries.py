@@ -0,0 +1,94 @@
+import os
+import pytest
+from datetime import datetime, timedelta, UTC
+from flask_migrate import upgrade
+from sqlalchemy import inspect, text
+from app import create_app
+from app.models.sensor_data import SensorData
+from app.services.queries import sensor_data_window_select, aggregate_window, stored_reading_keys
+from tests.helpers import add_readings
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+
+def explain_query_plan(db, stmt):
+    """Return the SQLite query plan details for a SQLAlchemy statement."""
+    statement = stmt.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).fetchall()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize('station_ids', [[1], [1, 3]])
+def test_sensor_data_window_uses_index(db, station_ids):
+    """Test that station/time window reads are served by the composite index."""
+    since = datetime.now(UTC) - timedelta(hours=24)
+    stmt = sensor_data_window_select([SensorData.id, SensorData.temperature], station_ids, since)
+    plan = explain_query_plan(db, stmt)
+
+    assert any('USING INDEX ix_sensor_data_station_id_timestamp' in step for step in plan), plan
+    assert not any(step.startswith('SCAN sensor_data') for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+
+def test_sensor_data_delta_uses_index(db):
+    """Test that since-cursor reads seek the rows after the cursor id rather than the whole window."""
+    since = datetime.now(UTC) - timedelta(hours=24)
+    stmt = sensor_data_window_select([SensorData.id, SensorData.temperature], [1], since, after_id=10)
+    plan = explain_query_plan(db, stmt)
+    assert any('USING INDEX ix_sensor_data_station_id_id (station_id=? AND id>?)' in step for step in plan), plan
+    assert not any(step.startswith('SCAN sensor_data') for step in plan), plan
+
+    stmt = sensor_data_window_select([SensorData.id, SensorData.temperature], None, since, after_id=10)
+    plan = explain_query_plan(db, stmt)
+    assert any('USING INTEGER PRIMARY KEY (rowid>?)' in step for step in plan), plan
+
+def test_sensor_data_delta_returns_late_rows(db):
+    """Test that deltas include rows committed after the cursor row with an older timestamp."""
+    now = datetime.now(UTC)
+    add_readings(db, 1, now - timedelta(seconds=10), 1)
+    add_readings(db, 1, now - timedelta(seconds=1), 1)
+    add_readings(db, 1, now - timedelta(seconds=2), 1, temperature=30.0)
+    since = now - timedelta(hours=1)
+
+    rows = db.session.execute(sensor_data_window_select(
+        [SensorData.id, SensorData.temperature], [1], since, after_id=2)).all()
+    assert [tuple(row) for row in rows] == [(3, 30.0)]
+    rows = db.session.execute(sensor_data_window_select([SensorData.id], None, since, after_id=1)).all()
+    assert [row.id for row in rows] == [3, 2]  # Ordered by timestamp
+
+def test_stored_reading_keys_matches_exact_keys(db):
+    """Test that only the requested pairs are looked up, not every reading between them."""
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    add_readings(db, 1, start, 5, step=timedelta(minutes=1))
+    add_readings(db, 2, start, 1)
+    keys = [(1, start), (1, start + timedelta(minutes=4)), (1, start + timedelta(seconds=30)), (2, start)]
+
+    assert stored_reading_keys(keys) == {(1, start), (1, start + timedelta(minutes=4)), (2, start)}
+    assert stored_reading_keys([]) == set()
+
+def test_migrations_create_index(tmp_path):
+    """Test that the migrations add the index to a database created before it existed."""
+    db_path = tmp_path / 'legacy.db'
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+
+    with app.app_context():
+        from app.models.sensor_data import db
+        db.session.execute(text('DROP INDEX ix_sensor_data_station_id_timestamp'))
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS_DIR)
+
+        indexes = inspect(db.engine).get_indexes('sensor_data')
+        assert 'ix_sensor_data_station_id_timestamp' in [index['name'] for index in indexes]
+
+def test_aggregate_window_buckets(db):
+    """Test that readings are grouped into fixed buckets with avg/min/max."""
+    start = datetime.now(UTC).replace(second=0, microsecond=0) - timedelta(minutes=30)
+    add_readings(db, 1, start, 4)
+    add_readings(db, 2, start, 4, temperature=100.0)
+
+    rows = aggregate_window(1, start, 60)
+    assert [row['count'] for row in rows] == [2, 2]
+    assert rows[0]['timestamp'] == start.isoformat()
+    assert rows[0]['temperature'] == 20.5
+    assert rows[0]['temperature_min'] == 20.0
+    assert rows[0]['temperature_max'] == 21.0
+    assert rows[1]['temperature_max'] == 23.0
+    assert rows[0]['station_id'] == 1
@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timedelta, UTC
+from sqlalchemy import create_engine, text
+from app.models.sensor_data import SensorData
+from app.models.rollups import SensorData1m, SensorData1h
+from app.services.rollups import compact_rollups
+from app.services.retention import apply_retention, archive_path, expire_archives, delete_older_than
+from tests.helpers import add_readings, make_reading
+
+def test_delete_data_older_than(client, db):
+    """Test that older_than removes old readings and their rollup buckets only."""
+    now = datetime.now(UTC)
+    add_readings(db, 1, now - timedelta(days=2), 3)
+    add_readings(db, 1, now - timedelta(minutes=5), 2)
+    compact_rollups()
+
+    response = client.post('/delete_data?type=older_than&minutes=60')
+    assert response.status_code == 200
+    assert response.json['status'] == 'success'
+    assert response.json['deleted'] == 3
+    assert SensorData.query.count() == 2
+    assert sum(r.count for r in SensorData1m.query.all()) == 2
+
+def test_delete_older_than_rebuilds_boundary_buckets(app, db):
+    """Test that buckets spanning the cutoff keep only the readings after it."""
+    start = datetime(2024, 1, 1, 10, tzinfo=UTC)
+    add_readings(db, 1, start, 6, step=timedelta(minutes=10))
+    compact_rollups()
+
+    assert delete_older_than(start + timedelta(minutes=25)) == 3
+    hour = db.session.get(SensorData1h, (1, int(start.timestamp())))
+    assert hour.count == 3
+    assert hour.temperature_min == 23.0
+    assert db.session.get(SensorData1m, (1, int(start.timestamp()) + 1200)) is None
+
+def test_delete_data_all(client, db):
+    """Test that type=all empties the raw and rollup tables."""
+    add_readings(db, 1, datetime.now(UTC) - timedelta(minutes=5), 4)
+    compact_rollups()
+
+    response = client.post('/delete_data?type=all')
+    assert response.status_code == 200
+    assert response.json['deleted'] == 4
+    assert SensorData.query.count() == 0
+    assert SensorData1h.query.count() == 0
+
+def test_delete_data_selected_rebuilds_rollups(client, db):
+    """Test that deleting selected rows re-aggregates the buckets they belonged to."""
+    start = datetime.now(UTC).replace(second=0, microsecond=0) - timedelta(minutes=10)
+    add_readings(db, 1, start, 2)
+    compact_rollups()
+
+    response = client.post('/delete_data', json={'type': 'selected', 'ids': ['2']})
+    assert response.status_code == 200
+    assert response.json['deleted'] == 1
+
+    minute = db.session.get(SensorData1m, (1, int(start.timestamp())))
+    assert minute.count == 1
+    assert minute.temperature_max == 20.0
+
+def test_delete_data_then_ingest_keeps_new_ids(client, db):
+    """Test that readings posted after deleting the newest rows get fresh ids the watermarks pick up."""
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(), make_reading()])
+    client.post('/delete_data', json={'type': 'selected', 'ids': [3]})
+    client.post('/api/sensor-data', json=make_reading(temperature=30.0))
+
+    assert [row['id'] for row in client.get('/api/sensor-data?station_id=1&since=2').json] == [4]
+    assert client.get('/api/stations/latest').json['data']['1']['id'] == 4
+    assert client.get('/api/sensor-data?station_id=1&bucket=1h').json[0]['count'] == 3
+
+    client.post('/delete_data?type=all')
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(temperature=30.0)])
+
+    assert client.get('/api/stations/latest').json['data']['1']['id'] == 6
+    response = client.get('/api/sensor-data?station_id=1&bucket=1h')
+    assert response.status_code == 200
+    assert response.json[0]['count'] == 2
+
+def test_delete_data_invalid(client, db):
+    """Test that unknown types and missing parameters are rejected."""
+    assert client.post('/delete_data?type=everything').status_code == 400
+    assert client.post('/delete_data?type=older_than').status_code == 400
+    assert client.post('/delete_data', json={'type': 'selected', 'ids': []}).status_code == 400
+
+def test_apply_retention_archives_raw_rows(app, db, tmp_path):
+    """Test that expired raw rows move to monthly archive files and rollups keep their history."""
+    now = datetime(2024, 3, 10, tzinfo=UTC)
+    add_readings(db, 1, datetime(2024, 1, 31, 23, 59, tzinfo=UTC), 4)
+    add_readings(db, 1, now - timedelta(hours=1), 2)
+    app.config.update(RETENTION_RAW_DAYS=7, RETENTION_BATCH_SIZE=2, ARCHIVE_DIR=str(tmp_path))
+
+    summary = apply_retention(now)
+    assert summary['raw'] == 4
+    assert SensorData.query.count() == 2
+    assert sum(r.count for r in SensorData1h.query.all()) == 6
+
+    counts = {}
+    for month in (1, 2):
+        engine = create_engine(f'sqlite:///{archive_path(str(tmp_path), 2024, month)}')
+        with engine.connect() as connection:
+            counts[month] = connection.execute(text('SELECT count(*) FROM sensor_data')).scalar()
+        engine.dispose()
+    assert counts == {1: 2, 2: 2}
+
+def test_apply_retention_rollups_and_metrics(app, db):
+    """Test per-level rollup expiry and per-metric clearing."""
+    now = datetime.now(UTC).replace(second=0, microsecond=0)
+    add_readings(db, 1, now - timedelta(days=3), 2)
+    add_readings(db, 1, now - timedelta(minutes=5), 2)
+    compact_rollups()
+    app.config.update(RETENTION_ROLLUP_DAYS={'1m': 1, '1h': None, '1d': None},
+                      RETENTION_METRIC_DAYS={'co2e': 2})
+
+    summary = apply_retention(now)
+    assert summary['rollups'] == {'1m': 1}
+    assert summary['metrics'] == {'co2e': 2}
+    assert SensorData1m.query.count() == 1
+    assert SensorData.query.filter(SensorData.co2e.is_(None)).count() == 2
+
+def test_expire_archives(tmp_path):
+    """Test that only months older than the kept range are deleted."""
+    for year, month in ((2023, 12), (2024, 1), (2024, 2), (2024, 3)):
+        open(archive_path(str(tmp_path), year, month), 'w').close()
+    open(tmp_path / 'notes.txt', 'w').close()
+
+    dropped = expire_archives(str(tmp_path), 2, datetime(2024, 3, 15, tzinfo=UTC))
+    assert dropped == ['sensor_data_2023_12.db', 'sensor_data_2024_01.db']
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt', 'sensor_data_2024_02.db', 'sensor_data_2024_03.db']
+
+def test_apply_retention_cli(app, db):
+    """Test the apply-retention CLI command."""
+    add_readings(db, 1, datetime.now(UTC) - timedelta(days=10), 2)
+    app.config['RETENTION_RAW_DAYS'] = 7
+
+    result = app.test_cli_runner().invoke(args=['apply-retention'])
+    assert result.exit_code == 0
+    assert 'Removed 2 raw readings' in result.output
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, UTC
+from app.models.rollups import SensorData1m, SensorData1h, SensorData1d, RollupWatermark
+from app.services.queries import aggregate_window
+from app.services.rollups import (compact_rollups, rollup_for_bucket, rollups_current, aggregate_rollup_window,
+                                  aggregate_rollup_stations_window)
+from tests.helpers import add_readings
+
+def test_rollup_for_bucket():
+    """Test that the coarsest dividing rollup level is chosen."""
+    assert rollup_for_bucket(30) is None
+    assert rollup_for_bucket(90) is None
+    assert rollup_for_bucket(300) is SensorData1m
+    assert rollup_for_bucket(7200) is SensorData1h
+    assert rollup_for_bucket(86400 * 7) is SensorData1d
+
+def test_compact_rollups_is_incremental(db):
+    """Test that compaction only folds rows newer than the watermark."""
+    start = datetime.now(UTC).replace(second=0, microsecond=0) - timedelta(minutes=10)
+    add_readings(db, 1, start, 4)
+
+    assert compact_rollups() == 4
+    assert compact_rollups() == 0
+    assert db.session.get(RollupWatermark, 'sensor_data').last_id == 4
+
+    add_readings(db, 1, start + timedelta(seconds=60), 1, temperature=50.0)
+    assert compact_rollups() == 1
+
+    minute = db.session.get(SensorData1m, (1, int(start.timestamp()) + 60))
+    assert minute.count == 3
+    assert minute.temperature_count == 3
+    assert minute.temperature_sum == 22.0 + 23.0 + 50.0
+    assert minute.temperature_max == 50.0
+
+def test_compact_rollups_respects_batch_size(db):
+    """Test that a compaction pass is bounded by the batch size."""
+    start = datetime.now(UTC) - timedelta(minutes=10)
+    add_readings(db, 1, start, 5)
+
+    assert compact_rollups(batch_size=2) == 2
+    assert compact_rollups(batch_size=2) == 2
+    assert compact_rollups(batch_size=2) == 1
+    assert sum(r.count for r in SensorData1d.query.all()) == 5
+
+def test_rollup_window_matches_raw_aggregation(db):
+    """Test that rollup reads return the same aggregates as raw reads."""
+    start = datetime.now(UTC).replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+    add_readings(db, 1, start, 360)
+    add_readings(db, 2, start, 10)
+    compact_rollups()
+
+    raw = aggregate_window(1, start, 3600)
+    rolled = aggregate_rollup_window(SensorData1h, 1, start, 3600)
+    assert [r['count'] for r in rolled] == [r['count'] for r in raw]
+    for expected, actual in zip(raw, rolled):
+        assert actual['timestamp'] == expected['timestamp']
+        assert actual['temperature_min'] == expected['temperature_min']
+        assert actual['temperature_max'] == expected['temperature_max']
+        assert abs(actual['temperature'] - expected['temperature']) < 1e-9
+
+def test_rollup_window_clips_to_since(db):
+    """Test that rollup reads leave out readings before a window starting inside a rollup bucket."""
+    day = datetime(2024, 3, 1, tzinfo=UTC)
+    add_readings(db, 1, day + timedelta(hours=11, minutes=10), 1, temperature=99.0)
+    add_readings(db, 1, day + timedelta(hours=12, minutes=40), 3, step=timedelta(minutes=30))
+    compact_rollups()
+    since = day + timedelta(hours=12, minutes=30)
+
+    raw = aggregate_window(1, since, 86400)
+    assert [(r['count'], r['temperature_max']) for r in raw] == [(3, 22.0)]
+    for model in (SensorData1h, SensorData1d):
+        assert aggregate_rollup_stations_window(model, [1], since, 86400) == raw
+    assert aggregate_rollup_window(SensorData1h, 1, since, 3600) == aggregate_window(1, since, 3600)
+
+def test_compact_rollups_cli(app, db):
+    """Test the compact-rollups CLI command."""
+    app.config['ROLLUPS_ENABLED'] = False
+    add_readings(db, 1, datetime.now(UTC) - timedelta(minutes=5), 3)
+
+    result = app.test_cli_runner().invoke(args=['compact-rollups'])
+    assert result.exit_code == 0
+    assert '3 rows compacted' in result.output
+    assert SensorData1h.query.count() >= 1
+
+def test_rollups_current(db):
+    """Test that lagging rollups are detected."""
+    assert rollups_current()
+    add_readings(db, 1, datetime.now(UTC) - timedelta(minutes=5), 2)
+    assert not rollups_current()
+    compact_rollups()
+    assert rollups_current()
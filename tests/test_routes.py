@@ -1,5 +1,6 @@
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, UTC
+from tests.helpers import add_readings, make_reading
 
 def test_health_check(client):
     """Test the health check endpoint."""
@@ -94,4 +95,194 @@ def test_export_csv(client, db):
     response = client.get('/api/export-csv?station_id=1')
     assert response.status_code == 200
     assert response.headers['Content-Type'] == 'text/csv; charset=utf-8'
-    assert 'sensor_data_station_1.csv' in response.headers['Content-Disposition'] 
\ No newline at end of file
+    assert 'sensor_data_station_1.csv' in response.headers['Content-Disposition'] 
+
+def test_add_sensor_data_batch(client, db):
+    """Test adding a batch of valid readings."""
+    readings = [make_reading(station_id=1), make_reading(station_id=2)]
+    response = client.post('/api/sensor-data/batch', json=readings)
+    assert response.status_code == 201
+    assert response.json['accepted'] == 2
+    assert response.json['rejected'] == 0
+
+    response = client.get('/api/sensor-data?station_id=2')
+    assert response.status_code == 200
+    assert len(response.json) == 1
+
+def test_add_sensor_data_batch_partial_rejection(client, db):
+    """Test that invalid readings are rejected without failing the batch."""
+    readings = {'readings': [
+        make_reading(),
+        make_reading(temperature='invalid'),
+        {'temperature': 25.5},
+        make_reading(rtc_time=12)
+    ]}
+    response = client.post('/api/sensor-data/batch', json=readings)
+    assert response.status_code == 207
+    assert response.json['accepted'] == 1
+    assert response.json['rejected'] == 3
+    results = response.json['results']
+    assert [r['status'] for r in results] == ['accepted', 'rejected', 'rejected', 'rejected']
+    assert 'Missing required field' in results[2]['error']
+
+def test_add_sensor_data_batch_ndjson(client, db):
+    """Test adding a batch as newline-delimited JSON."""
+    body = '\n'.join([json.dumps(make_reading()), '{not json', json.dumps(make_reading())]) + '\n'
+    response = client.post('/api/sensor-data/batch', data=body,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 207
+    assert response.json['accepted'] == 2
+    assert response.json['results'][1]['status'] == 'rejected'
+    assert 'Invalid JSON' in response.json['results'][1]['error']
+
+def test_add_sensor_data_batch_limit(app, client, db):
+    """Test that oversized batches are refused."""
+    app.config['SENSOR_DATA_BATCH_LIMIT'] = 2
+    response = client.post('/api/sensor-data/batch', json=[make_reading()] * 3)
+    assert response.status_code == 413
+    assert 'error' in response.json
+
+def test_add_sensor_data_batch_invalid_body(client):
+    """Test that a batch must be an array of readings."""
+    response = client.post('/api/sensor-data/batch', json={'temperature': 25.5})
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+def test_export_csv_streams_multiple_stations(app, client, db):
+    """Test that CSV export streams rows for several stations in one file."""
+    app.config['CSV_EXPORT_CHUNK_SIZE'] = 2
+    readings = [make_reading(station_id=s) for s in (1, 2, 3) for _ in range(3)]
+    client.post('/api/sensor-data/batch', json=readings)
+
+    response = client.get('/api/export-csv?station_id=1&station_id=3')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'sensor_data_stations_1_3.csv' in response.headers['Content-Disposition']
+
+    body = response.data
+    assert body.startswith(b'\xef\xbb\xbf')
+    lines = body.decode('utf-8-sig').splitlines()
+    assert lines[0].startswith('station_id,timestamp,')
+    assert [line.split(',')[0] for line in lines[1:]] == ['1'] * 3 + ['3'] * 3
+
+def test_export_csv_all_stations(client, db):
+    """Test exporting every station at once."""
+    client.post('/api/sensor-data/batch', json=[make_reading(station_id=1), make_reading(station_id=2)])
+
+    response = client.get('/api/export-csv?station_id=all')
+    assert response.status_code == 200
+    assert 'sensor_data_all_stations.csv' in response.headers['Content-Disposition']
+    assert len(response.data.decode('utf-8-sig').splitlines()) == 3
+
+def test_export_csv_no_data(client, db):
+    """Test that exporting an empty window returns 404."""
+    response = client.get('/api/export-csv?station_id=42')
+    assert response.status_code == 404
+
+def test_get_sensor_data_aggregated(client, db):
+    """Test that bucket and points return per-bucket aggregates."""
+    client.post('/api/sensor-data/batch', json=[make_reading(temperature=t) for t in (20.0, 30.0)])
+
+    response = client.get('/api/sensor-data?station_id=1&bucket=1h')
+    assert response.status_code == 200
+    assert len(response.json) == 1
+    assert response.json[0]['count'] == 2
+    assert response.json[0]['temperature'] == 25.0
+    assert response.json[0]['temperature_min'] == 20.0
+    assert response.json[0]['temperature_max'] == 30.0
+
+    response = client.get('/api/sensor-data?station_id=1&points=10')
+    assert response.status_code == 200
+    assert sum(row['count'] for row in response.json) == 2
+
+def test_get_sensor_data_invalid_bucket(client):
+    """Test that an invalid bucket is rejected."""
+    response = client.get('/api/sensor-data?station_id=1&bucket=5w')
+    assert response.status_code == 400
+
+def test_get_sensor_data_conditional(client, db):
+    """Test that a matching If-None-Match gets a 304 until the station ingests again."""
+    client.post('/api/sensor-data', json=make_reading())
+
+    first = client.get('/api/sensor-data?station_id=1')
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    response = client.get('/api/sensor-data?station_id=1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+    # Other formats and buckets are different representations
+    response = client.get('/api/sensor-data?station_id=1&bucket=1h', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    client.post('/api/sensor-data', json=make_reading())
+    response = client.get('/api/sensor-data?station_id=1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.json) == 2
+
+def test_get_sensor_data_since_cursor(client, db):
+    """Test that since returns only rows newer than the cursor along with the next cursor."""
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(), make_reading(station_id=2)])
+
+    response = client.get('/api/sensor-data?station_id=1')
+    cursor = response.headers['X-Next-Cursor']
+    assert int(cursor) == max(row['id'] for row in response.json)
+
+    response = client.get(f'/api/sensor-data?station_id=1&since={cursor}')
+    assert response.status_code == 200
+    assert response.json == []
+    assert response.headers['X-Next-Cursor'] == cursor
+
+    client.post('/api/sensor-data', json=make_reading(temperature=30.0))
+    response = client.get(f'/api/sensor-data?station_id=1&since={cursor}')
+    assert [row['temperature'] for row in response.json] == [30.0]
+    assert int(response.headers['X-Next-Cursor']) == response.json[0]['id']
+
+def test_get_sensor_data_since_invalid(client):
+    """Test that since must be a row id and cannot be combined with buckets."""
+    assert client.get('/api/sensor-data?station_id=1&since=abc').status_code == 400
+    assert client.get('/api/sensor-data?station_id=1&since=1&bucket=1h').status_code == 400
+
+def test_get_stations_data(app, client, db):
+    """Test that /data returns every configured station grouped by station."""
+    app.config['STATIONS'] = {'1': {'name': 'One'}, '2': {'name': 'Two'}, '3': {'name': 'Three'}}
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(station_id=2), make_reading()])
+
+    response = client.get('/data')
+    assert response.status_code == 200
+    assert response.json['stations']['2'] == {'name': 'Two'}
+    data = response.json['data']
+    assert [len(data[key]) for key in ('1', '2', '3')] == [2, 1, 0]
+    assert data['1'] == client.get('/api/sensor-data?station_id=1').json
+
+    response = client.get('/data?station_id=2&format=columnar')
+    assert list(response.json['data']) == ['2']
+    assert response.json['data']['2']['temperature'] == [25.5]
+
+def test_get_stations_data_since_late_station(client, db):
+    """Test that one /data cursor still returns rows of a station stamped behind another's."""
+    now = datetime.now(UTC)
+    add_readings(db, 1, now - timedelta(seconds=1), 1)
+    cursor = client.get('/data?station_id=1&station_id=2').headers['X-Next-Cursor']
+
+    add_readings(db, 2, now - timedelta(seconds=5), 1, temperature=30.0)
+    response = client.get(f'/data?station_id=1&station_id=2&since={cursor}')
+    assert response.json['data']['1'] == []
+    assert [row['temperature'] for row in response.json['data']['2']] == [30.0]
+
+def test_get_stations_data_since_and_buckets(client, db):
+    """Test that /data supports since cursors and bucketed aggregates."""
+    client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(station_id=2)])
+    cursor = client.get('/data?station_id=1&station_id=2').headers['X-Next-Cursor']
+
+    client.post('/api/sensor-data', json=make_reading(station_id=2, temperature=30.0))
+    response = client.get(f'/data?station_id=1&station_id=2&since={cursor}')
+    assert response.json['data']['1'] == []
+    assert [row['temperature'] for row in response.json['data']['2']] == [30.0]
+
+    response = client.get('/data?station_id=1&station_id=2&bucket=1h')
+    assert sum(row['count'] for row in response.json['data']['2']) == 2
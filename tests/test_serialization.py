@@ -0,0 +1,123 @@
+import json
+import math
+import struct
+import pytest
+from datetime import datetime, timedelta, UTC
+from flask import jsonify
+from app.models.sensor_data import SensorData
+from app.schemas import SensorDataSchema
+from app.services import serialization
+
+def add_mixed_readings(db):
+    now = datetime.now(UTC)
+    db.session.add_all([
+        SensorData(timestamp=now - timedelta(minutes=2), temperature=25.5, humidity=60.0,
+                   uv_index=2.5e-05, air_quality=-1.0, co2e=400.0, fill_level=75.0,
+                   rtc_time=now.replace(microsecond=0), bme_iaq_accuracy=3, station_id=1),
+        SensorData(timestamp=now - timedelta(minutes=1), temperature=None, humidity=1e-7,
+                   uv_index=0.0, air_quality=99.999, co2e=1e16, fill_level=0.1,
+                   rtc_time=None, bme_iaq_accuracy=0, station_id=1),
+    ])
+    db.session.commit()
+
+def marshmallow_body(app):
+    """The response body produced by the original marshmallow path."""
+    with app.test_request_context():
+        rows = SensorData.query.filter_by(station_id=1).order_by(SensorData.timestamp).all()
+        return jsonify(SensorDataSchema(many=True).dump(rows)).get_data()
+
+def test_fast_path_is_byte_compatible(app, client, db):
+    """Test that the column-tuple encoder matches marshmallow output byte for byte."""
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == marshmallow_body(app)
+
+def test_orjson_encoder_is_equivalent(app, client, db):
+    """Test that the optional orjson encoder returns the same data."""
+    if serialization.orjson is None:
+        pytest.skip('orjson is not installed')
+    add_mixed_readings(db)
+    app.config['SENSOR_DATA_JSON_ENCODER'] = 'orjson'
+
+    response = client.get('/api/sensor-data?station_id=1')
+    assert response.status_code == 200
+    assert response.json == json.loads(marshmallow_body(app))
+
+def test_columnar_format(client, db):
+    """Test the opt-in columnar JSON format."""
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1&format=columnar')
+    assert response.status_code == 200
+    columns = response.json
+    assert columns['temperature'] == [25.5, None]
+    assert columns['rtc_time'][1] is None
+    assert columns['timestamp'][0] < columns['timestamp'][1]
+    assert isinstance(columns['timestamp'][0], int)
+    assert len(columns['id']) == 2
+
+def test_columnar_format_aggregated(client, db):
+    """Test that bucketed aggregates can be returned as columns."""
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1&bucket=1d&format=columnar')
+    assert response.status_code == 200
+    assert sum(response.json['count']) == 2
+    assert isinstance(response.json['timestamp'][0], int)
+
+def test_invalid_format(client):
+    """Test that unknown formats are rejected."""
+    response = client.get('/api/sensor-data?station_id=1&format=xml')
+    assert response.status_code == 400
+
+def test_packed_format(client, db):
+    """Test the packed binary format selected through Accept."""
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1',
+                          headers={'Accept': 'application/octet-stream'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/octet-stream'
+    assert 'Accept' in response.headers['Vary']
+
+    body = response.get_data()
+    (header_length,) = struct.unpack_from('<I', body)
+    header = json.loads(body[4:4 + header_length])
+    assert header['rows'] == 2
+
+    offset = 4 + header_length
+    columns = {}
+    for column in header['columns']:
+        fmt = '<2q' if column['dtype'] == '<i8' else '<2d'
+        columns[column['name']] = struct.unpack_from(fmt, body, offset)
+        offset += 16
+    assert offset == len(body)
+    assert columns['temperature'][0] == 25.5
+    assert math.isnan(columns['temperature'][1])
+    assert math.isnan(columns['rtc_time'][1])
+
+def test_arrow_format(client, db):
+    """Test the Arrow IPC format selected through Accept."""
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1',
+                          headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert response.status_code == 200
+    table = pyarrow.ipc.open_stream(response.get_data()).read_all()
+    assert table.num_rows == 2
+    assert table.column('temperature').to_pylist() == [25.5, None]
+    assert str(table.schema.field('timestamp').type) == 'timestamp[ms, tz=UTC]'
+
+def test_arrow_format_without_pyarrow(client, db, monkeypatch):
+    """Test that Arrow requests are refused when pyarrow is missing."""
+    monkeypatch.setattr('app.routes.PYARROW_AVAILABLE', False)
+    add_mixed_readings(db)
+
+    response = client.get('/api/sensor-data?station_id=1',
+                          headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert response.status_code == 406
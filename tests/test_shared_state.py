@@ -0,0 +1,83 @@
+import sqlite3
+from app.services.cache import SQLiteCache
+from app.services.shared_state import SQLiteLimiterStorage
+
+def test_limiter_storage_counts_across_instances(tmp_path):
+    """Two limiter storages on the same file share one counter per key."""
+    uri = f'sqlite:///{tmp_path / "state.db"}'
+    first = SQLiteLimiterStorage(uri)
+    second = SQLiteLimiterStorage(uri)
+
+    assert first.incr('key', 60) == 1
+    assert second.incr('key', 60) == 2
+    assert first.get('key') == 2
+    assert second.get_expiry('key') > 0
+
+    first.clear('key')
+    assert second.get('key') == 0
+
+def test_limiter_storage_starts_new_window_after_expiry(tmp_path):
+    """An expired counter restarts from the increment amount."""
+    storage = SQLiteLimiterStorage(f'sqlite:///{tmp_path / "state.db"}')
+    storage.incr('key', 0)
+    assert storage.get('key') == 0
+    assert storage.incr('key', 60, amount=3) == 3
+
+def test_sqlite_cache_is_shared_and_invalidated(tmp_path):
+    """Entries set by one worker are seen and invalidated by another."""
+    path = str(tmp_path / 'state.db')
+    first = SQLiteCache(path)
+    second = SQLiteCache(path)
+
+    first.set(('sensor-data', 1), [1], (b'body', 'application/json', {'cursor': 1}))
+    first.set(('sensor-data', 2), [2], (b'other', 'application/json', {}))
+    assert second.get(('sensor-data', 1)) == (b'body', 'application/json', {'cursor': 1})
+
+    second.invalidate_stations({1})
+    assert first.get(('sensor-data', 1)) is None
+    assert first.get(('sensor-data', 2)) == (b'other', 'application/json', {})
+    assert first.stats()['invalidations'] == 1
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    """The least recently read entry is evicted once maxsize is exceeded."""
+    now = [0.0]
+    cache = SQLiteCache(str(tmp_path / 'state.db'), maxsize=2, clock=lambda: now[0])
+    for key in ('a', 'b'):
+        now[0] += 1
+        cache.set(key, [1], (key.encode(), 'text/plain', {}))
+    now[0] += 1
+    cache.get('a')
+    now[0] += 1
+    cache.set('c', [1], (b'c', 'text/plain', {}))
+
+    assert cache.get('b') is None
+    assert cache.get('a') == (b'a', 'text/plain', {})
+    assert cache.stats()['evictions'] == 1
+
+def test_sqlite_cache_reads_skip_the_write_lock(tmp_path):
+    """Hits are served while another worker holds the write lock; their counts are written in batches."""
+    path = str(tmp_path / 'state.db')
+    cache = SQLiteCache(path, flush_every=3, flush_seconds=3600)
+    cache.set('a', [1], (b'a', 'text/plain', {}))
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    assert cache.get('a') == (b'a', 'text/plain', {})
+    assert cache.get('b') is None
+    writer.execute('ROLLBACK')
+
+    assert cache.get('a') == (b'a', 'text/plain', {})  # Third read flushes
+    counters = dict(writer.execute('SELECT name, value FROM response_cache_stats'))
+    assert (counters['hits'], counters['misses']) == (2, 1)
+
+def test_app_uses_shared_sqlite_state(tmp_path):
+    """A sqlite SHARED_STATE_URL backs both the limiter and the response cache."""
+    from app import create_app
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SHARED_STATE_URL': f'sqlite:///{tmp_path / "state.db"}',
+    })
+    assert isinstance(app.extensions['response_cache'], SQLiteCache)
+    assert isinstance(app.limiter._storage, SQLiteLimiterStorage)
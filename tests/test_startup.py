@@ -0,0 +1,43 @@
+import json
+from sqlalchemy import inspect
+from app import create_app
+from app.models.sensor_data import db
+from app.services.api_docs import export_openapi
+
+def make_app(tmp_path, **overrides):
+    config = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "startup.db"}',
+        'SHARED_STATE_URL': 'memory://',
+    }
+    config.update(overrides)
+    return create_app(config)
+
+def test_api_docs_list_documented_routes(client):
+    """Test that the OpenAPI spec documents the API routes."""
+    response = client.get('/swagger/')
+    assert response.status_code == 200
+    assert {'/api/sensor-data', '/api/sensor-data/batch', '/health'} <= set(response.json['paths'])
+
+def test_fast_boot_defers_schema_and_docs(tmp_path):
+    """Test that FAST_BOOT skips create_all and Flask-Migrate and documents routes on demand."""
+    app = make_app(tmp_path, FAST_BOOT=True)
+    with app.app_context():
+        assert not inspect(db.engine).has_table('sensor_data')
+    assert 'migrate' not in app.extensions
+    assert 'db' in app.cli.commands
+    assert not app.extensions['api_docs']._documented
+
+    response = app.test_client().get('/swagger/')
+    assert '/api/sensor-data' in response.json['paths']
+
+def test_api_spec_file_served(tmp_path):
+    """Test that a spec exported ahead of time is served as is."""
+    spec_path = tmp_path / 'openapi.json'
+    export_openapi(make_app(tmp_path), str(spec_path))
+
+    app = make_app(tmp_path, FAST_BOOT=True, API_SPEC_FILE=str(spec_path))
+    response = app.test_client().get('/swagger/')
+    assert response.status_code == 200
+    assert response.json == json.loads(spec_path.read_text())
+    assert not app.extensions['api_docs']._documented
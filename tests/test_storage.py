@@ -0,0 +1,109 @@
+import os
+from datetime import datetime, timedelta, UTC
+import pytest
+from app.services.queries import aggregate_stations_window
+from app.models.rollups import SensorData1h
+from app.services.retention import delete_ids, delete_older_than
+from app.services.rollups import compact_rollups
+from app.services.storage import SQLStorage, create_storage
+from tests.helpers import add_history, add_readings
+
+pytest.importorskip('pyarrow')
+
+@pytest.fixture
+def storage(app, db, tmp_path):
+    """Switch the app to the Parquet backend with small segments."""
+    app.config.update(STORAGE_BACKEND='parquet', STORAGE_DIR=str(tmp_path / 'storage'), STORAGE_SEGMENT_ROWS=40)
+    app.extensions['storage'] = create_storage(app.config)
+    return app.extensions['storage']
+
+def assert_same_scans(storage, since):
+    for station_ids in ([1], [2], [1, 2], None):
+        for after_id in (None, 30, 100):
+            expected = [tuple(row) for row in SQLStorage().scan(station_ids, since, after_id)]
+            assert [tuple(row) for row in storage.scan(station_ids, since, after_id)] == expected
+
+def test_parquet_scan_matches_sql(storage, db):
+    """Test that segments plus the unsegmented tail return exactly the SQL rows."""
+    add_history(db)
+    assert storage.sync() == 80
+    assert len(storage.segments()) == 2
+    assert storage.covered_id() == 80
+
+    for since in (datetime.now(UTC) - timedelta(hours=4), datetime.now(UTC) - timedelta(minutes=50)):
+        assert_same_scans(storage, since)
+
+def test_parquet_scan_matches_sql_for_late_rows(storage, db):
+    """Test that rows committed after newer ones match the SQL delta reads with either backend."""
+    add_history(db)
+    storage.sync()
+    # Backfilled readings: new ids, old timestamps, some inside the segments' time range
+    add_readings(db, 2, datetime.now(UTC) - timedelta(hours=2), 12, step=timedelta(minutes=7))
+    assert_same_scans(storage, datetime.now(UTC) - timedelta(hours=4))
+
+def test_parquet_aggregate_matches_sql(storage, db):
+    """Test that the vectorized aggregation matches the SQL GROUP BY."""
+    add_history(db)
+    storage.sync()
+    since = datetime.now(UTC) - timedelta(hours=4)
+
+    for bucket_seconds in (300, 3600):
+        expected = aggregate_stations_window([1, 2], since, bucket_seconds)
+        result = storage.aggregate([1, 2], since, bucket_seconds)
+        assert [(row['station_id'], row['timestamp'], row['count']) for row in result] == \
+            [(row['station_id'], row['timestamp'], row['count']) for row in expected]
+        for row, expected_row in zip(result, expected):
+            assert row == pytest.approx(expected_row)
+
+def test_parquet_aggregate_uses_rollups(storage, db):
+    """Test that minute, hour and day multiples are read from current rollups instead of the segments."""
+    add_history(db)
+    storage.sync()
+    compact_rollups()
+    since = datetime.now(UTC) - timedelta(hours=4)
+    db.session.execute(SensorData1h.__table__.update().values(temperature_max=999.0))
+
+    assert {row['temperature_max'] for row in storage.aggregate([1, 2], since, 7200)} == {999.0}
+    assert 999.0 not in {row['temperature_max'] for row in storage.aggregate([1, 2], since, 90)}
+
+def test_parquet_sync_waits_for_a_full_segment(storage, db):
+    """Test that sync only cuts a segment once the ids past the last one could fill it."""
+    add_readings(db, 1, datetime.now(UTC) - timedelta(hours=1), 39)
+    assert storage.sync() == 0
+    add_readings(db, 1, datetime.now(UTC), 1)
+    assert storage.sync() == 40
+    assert storage.sync() == 0
+    assert storage.sync(force=True) == 0
+
+def test_parquet_segments_follow_deletes(storage, db):
+    """Test that deleting rows and expiring old ones also updates the segments."""
+    add_history(db)
+    storage.sync(force=True)
+    assert storage.covered_id() == 112
+    since = datetime.now(UTC) - timedelta(hours=4)
+
+    delete_ids([3, 41, 42, 112])
+    assert_same_scans(storage, since)
+
+    delete_older_than(datetime.now(UTC) - timedelta(minutes=90))
+    assert_same_scans(storage, since)
+    assert storage.stats()['rows'] == len(SQLStorage().scan(None, since))
+
+    delete_older_than(None)
+    assert storage.segments() == []
+    assert storage.scan(None, since) == []
+
+def test_sensor_data_route_with_parquet_backend(app, client, storage, db):
+    """Test that the API returns the same body from either backend."""
+    add_history(db)
+    storage.sync()
+    app.config['RESPONSE_CACHE_TTL'] = 0
+
+    for query in ('station_id=1&hours=4', 'station_id=2&hours=4&bucket=15m', 'station_id=1&hours=4&format=columnar'):
+        parquet_body = client.get(f'/api/sensor-data?{query}').get_data()
+        app.extensions['storage'] = SQLStorage()
+        app.config['ROLLUPS_ENABLED'] = False
+        sql_body = client.get(f'/api/sensor-data?{query}').get_data()
+        app.extensions['storage'] = storage
+        assert parquet_body == sql_body
+    assert os.path.isdir(app.config['STORAGE_DIR'])
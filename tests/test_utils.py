@@ -1,9 +1,13 @@
+import math
 import pytest
 from datetime import datetime
 from app.utils.validators import (
     convert_air_quality_to_percent,
     validate_sensor_data,
+    validate_sensor_batch,
     format_rtc_time,
+    parse_bucket_seconds,
+    bucket_for_points,
     ValidationError
 )
 
@@ -67,4 +71,78 @@ def test_format_rtc_time_valid():
 def test_format_rtc_time_invalid():
     """Test RTC time formatting with invalid input."""
     with pytest.raises(ValidationError):
-        format_rtc_time('invalid_time_format') 
\ No newline at end of file
+        format_rtc_time('invalid_time_format')
+
+def test_parse_bucket_seconds():
+    """Test parsing bucket sizes with and without units."""
+    assert parse_bucket_seconds('300') == 300
+    assert parse_bucket_seconds('5m') == 300
+    assert parse_bucket_seconds('1h') == 3600
+    assert parse_bucket_seconds('1d') == 86400
+    with pytest.raises(ValidationError):
+        parse_bucket_seconds('0')
+    with pytest.raises(ValidationError):
+        parse_bucket_seconds('5w')
+
+def test_bucket_for_points():
+    """Test choosing a bucket size from a target number of points."""
+    assert bucket_for_points(24, 288) == 300
+    assert bucket_for_points(1, 10000) == 1
+    with pytest.raises(ValidationError):
+        bucket_for_points(24, 0)
+
+BATCH_READINGS = [
+    {'timestamp': 1, 'temperature': 25.5, 'humidity': '60.0', 'uv_index': 'NaN', 'air_quality': 250,
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '2024-02-14 12:00:00', 'bme_iaq_accuracy': '3', 'station_id': 1},
+    {'timestamp': 1, 'temperature': 'invalid', 'humidity': 60.0, 'uv_index': 5.0, 'air_quality': -3,
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '2024-02-14 12:00:00', 'bme_iaq_accuracy': 3, 'station_id': 1},
+    {'timestamp': 1, 'temperature': 20, 'humidity': None, 'uv_index': 5.0, 'air_quality': 'nan',
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '2024-02-14 12:00:00', 'bme_iaq_accuracy': 3, 'station_id': 1},
+    {'timestamp': 1, 'temperature': 20, 'humidity': 50, 'uv_index': 5.0, 'air_quality': -1,
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '0-2-3 4:05:06', 'bme_iaq_accuracy': 3, 'station_id': '2'},
+    {'timestamp': 1, 'temperature': 20, 'humidity': 50, 'uv_index': 5.0, 'air_quality': 80,
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '2024-13-14 12:00:00', 'bme_iaq_accuracy': 3, 'station_id': 1},
+    {'timestamp': 1, 'temperature': 20, 'humidity': 50, 'uv_index': 5.0, 'air_quality': 80,
+     'co2e': 400, 'fill_level': 75.0, 'rtc_time': '2024-02-14 12:00:00', 'bme_iaq_accuracy': 'NaN', 'station_id': 1},
+    {'timestamp': 1, 'temperature': 20},
+    ['not', 'a', 'reading'],
+    ValidationError('Invalid JSON: Expecting value'),
+]
+
+def per_dict_result(reading):
+    """Run the single-reading validators and return (values, error)."""
+    if isinstance(reading, ValidationError):
+        return None, reading.message
+    if not isinstance(reading, dict):
+        return None, 'Reading must be a JSON object'
+    data = dict(reading)
+    try:
+        validate_sensor_data(data)
+        data['rtc_time'] = format_rtc_time(data['rtc_time'])
+    except ValidationError as e:
+        return None, e.message
+    return data, None
+
+def test_validate_sensor_batch_matches_per_dict_path():
+    """Test that the columnar validator converts and rejects exactly like the per-dict path."""
+    columns, valid, errors = validate_sensor_batch(BATCH_READINGS)
+    assert len(valid) == len(BATCH_READINGS)
+    for index, reading in enumerate(BATCH_READINGS):
+        expected, error = per_dict_result(reading)
+        assert valid[index] == (error is None)
+        assert errors.get(index) == error
+        if expected is None:
+            continue
+        for field, values in columns.items():
+            value = values[index]
+            assert type(value) is type(expected[field]) or field == 'air_quality'
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(expected[field])
+            else:
+                assert value == expected[field]
+
+def test_validate_sensor_batch_empty():
+    """Test that an empty batch yields empty columns."""
+    columns, valid, errors = validate_sensor_batch([])
+    assert valid == [] and errors == {}
+    assert all(len(values) == 0 for values in columns.values())
@@ -0,0 +1,77 @@
+import time
+import pytest
+from app import create_app
+from app.models.sensor_data import db, SensorData
+from app.services.write_queue import WriteQueue
+from tests.helpers import make_reading
+
+@pytest.fixture
+def queued_app(tmp_path):
+    """App in write-behind mode; the drainer's timer is long so tests drain explicitly."""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "app.db"}',
+        'SHARED_STATE_URL': 'memory://',
+        'INGEST_MODE': 'queued',
+        'INGEST_QUEUE_PATH': str(tmp_path / 'queue.db'),
+        'INGEST_QUEUE_MAX_DEPTH': 3,
+        'INGEST_FLUSH_ROWS': 2,
+        'INGEST_FLUSH_MS': 60000,
+    })
+    return app
+
+def count_rows(app):
+    with app.app_context():
+        return db.session.query(SensorData).count()
+
+def test_queued_ingest_returns_202_and_drains_in_groups(queued_app):
+    """Test that queued readings are committed by the drainer in groups of INGEST_FLUSH_ROWS."""
+    client = queued_app.test_client()
+    for station_id in (1, 1, 2):
+        assert client.post('/api/sensor-data', json=make_reading(station_id=station_id)).status_code == 202
+    assert count_rows(queued_app) == 0
+
+    queue = queued_app.extensions['write_queue']
+    assert queue.depth() == 3
+    assert queue.drain() == 2
+    assert queue.drain() == 1
+    assert queue.drain() == 0
+
+    assert count_rows(queued_app) == 3
+    stats = client.get('/api/ingest/stats').json
+    assert stats['depth'] == 0
+    assert stats['flushed'] == 3
+
+def test_queued_ingest_backpressure(queued_app):
+    """Test that a full queue answers 503 with Retry-After."""
+    client = queued_app.test_client()
+    queued_app.extensions['write_queue'].flush_rows = 10  # A batch this small does not wake the drainer
+    response = client.post('/api/sensor-data/batch', json=[make_reading(), make_reading(), make_reading()])
+    assert response.status_code == 202
+
+    response = client.post('/api/sensor-data', json=make_reading())
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+def test_resume_drains_after_restart(queued_app):
+    """Test that readings left in the queue by a previous process are drained at boot without new traffic."""
+    client = queued_app.test_client()
+    for _ in range(2):
+        assert client.post('/api/sensor-data', json=make_reading()).status_code == 202
+
+    path = queued_app.config['INGEST_QUEUE_PATH']
+    idle = WriteQueue(queued_app, str(path) + '.empty', flush_ms=10)
+    idle.resume()
+    assert idle._pid is None  # Nothing queued, no drainer
+
+    restarted = WriteQueue(queued_app, path, flush_rows=2, flush_ms=10)
+    restarted.resume()
+    deadline = time.monotonic() + 5
+    while restarted.depth() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert restarted.depth() == 0
+    assert count_rows(queued_app) == 2
+
+def test_sync_ingest_stats(client):
+    """Test that the default mode commits synchronously."""
+    assert client.get('/api/ingest/stats').json == {'mode': 'sync'}